@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+JARVIS extraction benchmark - jarvis_extract against the previous BeautifulSoup path on saved pages
+Both the 300-character search snippet and the 10,000-character fetch_html() text are timed per page.
+
+The corpus is, in order of preference: the .html files in --pages, the pages in the JARVIS page cache,
+or generated news-style pages of several sizes.
+
+Usage:
+    python benchmarks/bench_extract.py                          # cached or generated pages
+    python benchmarks/bench_extract.py --pages saved_pages/     # a directory of saved .html files
+    python benchmarks/bench_extract.py --save-corpus saved_pages/   # save the cached pages for later runs
+"""
+
+import os
+import sys
+import glob
+import time
+import sqlite3
+import argparse
+import statistics
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from jarvis_extract import extract_text, extract_snippet  # noqa: E402
+
+
+def bs_snippet(html_content):
+    """search() snippet extraction before jarvis_extract: full BeautifulSoup tree, then the first 300 characters"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text_content = soup.get_text()
+    lines = (line.strip() for line in text_content.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text_content = ' '.join(chunk for chunk in chunks if chunk)
+    if len(text_content) > 300:
+        text_content = text_content[:300] + "..."
+    return text_content
+
+
+def bs_clean_text(html_content):
+    """fetch_html() text extraction before jarvis_extract"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, "html.parser")
+    for script in soup(["script", "style", "header", "footer", "nav", "aside"]):
+        script.extract()
+    return " ".join(soup.get_text(separator=" ").split())[:10000]
+
+
+def cached_pages():
+    from jarvis_cache import CACHE_DIR
+    path = os.path.join(CACHE_DIR, "pages.sqlite3")
+    if not os.path.exists(path):
+        return []
+    with sqlite3.connect(path) as db:
+        rows = db.execute("SELECT url, body FROM pages WHERE content_type LIKE '%html%'").fetchall()
+    return [(url, body) for url, body in rows if body]
+
+
+def generated_pages():
+    from bench_latency import canned_page
+    return [(f"generated/{paragraphs}", canned_page(index, paragraphs))
+            for index, paragraphs in enumerate((5, 20, 60, 150, 400))]
+
+
+def load_corpus(pages_dir):
+    if pages_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as page_file:
+                pages.append((os.path.basename(path), page_file.read()))
+        return pages, pages_dir
+    pages = cached_pages()
+    if pages:
+        return pages, "page cache"
+    return generated_pages(), "generated pages"
+
+
+def time_per_page(function, pages, repeat):
+    """Median milliseconds per page over repeat runs, and the outputs"""
+    timings, outputs = [], []
+    for _, html in pages:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = function(html)
+            samples.append((time.perf_counter() - start) * 1000)
+        timings.append(statistics.median(samples))
+        outputs.append(output)
+    return timings, outputs
+
+
+def word_overlap(new_texts, old_texts):
+    """Share of words in the new output that the old extraction also produced, a sanity check on content"""
+    shares = []
+    for new, old in zip(new_texts, old_texts):
+        words = new.replace("...", " ").split()
+        if words:
+            old_words = set(old.split())
+            shares.append(sum(word in old_words for word in words) / len(words))
+    return statistics.mean(shares) if shares else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML text extraction benchmark")
+    parser.add_argument("--pages", help="directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per page, the median is used")
+    parser.add_argument("--save-corpus", help="write the cached pages to this directory and exit")
+    args = parser.parse_args()
+
+    if args.save_corpus:
+        os.makedirs(args.save_corpus, exist_ok=True)
+        pages = cached_pages()
+        for index, (url, html) in enumerate(pages):
+            with open(os.path.join(args.save_corpus, f"page_{index:04d}.html"), "w", encoding="utf-8") as page_file:
+                page_file.write(html)
+        print(f"💾 Saved {len(pages)} cached pages to {args.save_corpus}")
+        return
+
+    pages, source = load_corpus(args.pages)
+    if not pages:
+        print("No pages to benchmark")
+        sys.exit(1)
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    print(f"\n⏱️ Extraction benchmark: {len(pages)} pages from {source} ({total_kb:.0f} KB), median of {args.repeat} runs")
+    print(f"  {'task':<22} {'engine':<16} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9}")
+
+    for task, old_function, new_function, reference in (
+        ("snippet (300 chars)", bs_snippet, extract_snippet, bs_clean_text),
+        ("page text (10k chars)", bs_clean_text, lambda html: extract_text(html, 10000), bs_clean_text),
+    ):
+        old_timings, _ = time_per_page(old_function, pages, args.repeat)
+        new_timings, new_outputs = time_per_page(new_function, pages, args.repeat)
+        for engine, timings in (("BeautifulSoup", old_timings), ("jarvis_extract", new_timings)):
+            print(f"  {task:<22} {engine:<16} {statistics.mean(timings):9.2f} {statistics.median(timings):9.2f} {max(timings):9.2f}")
+        speedup = statistics.mean(old_timings) / max(statistics.mean(new_timings), 1e-9)
+        overlap = word_overlap(new_outputs, [reference(html) for _, html in pages])
+        print(f"  {'':<22} {'speedup':<16} {speedup:8.1f}x   words also in the old text: {overlap:.0%}")
+
+
+if __name__ == "__main__":
+    main()
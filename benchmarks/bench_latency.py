@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+JARVIS latency benchmark - pipeline() and Jarvis.get_ai_response() end to end, fully offline
+A local OpenAI-compatible stub (OPENAI_BASE_URL) answers every model call after a configurable delay,
+a local HTTP server serves canned HTML pages, and search_urls() is patched to return those pages.
+Caches live in a throwaway JARVIS_CACHE_DIR and are cleared before every question unless --warm.
+
+Usage:
+    python benchmarks/bench_latency.py                        # measure and compare with the saved baseline
+    python benchmarks/bench_latency.py --update               # save the current numbers as the baseline
+    python benchmarks/bench_latency.py --runs 5 --llm-latency 0.4 --web-latency 0.1
+    python benchmarks/bench_latency.py --warm                 # keep caches between questions
+
+Exits with status 1 when a p50 or p95 regresses past the threshold.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "latency_baseline.json")
+sys.path.insert(0, REPO_DIR)
+
+# Fixed question corpus: (question, label the stub's classifier answers with)
+CORPUS = [
+    ("What is the population of Taiwan?", "search"),
+    ("Who is the CEO of Apple?", "search"),
+    ("How tall is the Eiffel Tower?", "search"),
+    ("What's the weather in Taipei today?", "search"),
+    ("When was the Declaration of Independence signed?", "search"),
+    ("What is the price of bitcoin right now?", "search"),
+    ("Which country has the most gold medals?", "search"),
+    ("How long is the Great Wall of China?", "search"),
+    ("Hello JARVIS, how are you doing?", "casual"),
+    ("Tell me a joke about computers", "casual"),
+    ("I'm feeling a bit tired today", "casual"),
+    ("What do you think about music?", "casual"),
+]
+LABELS = {question: label for question, label in CORPUS}
+
+ANSWER = ("Based on web search, the answer is well documented. The figure has been stable for several years. "
+          "Sources agree on the main points, with small differences in the details.")
+
+PARAGRAPH = ("The subject of this article has a long and well documented history. Researchers have collected "
+             "figures from many sources, and the numbers below are the most commonly cited ones. ")
+
+
+def canned_page(index, paragraphs=60):
+    """A news-style page: navigation, scripts, an article and a footer, roughly 30 KB"""
+    body = "".join(f"<p>{PARAGRAPH * 2} Fact {index}.{number}.</p>\n" for number in range(paragraphs))
+    return f"""<!DOCTYPE html>
+<html><head><title>Canned page {index}</title>
+<script>{'var tracking = {"id": 1};' * 50}</script><style>{'p {{ margin: 0 }} ' * 50}</style></head>
+<body><header><nav>{'<a href="/">Home</a> ' * 40}</nav></header>
+<article><h1>Canned page {index}</h1>
+{body}</article>
+<aside>{'Related link. ' * 40}</aside><footer>{'Copyright notice. ' * 20}</footer></body></html>"""
+
+
+def reply_for(messages, response_format):
+    """The stub's answer: JSON for preprocessing, a label for classification, prose for everything else"""
+    user = messages[-1]["content"] if messages else ""
+    user = user if isinstance(user, str) else ""
+    if response_format and response_format.get("type") == "json_object":
+        label = LABELS.get(user, "search")
+        if label == "casual":
+            return json.dumps({"label": "casual", "question": "", "keywords": []})
+        return json.dumps({"label": "search", "question": user, "keywords": user.strip("?").lower().split()[:4]})
+    if user.startswith("Classify this input: "):
+        return LABELS.get(user[len("Classify this input: "):], "search")
+    if "extract the keywords" in messages[0]["content"]:
+        return "population, taiwan"
+    if "extract the question" in messages[0]["content"]:
+        return user.split("message: ", 1)[-1]
+    return ANSWER
+
+
+class StubConfig:
+    llm_latency = 0.3  # seconds before the first token
+    token_interval = 0.01  # seconds between streamed chunks
+    web_latency = 0.05  # seconds before a page is served
+    jitter = 0.2  # +-20% random variation of every delay
+
+
+def delay(seconds):
+    time.sleep(seconds * random.uniform(1 - StubConfig.jitter, 1 + StubConfig.jitter))
+
+
+class OpenAIStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        content = reply_for(request.get("messages", []), request.get("response_format"))
+        usage = {"prompt_tokens": 100, "completion_tokens": len(content.split()), "total_tokens": 100 + len(content.split())}
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": request.get("model", "stub")}
+        delay(StubConfig.llm_latency)
+
+        if not request.get("stream"):
+            body = json.dumps(dict(base, object="chat.completion", usage=usage, choices=[
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ])).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        words = content.split(" ")
+        for index, word in enumerate(words):
+            piece = word if index == 0 else " " + word
+            chunk = dict(base, object="chat.completion.chunk", choices=[
+                {"index": 0, "delta": {"content": piece}, "finish_reason": None}
+            ])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            delay(StubConfig.token_interval)
+        final = dict(base, object="chat.completion.chunk", choices=[], usage=usage)
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        delay(StubConfig.web_latency)
+        body = canned_page(self.path.rsplit("/", 1)[-1]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "max-age=3600")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def percentile(values, share):
+    """Linear-interpolated percentile, share in 0-1"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * share
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds * 1000)
+
+    def wrap(self, owner, attribute, stage):
+        """Replace owner.attribute with a version that records its wall time under stage"""
+        original = getattr(owner, attribute)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        setattr(owner, attribute, timed)
+
+    def summary(self):
+        return {
+            stage: {"count": len(values), "p50": percentile(values, 0.50), "p95": percentile(values, 0.95), "p99": percentile(values, 0.99)}
+            for stage, values in self.samples.items()
+        }
+
+
+def instrument(jarvis_mine, timer, page_url, search_latency):
+    """Point web search at the local page server and time every stage"""
+    def search_urls(keyword, num_results):
+        delay(search_latency)  # stands in for the search engine round trip
+        return [f"{page_url}/page/{abs(hash((keyword, index))) % 1000}" for index in range(num_results)]
+
+    jarvis_mine.search_urls = search_urls
+    timer.wrap(jarvis_mine, "search_urls", "search engine")
+    timer.wrap(jarvis_mine, "fetch_urls_concurrently", "fetch pages")
+    timer.wrap(jarvis_mine, "extract_snippets", "extract snippets")
+    timer.wrap(jarvis_mine, "search", "search total")
+    timer.wrap(jarvis_mine.Jarvis, "preprocess", "preprocess (LLM)")
+    timer.wrap(jarvis_mine.Jarvis, "classify_with_ai", "classify (LLM)")
+    timer.wrap(jarvis_mine.Jarvis, "classify_locally", "classify (local)")
+    timer.wrap(jarvis_mine.question_extraction_agent, "inference", "question agent (LLM)")
+    timer.wrap(jarvis_mine.keyword_extraction_agent, "inference", "keyword agent (LLM)")
+    timer.wrap(jarvis_mine.qa_agent, "inference", "answer (LLM)")
+
+
+def clear_caches():
+    from jarvis_cache import get_page_cache, get_search_cache, get_answer_cache
+    get_page_cache().clear()
+    get_search_cache().clear()
+    get_answer_cache().clear()
+
+
+def run_corpus(jarvis_mine, timer, runs, warm, verbose):
+    jarvis = jarvis_mine.get_jarvis()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        # Untimed warm-up: client creation, imports and the first connections are startup costs, not latency
+        jarvis.get_ai_response(CORPUS[0][0])
+        timer.samples.clear()
+        for _ in range(runs):
+            for question, label in CORPUS:
+                if not warm:
+                    clear_caches()
+                jarvis.clear_history()
+
+                first_token = []
+                start = time.perf_counter()
+                response = jarvis.get_ai_response(question, on_delta=lambda delta: first_token or first_token.append(time.perf_counter()))
+                end = time.perf_counter()
+                if response.startswith("I apologize"):
+                    raise RuntimeError(f"get_ai_response failed for {question!r}: {response}")
+                timer.record("get_ai_response", end - start)
+                timer.record(f"get_ai_response ({label})", end - start)
+                if first_token:
+                    timer.record("get_ai_response first token", first_token[0] - start)
+
+                if label == "search":
+                    if not warm:
+                        clear_caches()
+                    start = time.perf_counter()
+                    jarvis_mine.pipeline(question)
+                    timer.record("pipeline", time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JARVIS offline latency benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="passes over the question corpus")
+    parser.add_argument("--llm-latency", type=float, default=StubConfig.llm_latency, help="stub seconds to first token")
+    parser.add_argument("--token-interval", type=float, default=StubConfig.token_interval, help="stub seconds between streamed chunks")
+    parser.add_argument("--web-latency", type=float, default=StubConfig.web_latency, help="page server response delay")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="simulated search engine round trip")
+    parser.add_argument("--warm", action="store_true", help="keep caches between questions")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="save the measurements as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p50/p95 slowdown vs. baseline, 0.25 = 25%%")
+    parser.add_argument("--verbose", action="store_true", help="show JARVIS output while running")
+    args = parser.parse_args()
+
+    StubConfig.llm_latency = args.llm_latency
+    StubConfig.token_interval = args.token_interval
+    StubConfig.web_latency = args.web_latency
+    random.seed(0)
+
+    openai_server, openai_url = start_server(OpenAIStubHandler)
+    page_server, page_url = start_server(PageHandler)
+    # Everything below must be set before jarvis_mine (and so the OpenAI client and caches) is imported
+    os.environ["OPENAI_BASE_URL"] = f"{openai_url}/v1"
+    os.environ["JARVIS_CACHE_DIR"] = tempfile.mkdtemp(prefix="jarvis-bench-")
+    os.environ["NO_PROXY"] = "127.0.0.1,localhost"
+    os.environ["JARVIS_AUDIO_CACHE"] = "0"
+
+    import jarvis_mine
+    timer = StageTimer()
+    instrument(jarvis_mine, timer, page_url, args.search_latency)
+    started = time.perf_counter()
+    run_corpus(jarvis_mine, timer, args.runs, args.warm, args.verbose)
+    elapsed = time.perf_counter() - started
+    openai_server.shutdown()
+    page_server.shutdown()
+
+    results = timer.summary()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    failures = []
+    print(f"\n⏱️ Latency benchmark ({args.runs} x {len(CORPUS)} questions, {'warm' if args.warm else 'cold'} caches, {elapsed:.1f}s)")
+    print(f"  {'stage':<34} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, stats in results.items():
+        line = f"  {stage:<34} {stats['count']:>4} {stats['p50']:9.1f} {stats['p95']:9.1f} {stats['p99']:9.1f}"
+        if stage in baseline:
+            changes = []
+            for key in ("p50", "p95"):
+                change = stats[key] / baseline[stage][key] - 1 if baseline[stage][key] else 0.0
+                changes.append(f"{key} {change:+.0%}")
+                if change > args.max_regression:
+                    failures.append(f"{stage} {key} is {change:.0%} slower than the baseline")
+            line += "   vs baseline " + ", ".join(changes)
+        print(line)
+
+    if args.update:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    elif not baseline:
+        print("\nNo baseline yet, run with --update to save one")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
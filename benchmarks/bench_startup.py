@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+JARVIS startup benchmark - import time and cold start of the entry points, with a regression check
+Every measurement runs in a fresh interpreter: import time comes from `python -X importtime`,
+cold start is the wall time of a new process that imports jarvis_mine and builds the shared Jarvis.
+
+Usage:
+    python benchmarks/bench_startup.py                     # measure and compare with the saved baseline
+    python benchmarks/bench_startup.py --update            # save the current numbers as the baseline
+    python benchmarks/bench_startup.py --runs 9 --max-regression 0.2
+    python benchmarks/bench_startup.py --max-ms 400        # also fail if any measurement exceeds 400 ms
+
+Exits with status 1 when a measurement regresses past the threshold.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "startup_baseline.json")
+
+IMPORT_TARGETS = ["jarvis_mine", "jarvis_async", "jarvis_sessions"]
+COLD_START_CODE = "import jarvis_mine; jarvis_mine.get_jarvis()"
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_python(args):
+    return subprocess.run([sys.executable] + args, cwd=REPO_DIR, capture_output=True, text=True)
+
+
+def import_profile(module):
+    """Return (cumulative import ms of the module, [(ms, name)] of its slowest direct and indirect imports)"""
+    result = run_python(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    total_us, imports = None, []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        imports.append((int(self_us) / 1000, name))
+        if name == module:
+            total_us = int(cumulative_us)
+    return total_us / 1000, sorted(imports, reverse=True)
+
+
+def cold_start_ms():
+    start = time.perf_counter()
+    result = run_python(["-c", COLD_START_CODE])
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "cold start failed")
+    return elapsed
+
+
+def measure(runs):
+    """Median of several runs per measurement, warm disk cache (the first run is discarded)"""
+    results, slowest = {}, {}
+    for module in IMPORT_TARGETS:
+        try:
+            import_profile(module)
+            samples = []
+            for _ in range(runs):
+                total, imports = import_profile(module)
+                samples.append(total)
+            results[f"import {module}"] = statistics.median(samples)
+            slowest[module] = imports[:8]
+        except RuntimeError as e:
+            print(f"⚠️ Skipping import {module}: {e}")
+    try:
+        cold_start_ms()
+        results["cold start"] = statistics.median(cold_start_ms() for _ in range(runs))
+    except RuntimeError as e:
+        print(f"⚠️ Skipping cold start: {e}")
+    return results, slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JARVIS import-time and cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="save the measurements as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed slowdown vs. baseline, 0.25 = 25%%")
+    parser.add_argument("--max-ms", type=float, default=None, help="absolute limit for every measurement")
+    parser.add_argument("--verbose", action="store_true", help="show the slowest imports of each module")
+    args = parser.parse_args()
+
+    results, slowest = measure(args.runs)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    failures = []
+    print(f"\n⏱️ Startup benchmark ({args.runs} runs, median)")
+    for name, value in results.items():
+        line = f"  {name:<28} {value:8.1f} ms"
+        if name in baseline:
+            change = value / baseline[name] - 1
+            line += f"   baseline {baseline[name]:8.1f} ms ({change:+.0%})"
+            if change > args.max_regression:
+                failures.append(f"{name} is {change:.0%} slower than the baseline")
+        if args.max_ms is not None and value > args.max_ms:
+            failures.append(f"{name} takes {value:.0f} ms, limit {args.max_ms:.0f} ms")
+        print(line)
+
+    if args.verbose:
+        for module, imports in slowest.items():
+            print(f"\n🐢 Slowest imports under {module} (self time):")
+            for milliseconds, name in imports:
+                print(f"  {milliseconds:8.1f} ms  {name}")
+
+    if args.update:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    elif not baseline:
+        print("\nNo baseline yet, run with --update to save one")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+JARVIS async core - asyncio-native Jarvis, agents and pipeline for serving many conversations at once
+Same prompts, caches and history handling as jarvis_mine.py, but model calls and page fetches are awaited
+so one event loop can run hundreds of conversations instead of one blocked thread per request.
+Cache lookups (SQLite), the classifier's decision log and HTML parsing are blocking, so they run in
+worker threads via asyncio.to_thread.
+
+Sync code (GUI, voice, Flask handlers) can call into it with run_sync(coro), which runs the
+coroutine on a shared background event loop.
+"""
+
+import asyncio
+import threading
+import time
+from typing import List, Tuple
+from jarvis_cache import get_page_cache
+from jarvis_http import get_async_http_client
+from jarvis_tracing import span, annotate
+from jarvis_mine import (
+    Jarvis, JarvisAgent, question_extraction_agent, keyword_extraction_agent, qa_agent,
+    search_urls, extract_snippets, html_from_page, build_qa_prompt, cached_answer_for, cache_answer, OPENAI_API_KEY
+)
+
+
+class AsyncJarvis(Jarvis):
+    """
+    Awaitable counterpart of Jarvis, backed by openai.AsyncOpenAI. The coroutines are async_* methods
+    next to the inherited synchronous ones, so run() and other sync callers keep working unchanged.
+    """
+
+    @property
+    def async_openai_client(self):
+        """AsyncOpenAI client shared by every AsyncJarvis, so sessions reuse one connection pool"""
+        return get_async_openai_client()
+
+    async def async_generate_response(self, messages, max_tokens=200, temperature=0.1, response_format=None, on_delta=None):
+        try:
+            with span("llm", model=self.model, stream=bool(on_delta)):
+                if on_delta:
+                    return await self._async_collect_stream(self.async_stream_response(messages, max_tokens, temperature), on_delta)
+                extra_args = {"response_format": response_format} if response_format else {}
+                response = await self.async_openai_client.chat.completions.create(
+                    **self._completion_args(messages, max_tokens, temperature),
+                    **extra_args
+                )
+                self.record_usage(response.usage)
+                return response.choices[0].message.content
+        except Exception as e:
+            print(f"Response generation error: {e}")
+            return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues."
+
+    async def async_stream_response(self, messages, max_tokens=200, temperature=0.1, model=None):
+        """Yield text deltas from OpenAI as they are generated"""
+        stream = await self.async_openai_client.chat.completions.create(
+            **self._completion_args(messages, max_tokens, temperature, model),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        async for chunk in stream:
+            if chunk.usage:
+                self.record_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def _async_collect_stream(self, deltas, on_delta):
+        stream_start = time.perf_counter()
+        parts = []
+        async for delta in deltas:
+            if not parts:
+                annotate(first_token_seconds=round(time.perf_counter() - stream_start, 4))
+            parts.append(delta)
+            on_delta(delta)
+        return "".join(parts)
+
+    async def async_generate_response_with_vision(self, messages, max_tokens=200, temperature=0.7, on_delta=None):
+        try:
+            with span("llm", model=self.vision_model, stream=bool(on_delta)):
+                if on_delta:
+                    return await self._async_collect_stream(self.async_stream_response(messages, max_tokens, temperature, model=self.vision_model), on_delta)
+                response = await self.async_openai_client.chat.completions.create(
+                    **self._completion_args(messages, max_tokens, temperature, model=self.vision_model)
+                )
+                self.record_usage(response.usage)
+                return response.choices[0].message.content
+        except Exception as e:
+            print(f"Vision response generation error: {e}")
+            return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues."
+
+    async def async_classify_with_ai(self, user_input):
+        try:
+            with span("classify.llm"):
+                response = await self.async_generate_response(self.classifier_messages(user_input), max_tokens=10, temperature=0.1)
+                # Appends to the classifier's decision log
+                return await asyncio.to_thread(self.parse_classification, user_input, response)
+        except Exception as e:
+            print(f"Error in conversation classification: {e}")
+            return self.fallback_classification(user_input)
+
+    async def async_is_casual_conversation(self, user_input):
+        local_label = await asyncio.to_thread(self.classify_locally, user_input)
+        if local_label:
+            return local_label == "casual"
+        return await self.async_classify_with_ai(user_input)
+
+    async def async_preprocess(self, user_input):
+        with span("preprocess") as preprocess_span:
+            response = await self.async_generate_response(self.preprocess_messages(user_input), max_tokens=150, temperature=0.1, response_format={"type": "json_object"})
+            preprocessed = await asyncio.to_thread(self.parse_preprocessed, user_input, response)
+            preprocess_span.set(label=preprocessed["label"] if preprocessed else None)
+            return preprocessed
+
+    async def async_get_ai_response(self, user_input, on_delta=None):
+        with span("request", chars=len(user_input)):
+            return await self._async_get_ai_response(user_input, on_delta)
+
+    async def _async_get_ai_response(self, user_input, on_delta=None):
+        try:
+            local_label = await asyncio.to_thread(self.classify_locally, user_input)
+            preprocessed = None
+            if local_label != "casual" and self.fused_preprocessing:
+                preprocessed = await self.async_preprocess(user_input)
+
+            if preprocessed:
+                is_casual = preprocessed["label"] == "casual"
+            elif local_label:
+                is_casual = local_label == "casual"
+            else:
+                is_casual = await self.async_classify_with_ai(user_input)
+
+            annotate(route="casual" if is_casual else "search")
+            if is_casual:
+                response = await self.async_generate_response(self.chat_messages(user_input), max_tokens=150, temperature=0.7, on_delta=on_delta)
+            elif preprocessed:
+                response = await async_pipeline(user_input, core_question=preprocessed["question"], search_keywords=preprocessed["keywords"], on_delta=on_delta)
+            else:
+                response = await async_pipeline(user_input, on_delta=on_delta)
+
+            self.remember(user_input, response)
+            return response
+        except Exception as e:
+            print(f"Error getting AI response: {e}")
+            return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues."
+
+    async def async_get_ai_response_with_vision(self, user_input, image_data=None, on_delta=None, image_mime="image/jpeg", image_hash=None, cache_prompt=None, image_thumbnail=None):
+        try:
+            response = await self.async_analyze_image(user_input, image_data, on_delta, image_mime, image_hash, cache_prompt, image_thumbnail)
+            self.remember(user_input or "[Image]", response)
+            return response
+        except Exception as e:
+            print(f"Error getting AI response with vision: {e}")
+            return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues with image processing."
+
+    async def async_analyze_image(self, prompt, image_data=None, on_delta=None, image_mime="image/jpeg", image_hash=None, cache_prompt=None, image_thumbnail=None):
+        with span("vision", image_bytes=len(image_data or ""), mime=image_mime) as vision_span:
+            cache_prompt = prompt if cache_prompt is None else cache_prompt
+            response = self.cached_vision_response(image_hash, cache_prompt, on_delta, image_thumbnail)
+            vision_span.set(cached=response is not None)
+            if response is None:
+                messages = self.vision_messages(prompt, image_data, image_mime)
+                response = await self.async_generate_response_with_vision(messages, max_tokens=200, temperature=0.7, on_delta=on_delta)
+                self.cache_vision_response(image_hash, cache_prompt, response, image_thumbnail)
+            return response
+
+
+class AsyncJarvisAgent(JarvisAgent):
+    """JarvisAgent with a coroutine async_inference(); llm defaults to the shared AsyncJarvis"""
+
+    @classmethod
+    def from_agent(cls, agent: JarvisAgent, llm: AsyncJarvis=None):
+        return cls(agent.role_description, agent.task_description, llm, agent.temperature, agent.max_tokens, agent.verbose)
+
+    async def async_inference(self, message:str, on_delta=None) -> str:
+        llm = self.llm or get_async_jarvis()
+        return await llm.async_generate_response(self.messages(message), on_delta=on_delta)
+
+
+_async_openai_client = None
+_async_openai_client_lock = threading.Lock()
+
+
+def get_async_openai_client():
+    """Return the process-wide openai.AsyncOpenAI client, creating it on first use"""
+    global _async_openai_client
+    if _async_openai_client is None:
+        with _async_openai_client_lock:
+            if _async_openai_client is None:
+                import openai
+                _async_openai_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return _async_openai_client
+
+
+_async_jarvis = None
+_async_jarvis_lock = threading.Lock()
+
+
+def get_async_jarvis() -> AsyncJarvis:
+    """Return the AsyncJarvis shared by the async agents, creating it on first use"""
+    global _async_jarvis
+    if _async_jarvis is None:
+        with _async_jarvis_lock:
+            if _async_jarvis is None:
+                _async_jarvis = AsyncJarvis()
+    return _async_jarvis
+
+
+async_question_extraction_agent = AsyncJarvisAgent.from_agent(question_extraction_agent)
+async_keyword_extraction_agent = AsyncJarvisAgent.from_agent(keyword_extraction_agent)
+async_qa_agent = AsyncJarvisAgent.from_agent(qa_agent)
+
+
+async def async_fetch_url(url: str) -> Tuple[str, str]:
+    """Fetch a URL through the page cache and the pooled async client; returns (url, html or None)"""
+    try:
+        print(f"🔗 Fetching: {url}")
+        page_cache = get_page_cache()
+        with span("fetch", url=url) as fetch_span:
+            page, headers, entry = await asyncio.to_thread(page_cache.lookup, url)
+            if page is None:
+                response = await get_async_http_client().get(url, headers=headers or None)
+                page = await asyncio.to_thread(
+                    page_cache.store_response, url, entry, response.status_code, response.headers, response.text
+                )
+            fetch_span.set(status=page.status_code, bytes=len(page.text or ""), cached=page.from_cache)
+        return url, html_from_page(url, page)
+    except Exception as e:
+        print(f"❌ Error fetching {url}: {e}")
+        return url, None
+
+
+async def async_fetch_urls_concurrently(urls: List[str], n_results: int) -> List[Tuple[str, str]]:
+    """Fetch all URLs at once and return (url, html) pairs as soon as n_results HTML pages have arrived"""
+    tasks = [asyncio.create_task(async_fetch_url(url)) for url in urls]
+    results = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            url, html_content = await next_done
+            if html_content:
+                results.append((url, html_content))
+                if len(results) >= n_results:  # First N good pages win
+                    break
+    finally:
+        # Cancel the stragglers
+        for task in tasks:
+            task.cancel()
+    return results
+
+
+async def async_search(keyword: str, n_results: int=2) -> List[str]:
+    """Async counterpart of search(): blocking search engine lookup and HTML parsing run in worker threads"""
+    with span("search", keyword=keyword[:100], n_results=n_results):
+        try:
+            print(f"🔍 Searching for: '{keyword}'")
+            keyword = keyword[:100]
+            timings = {}
+
+            stage_start = time.perf_counter()
+            urls = await asyncio.to_thread(search_urls, keyword, n_results * 2)
+            timings["search"] = time.perf_counter() - stage_start
+            print(f"📄 Found {len(urls)} URLs from search")
+
+            if not urls:
+                print("❌ No search URLs found")
+                return []
+
+            stage_start = time.perf_counter()
+            results = await async_fetch_urls_concurrently(urls[:n_results * 2], n_results)
+            timings["fetch"] = time.perf_counter() - stage_start
+            print(f"📄 Successfully fetched {len(results)} HTML pages")
+
+            # Parsing is CPU-bound, keep it off the event loop
+            stage_start = time.perf_counter()
+            text_results = await asyncio.to_thread(extract_snippets, results)
+            timings["parse"] = time.perf_counter() - stage_start
+
+            print(f"📄 Extracted text from {len(text_results)} pages")
+            annotate(urls=len(urls), pages=len(results), snippets=len(text_results))
+            print("⏱️ Search timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+            return text_results[:n_results]
+
+        except Exception as e:
+            print(f"❌ Search error: {e}")
+            return []
+
+
+async def async_pipeline(question: str, core_question: str=None, search_keywords: str=None, on_delta=None) -> str:
+    """Async counterpart of pipeline()"""
+    with span("pipeline") as pipeline_span:
+        if core_question is None:
+            with span("extract_question"):
+                core_question = await async_question_extraction_agent.async_inference(question)
+        print(f"core question:{core_question}")
+        # Look the answer up in a thread, but deliver it to on_delta on the loop like every other delta
+        cached_answer = await asyncio.to_thread(cached_answer_for, core_question)
+        pipeline_span.set(cached=cached_answer is not None)
+        if cached_answer is not None:
+            if on_delta:
+                on_delta(cached_answer)
+            return cached_answer
+        if search_keywords is None:
+            with span("extract_keywords"):
+                search_keywords = await async_keyword_extraction_agent.async_inference(core_question)
+        print(f"search keywords:{search_keywords}")
+        search_results = await async_search(search_keywords)
+        print(f"search results:{search_results}")
+        qa_prompt = build_qa_prompt(core_question, search_results)
+        with span("qa", chars=len(qa_prompt)):
+            answer = await async_qa_agent.async_inference(qa_prompt, on_delta=on_delta)
+        print(f"answer:{answer}")
+        await asyncio.to_thread(cache_answer, core_question, search_results, answer)
+        return answer
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop used by run_sync(), starting it on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="jarvis-event-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the shared event loop from synchronous code and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result(timeout)
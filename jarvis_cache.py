@@ -0,0 +1,740 @@
+"""
+JARVIS caches - disk-backed caches that let repeated questions skip repeated work
+PageCache stores fetched pages and their extracted text, revalidating stale entries with ETag/Last-Modified
+TTLCache keeps small JSON values (e.g. search result URLs) in memory with a bounded on-disk copy
+AnswerCache sits in front of pipeline() and expires answers according to how time-sensitive the question is
+VisionCache reuses an image analysis when the same prompt comes with a visually identical image
+AudioCache keeps synthesized speech of recurring phrases on disk, keyed by text, voice and rate
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from jarvis_http import get_http_client
+
+CACHE_DIR = os.environ.get("JARVIS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "jarvis"))
+
+
+def _cache_path(filename):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+def _header_time(value):
+    """Seconds since the epoch of an HTTP date header, or None if it is missing or malformed"""
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_key(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivially different strings share a key"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class CachedPage:
+    """Minimal response-like object returned by PageCache.fetch()"""
+
+    def __init__(self, url, status_code, text, content_type, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.content_type = content_type
+        self.from_cache = from_cache
+
+
+class PageCache:
+    def __init__(self, path=None, max_bytes=200 * 1024 * 1024, ttl=10 * 60, max_ttl=7 * 24 * 3600):
+        """
+        max_bytes: total size of stored pages before least-recently-used entries are evicted
+        ttl: upper bound on the heuristic lifetime of a page that has validators but no max-age/Expires
+        max_ttl: upper bound on any server-provided max-age
+        """
+        self.path = path or _cache_path("pages.sqlite3")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body TEXT,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL,
+                last_access REAL,
+                size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS extracts (
+                url TEXT,
+                kind TEXT,
+                text TEXT,
+                PRIMARY KEY (url, kind)
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+        """)
+        self._db.commit()
+
+    def _entry_ttl(self, headers):
+        """
+        Seconds a response may be served without asking the server again: the server's max-age or Expires
+        when it gives one, otherwise 10% of the time since Last-Modified (at most ttl). no-cache, private
+        and pages without any freshness information get 0, i.e. they are revalidated on every use.
+        """
+        cache_control = headers.get('Cache-Control', '').lower()
+        if 'no-cache' in cache_control or 'no-cache' in headers.get('Pragma', '').lower():
+            return 0
+        match = re.search(r'max-age=(\d+)', cache_control)
+        if match:
+            return min(int(match.group(1)), self.max_ttl)
+        expires = _header_time(headers.get('Expires'))
+        if expires is not None:
+            return int(min(max(expires - time.time(), 0), self.max_ttl))
+        # Heuristic freshness, never for private (personalised) pages
+        last_modified = _header_time(headers.get('Last-Modified'))
+        if 'private' in cache_control or last_modified is None:
+            return 0
+        return int(min(max(time.time() - last_modified, 0) * 0.1, self.ttl))
+
+    def _storable(self, headers, entry_ttl):
+        """A page is stored when it stays fresh for a while or can be revalidated cheaply with a validator"""
+        if 'no-store' in headers.get('Cache-Control', '').lower():
+            return False
+        return entry_ttl > 0 or bool(headers.get('ETag') or headers.get('Last-Modified'))
+
+    def _load(self, url):
+        with self._lock:
+            return self._db.execute(
+                "SELECT body, content_type, etag, last_modified, expires_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _touch(self, url, expires_at=None, etag=None, last_modified=None):
+        with self._lock:
+            if expires_at is None:
+                self._db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            else:
+                self._db.execute(
+                    "UPDATE pages SET last_access = ?, expires_at = ?, etag = COALESCE(?, etag), "
+                    "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                    (time.time(), expires_at, etag, last_modified, url)
+                )
+            self._db.commit()
+
+    def _store(self, url, body, content_type, etag, last_modified, expires_at):
+        size = len(body.encode('utf-8', errors='ignore'))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, content_type, etag, last_modified, expires_at, time.time(), size)
+            )
+            # The page changed, so anything extracted from the old copy is stale
+            self._db.execute("DELETE FROM extracts WHERE url = ?", (url,))
+            self._evict()
+            self._db.commit()
+
+    def _forget(self, url):
+        with self._lock:
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._db.execute("DELETE FROM extracts WHERE url = ?", (url,))
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least-recently-used pages until the store fits in max_bytes (caller holds the lock)"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM pages ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._db.execute("DELETE FROM extracts WHERE url = ?", (url,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def lookup(self, url):
+        """
+        Check the cache before going to the network.
+        Returns (page, conditional_headers, entry): page is set for a fresh hit; otherwise send the
+        conditional headers (ETag/Last-Modified of a stale entry) and pass the response to store_response().
+        """
+        entry = self._load(url)
+        if entry:
+            body, content_type, etag, last_modified, expires_at = entry
+            if time.time() < expires_at:
+                self.hits += 1
+                self._touch(url)
+                return CachedPage(url, 200, body, content_type, from_cache=True), {}, entry
+
+        # Stale or missing: ask the server, conditionally if we have validators
+        headers = {}
+        if entry:
+            if entry[2]:
+                headers['If-None-Match'] = entry[2]
+            if entry[3]:
+                headers['If-Modified-Since'] = entry[3]
+        return None, headers, entry
+
+    def store_response(self, url, entry, status_code, headers, text) -> CachedPage:
+        """Record a server response for url, where entry is the stale entry returned by lookup()"""
+        content_type = headers.get('Content-Type', '')
+
+        if entry and status_code == 304:
+            self.revalidated += 1
+            self._touch(
+                url,
+                expires_at=time.time() + self._entry_ttl(headers),
+                etag=headers.get('ETag'),
+                last_modified=headers.get('Last-Modified')
+            )
+            return CachedPage(url, 200, entry[0], entry[1], from_cache=True)
+
+        self.misses += 1
+        if status_code == 200:
+            entry_ttl = self._entry_ttl(headers)
+            if self._storable(headers, entry_ttl):
+                self._store(
+                    url,
+                    text,
+                    content_type,
+                    headers.get('ETag'),
+                    headers.get('Last-Modified'),
+                    time.time() + entry_ttl
+                )
+            elif entry:
+                # The server no longer lets us keep the page; don't serve text extracted from the old copy
+                self._forget(url)
+        return CachedPage(url, status_code, text, content_type)
+
+    def fetch(self, url, **get_kwargs) -> CachedPage:
+        """Return the page for url from the cache, revalidating or downloading it when needed"""
+        page, headers, entry = self.lookup(url)
+        if page:
+            return page
+        response = get_http_client().get(url, headers=headers or None, **get_kwargs)
+        return self.store_response(url, entry, response.status_code, response.headers, response.text)
+
+    def get_text(self, url, kind):
+        """Return previously extracted text of a given kind (e.g. "snippet") for a cached page"""
+        with self._lock:
+            row = self._db.execute("SELECT text FROM extracts WHERE url = ? AND kind = ?", (url, kind)).fetchone()
+        return row[0] if row else None
+
+    def put_text(self, url, kind, text):
+        """Remember extracted text for a cached page; ignored if the page itself is not cached"""
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM pages WHERE url = ?", (url,)).fetchone():
+                self._db.execute("INSERT OR REPLACE INTO extracts VALUES (?, ?, ?)", (url, kind, text))
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("DELETE FROM extracts")
+            self._db.commit()
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide page cache, creating it on first use"""
+    global _page_cache
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(
+                    max_bytes=int(os.environ.get("JARVIS_PAGE_CACHE_MAX_MB", 200)) * 1024 * 1024,
+                    ttl=int(os.environ.get("JARVIS_PAGE_CACHE_TTL", 10 * 60)),
+                )
+    return _page_cache
+
+
+class TTLCache:
+    def __init__(self, name, ttl=3600, max_entries=1000, max_memory_entries=256, path=None):
+        """
+        name: table / file name of the on-disk copy
+        ttl: default lifetime of an entry in seconds, overridable per set()
+        max_entries: bound on the on-disk store, least-recently-used entries are evicted
+        max_memory_entries: bound on the in-memory LRU in front of the disk store
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or _cache_path(f"{name}.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_access REAL)"
+        )
+        self._db.commit()
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def _remember(self, key, value, expires_at):
+        """Put an entry in the in-memory LRU (caller holds the lock)"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            if key in self._memory:
+                value, expires_at = self._memory[key]
+                if now < expires_at:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            row = self._db.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row and now < row[1]:
+                value = json.loads(row[0])
+                self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self._remember(key, value, row[1])
+                self.disk_hits += 1
+                return value
+            if row:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """Store a JSON-serializable value, optionally with its own TTL in seconds"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, json.dumps(value), expires_at, now)
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count > self.max_entries:
+                overflow = count - self.max_entries
+                self._db.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+            self._db.commit()
+
+    def items(self):
+        """Return all unexpired (key, value) pairs from the disk store"""
+        with self._lock:
+            rows = self._db.execute("SELECT key, value FROM entries WHERE expires_at > ?", (time.time(),)).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "memory_entries": len(self._memory),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> TTLCache:
+    """Return the process-wide cache of search engine result URLs, creating it on first use"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = TTLCache(
+                    "search_urls",
+                    ttl=int(os.environ.get("JARVIS_SEARCH_CACHE_TTL", 24 * 3600)),
+                    max_entries=int(os.environ.get("JARVIS_SEARCH_CACHE_MAX_ENTRIES", 2000)),
+                )
+    return _search_cache
+
+
+# Answer lifetimes by how quickly the true answer changes, checked in this order
+ANSWER_TTL_RULES = [
+    (5 * 60, re.compile(r"\b(weather|temperature|forecast|price|prices|stock|stocks|exchange rate|score|scores|traffic|right now|today|tonight|live)\b")),
+    (60 * 60, re.compile(r"\b(news|latest|recent|recently|current|currently|this week|this month|update|trending|election)\b")),
+    (30 * 24 * 3600, re.compile(r"\b(history|historical|ancient|century|born|died|founded|invented|discovered|wrote|capital of|in 1\d{3})\b")),
+]
+DEFAULT_ANSWER_TTL = 24 * 3600
+
+# Phrasing that never changes the question: polite prefixes, articles and contractions
+POLITE_PREFIX = re.compile(
+    r"^(?:(?:hey|ok|okay) )?(?:jarvis )?(?:please )?(?:(?:(?:can|could|would) you (?:please )?)?(?:tell me|let me know) )?"
+)
+IGNORED_WORDS = {"a", "an", "the", "please", "jarvis"}
+CONTRACTIONS = {"whats": ("what", "is"), "whos": ("who", "is"), "wheres": ("where", "is"), "hows": ("how", "is")}
+
+
+def answer_ttl(question: str) -> int:
+    """Pick a TTL for an answer: minutes for prices/weather/news, a month for historical facts"""
+    question = normalize_key(question)
+    for ttl, pattern in ANSWER_TTL_RULES:
+        if pattern.search(question):
+            return ttl
+    return DEFAULT_ANSWER_TTL
+
+
+def canonical_question(question: str) -> str:
+    """
+    The question with its phrasing normalised but its meaning intact: word order, auxiliaries and tense
+    are kept, so "did brazil beat france" and "who was president" never match their near-anagrams.
+    """
+    words = []
+    for word in POLITE_PREFIX.sub("", normalize_key(question)).split():
+        if word in CONTRACTIONS:
+            words.extend(CONTRACTIONS[word])
+        elif word == "s" and words:  # "what's" was split into "what s"
+            words.append("is")
+        elif word == "re" and words:
+            words.append("are")
+        elif word not in IGNORED_WORDS:
+            words.append(word)
+    return " ".join(words)
+
+
+class AnswerCache:
+    def __init__(self, similarity=False, max_entries=2000):
+        """
+        similarity: also accept phrasings of a cached question that differ only in politeness, articles or
+            contractions ("can you tell me what's the capital of peru" / "what is capital of peru")
+        """
+        self.similarity = similarity
+        self.similar_hits = 0
+        # Each answer may be stored under its question and its canonical form
+        self._cache = TTLCache("answers", ttl=DEFAULT_ANSWER_TTL, max_entries=2 * max_entries)
+
+    def get(self, question):
+        """Return a cached answer for the question, or None"""
+        question = normalize_key(question)
+        entry = self._cache.get(question)
+        if entry is not None:
+            return entry["answer"]
+        if self.similarity:
+            # An index lookup, not a scan: near-identical phrasings share the canonical key
+            entry = self._cache.get("~" + canonical_question(question))
+            if entry is not None:
+                self.similar_hits += 1
+                return entry["answer"]
+        return None
+
+    def set(self, question, answer):
+        question = normalize_key(question)
+        entry, ttl = {"question": question, "answer": answer}, answer_ttl(question)
+        self._cache.set(question, entry, ttl=ttl)
+        canonical = canonical_question(question)
+        if canonical:
+            self._cache.set("~" + canonical, entry, ttl=ttl)
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats["similar_hits"] = self.similar_hits
+        return stats
+
+    def clear(self):
+        self._cache.clear()
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache, creating it on first use"""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(
+                    similarity=os.environ.get("JARVIS_ANSWER_CACHE_SIMILARITY", "0") == "1",
+                )
+    return _answer_cache
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+class VisionCache:
+    def __init__(self, max_distance=1, ttl=10 * 60, max_entries=256, max_changed=0.0005, pixel_delta=16):
+        """
+        max_distance: maximum number of differing perceptual-hash bits for a candidate match; a 256-bit
+            dHash barely moves when only the text on a screen changes, so keep this at 0-1
+        ttl: lifetime of an analysis in seconds; screens drift even when they look alike
+        max_entries: least-recently-used analyses beyond this are evicted
+        max_changed: share of thumbnail pixels that may differ (by more than pixel_delta gray levels) for a
+            candidate to be reused; without thumbnails only an exact hash matches
+        """
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_changed = max_changed
+        self.pixel_delta = pixel_delta
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.rejected = 0  # hash matches whose thumbnails showed a real change
+        self.evictions = 0
+
+        self._entries = OrderedDict()  # (prompt key, image hash) -> (answer, expires_at, thumbnail)
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self):
+        return self.exact_hits + self.near_hits
+
+    def _same_image(self, distance, cached_thumbnail, thumbnail):
+        if distance > self.max_distance:
+            return False
+        if cached_thumbnail is None or thumbnail is None:
+            return distance == 0
+        from jarvis_image import changed_share
+        if changed_share(cached_thumbnail, thumbnail, self.pixel_delta) > self.max_changed:
+            self.rejected += 1
+            return False
+        return True
+
+    def get(self, image_hash: int, prompt: str, thumbnail=None):
+        """
+        Return the analysis of a cached image with the same prompt whose hash is within max_distance and
+        whose thumbnail (jarvis_image.gray_thumbnail) shows no real change, or None
+        """
+        prompt_key = normalize_key(prompt or "")
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for key, (answer, expires_at, cached_thumbnail) in list(self._entries.items()):
+                if now >= expires_at:
+                    del self._entries[key]
+                    continue
+                if key[0] == prompt_key:
+                    candidates.append((hamming_distance(key[1], image_hash), key, cached_thumbnail))
+            for distance, key, cached_thumbnail in sorted(candidates, key=lambda candidate: candidate[0]):
+                if self._same_image(distance, cached_thumbnail, thumbnail):
+                    self._entries.move_to_end(key)
+                    if distance == 0:
+                        self.exact_hits += 1
+                    else:
+                        self.near_hits += 1
+                    return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def set(self, image_hash: int, prompt: str, answer: str, thumbnail=None):
+        with self._lock:
+            key = (normalize_key(prompt or ""), image_hash)
+            self._entries[key] = (answer, time.time() + self.ttl, thumbnail)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_vision_cache = None
+_vision_cache_lock = threading.Lock()
+
+
+def get_vision_cache() -> VisionCache:
+    """Return the process-wide vision analysis cache, creating it on first use"""
+    global _vision_cache
+    if _vision_cache is None:
+        with _vision_cache_lock:
+            if _vision_cache is None:
+                _vision_cache = VisionCache(
+                    max_distance=int(os.environ.get("JARVIS_VISION_CACHE_DISTANCE", 1)),
+                    ttl=int(os.environ.get("JARVIS_VISION_CACHE_TTL", 10 * 60)),
+                    max_entries=int(os.environ.get("JARVIS_VISION_CACHE_MAX_ENTRIES", 256)),
+                )
+    return _vision_cache
+
+
+class AudioCache:
+    def __init__(self, directory=None, max_bytes=50 * 1024 * 1024):
+        """
+        directory: where the rendered audio files and their index live
+        max_bytes: total size of stored audio before least-recently-played files are evicted
+        """
+        self.directory = directory or _cache_path("audio")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.directory, "audio.sqlite3"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS audio (
+                key TEXT PRIMARY KEY,
+                text TEXT,
+                path TEXT,
+                size INTEGER,
+                last_access REAL
+            );
+            CREATE INDEX IF NOT EXISTS audio_last_access ON audio (last_access);
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def key(engine, voice, rate, text):
+        return hashlib.sha1(json.dumps([engine, voice, rate, text]).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT path FROM audio WHERE key = ?", (key,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def contains(self, engine, voice, rate, text):
+        return self._path(self.key(engine, voice, rate, text)) is not None
+
+    def get(self, engine, voice, rate, text):
+        """Path of the rendered audio for this text, voice and rate, or None"""
+        key = self.key(engine, voice, rate, text)
+        path = self._path(key)
+        with self._lock:
+            if path is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE audio SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return path
+
+    def put(self, engine, voice, rate, text, source_path):
+        """Move a rendered audio file into the cache and return its new path"""
+        key = self.key(engine, voice, rate, text)
+        path = os.path.join(self.directory, key + os.path.splitext(source_path)[1])
+        shutil.move(source_path, path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO audio VALUES (?, ?, ?, ?, ?)",
+                (key, text, path, os.path.getsize(path), time.time())
+            )
+            self._evict()
+            self._db.commit()
+        return path
+
+    def _evict(self):
+        """Drop least-recently-played audio until the store fits in max_bytes (caller holds the lock)"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in self._db.execute("SELECT key, path, size FROM audio ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM audio WHERE key = ?", (key,))
+            if os.path.exists(path):
+                os.remove(path)
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM audio").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def clear(self):
+        with self._lock:
+            for (path,) in self._db.execute("SELECT path FROM audio").fetchall():
+                if os.path.exists(path):
+                    os.remove(path)
+            self._db.execute("DELETE FROM audio")
+            self._db.commit()
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    """Return the process-wide synthesized audio cache, creating it on first use"""
+    global _audio_cache
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache(
+                    max_bytes=int(os.environ.get("JARVIS_AUDIO_CACHE_MAX_MB", 50)) * 1024 * 1024,
+                )
+    return _audio_cache
@@ -0,0 +1,94 @@
+"""
+JARVIS screen capture - straight from the mss pixel buffer to a PIL image, no temporary files
+Captures a whole monitor, a rectangular region or just the active window; pass the result to
+jarvis_image.prepare_image() to encode it for a vision request without touching the disk.
+"""
+
+import re
+import sys
+import threading
+import subprocess
+import mss
+from PIL import Image
+
+_local = threading.local()  # mss handles are not safe to share between threads
+
+
+def _screen():
+    """Return this thread's mss instance, opening it on first use"""
+    if getattr(_local, "sct", None) is None:
+        _local.sct = mss.mss()
+    return _local.sct
+
+
+def _grab(area):
+    """Grab a {left, top, width, height} area and wrap the raw BGRA buffer as an RGB image"""
+    shot = _screen().grab(area)
+    return Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX", 0, 1)
+
+
+def capture_monitor(index=1) -> Image.Image:
+    """Capture one monitor: 1 is the primary monitor, 0 the bounding box of all monitors"""
+    monitors = _screen().monitors
+    if not 0 <= index < len(monitors):
+        raise ValueError(f"No monitor {index}, found {len(monitors) - 1}")
+    return _grab(monitors[index])
+
+
+def capture_region(left, top, width, height) -> Image.Image:
+    """Capture a rectangle in screen coordinates, clipped to the visible desktop"""
+    desktop = _screen().monitors[0]
+    right = min(left + width, desktop["left"] + desktop["width"])
+    bottom = min(top + height, desktop["top"] + desktop["height"])
+    left, top = max(left, desktop["left"]), max(top, desktop["top"])
+    if right <= left or bottom <= top:
+        raise ValueError("Capture region is outside the screen")
+    return _grab({"left": left, "top": top, "width": right - left, "height": bottom - top})
+
+
+def active_window_bounds():
+    """Return (left, top, width, height) of the focused window, or None if it cannot be determined"""
+    try:
+        if sys.platform == "darwin":
+            script = ('tell application "System Events" to tell (first process whose frontmost is true) '
+                      'to get {position, size} of front window')
+            output = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=2).stdout
+            values = [int(value) for value in re.findall(r"-?\d+", output)]
+            return tuple(values[:4]) if len(values) >= 4 else None
+        if sys.platform.startswith("linux"):
+            output = subprocess.run(["xdotool", "getactivewindow", "getwindowgeometry", "--shell"],
+                                    capture_output=True, text=True, timeout=2).stdout
+            geometry = dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+            return int(geometry["X"]), int(geometry["Y"]), int(geometry["WIDTH"]), int(geometry["HEIGHT"])
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            rect = wintypes.RECT()
+            window = ctypes.windll.user32.GetForegroundWindow()
+            if window and ctypes.windll.user32.GetWindowRect(window, ctypes.byref(rect)):
+                return rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top
+    except (OSError, KeyError, ValueError, subprocess.SubprocessError) as e:
+        print(f"Active window lookup error: {e}")
+    return None
+
+
+def capture_active_window() -> Image.Image:
+    """Capture the focused window, falling back to the primary monitor when its bounds are unknown"""
+    bounds = active_window_bounds()
+    if bounds is None:
+        print("⚠️ Could not find the active window, capturing the primary monitor")
+        return capture_monitor()
+    return capture_region(*bounds)
+
+
+def capture(target="monitor", monitor=1, region=None) -> Image.Image:
+    """
+    target: "monitor" (the given monitor index), "region" (region=(left, top, width, height)) or "window"
+    """
+    if target == "window":
+        return capture_active_window()
+    if target == "region":
+        if region is None:
+            raise ValueError("A region capture needs region=(left, top, width, height)")
+        return capture_region(*region)
+    return capture_monitor(monitor)
@@ -0,0 +1,317 @@
+"""
+JARVIS intent classifier - on-box casual/search classification for the confident cases
+A word n-gram Naive Bayes model seeded with examples and retrained from logged AI decisions
+Naive Bayes posteriors are overconfident, so the local answer is only used when every word of the utterance
+was seen in examples of that label, and a sample of those decisions is still checked by the AI
+
+Usage:
+    python jarvis_classifier.py report     # agreement with the AI and decision counts from the log
+    python jarvis_classifier.py "what's the weather in Taipei"
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import threading
+from collections import defaultdict
+from jarvis_cache import CACHE_DIR, normalize_key
+
+LABELS = ("casual", "search")
+
+SEED_EXAMPLES = [
+    ("hi", "casual"),
+    ("hello", "casual"),
+    ("hey jarvis", "casual"),
+    ("good morning", "casual"),
+    ("good night", "casual"),
+    ("how are you", "casual"),
+    ("how are you doing today", "casual"),
+    ("thank you", "casual"),
+    ("thanks jarvis", "casual"),
+    ("you're awesome", "casual"),
+    ("tell me a joke", "casual"),
+    ("make me laugh", "casual"),
+    ("i'm feeling tired", "casual"),
+    ("i am bored", "casual"),
+    ("i feel happy today", "casual"),
+    ("what do you think about love", "casual"),
+    ("what's your name", "casual"),
+    ("who are you", "casual"),
+    ("do you like music", "casual"),
+    ("what is the meaning of life", "casual"),
+    ("let's chat", "casual"),
+    ("that's funny", "casual"),
+    ("nice to meet you", "casual"),
+    ("i love you", "casual"),
+    ("ok", "casual"),
+    ("cool", "casual"),
+    ("what's the weather in taipei", "search"),
+    ("what is the weather today", "search"),
+    ("what is the price of bitcoin", "search"),
+    ("how much is tesla stock", "search"),
+    ("who won the game last night", "search"),
+    ("latest news about the election", "search"),
+    ("who is the president of france", "search"),
+    ("who is the ceo of apple", "search"),
+    ("how tall is the eiffel tower", "search"),
+    ("how many people live in tokyo", "search"),
+    ("when was the declaration of independence signed", "search"),
+    ("where is the nearest airport", "search"),
+    ("what is the population of taiwan", "search"),
+    ("what is the exchange rate of usd to twd", "search"),
+    ("when is the next solar eclipse", "search"),
+    ("which country has the most gold medals", "search"),
+    ("who was the first person on the moon", "search"),
+    ("what time is it in new york", "search"),
+    ("score of the lakers game", "search"),
+    ("what happened in the news today", "search"),
+    ("how long is the great wall of china", "search"),
+    ("according to wikipedia what is the capital of australia", "search"),
+]
+
+DECISION_LOG = os.path.join(CACHE_DIR, "classifier_decisions.jsonl")
+
+
+def words_of(text):
+    """Lowercase words, with '?' kept as its own token"""
+    return re.findall(r"[a-z0-9']+|\?", text.lower())
+
+
+def tokenize(text):
+    """Lowercase word unigrams and bigrams, with '?' kept as its own token"""
+    words = words_of(text)
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class IntentClassifier:
+    def __init__(self, threshold=0.95, log_path=DECISION_LOG, audit_rate=0.1, max_log_records=5000):
+        """
+        threshold: minimum posterior probability for a local answer; below it the caller asks the AI
+        log_path: JSON-lines file of decisions, AI-labelled lines are used as training data
+        audit_rate: share of confident local decisions that are sent to the AI anyway, so their mistakes
+            are measured (confident_agreement_rate) and learned from
+        max_log_records: the log is compacted to its newest half once it grows past this many lines
+        """
+        self.threshold = threshold
+        self.log_path = log_path
+        self.audit_rate = audit_rate
+        self.max_log_records = max_log_records
+
+        self.label_counts = defaultdict(int)
+        self.token_counts = {label: defaultdict(int) for label in LABELS}
+        self.token_totals = defaultdict(int)
+        self.vocabulary = set()
+        self.label_words = {label: set() for label in LABELS}
+        self.exact_labels = {}  # normalized text -> label, for utterances seen before
+
+        self.local_decisions = 0
+        self.llm_decisions = 0
+        self.agreements = 0
+        self.audits = 0
+        self.confident_checks = 0  # AI decisions the local model would have taken on its own
+        self.confident_agreements = 0
+
+        self._lock = threading.Lock()
+        self.train(SEED_EXAMPLES)
+        records = self.read_log()
+        self._log_records = len(records)
+        self.train(self.load_logged_examples(records))
+
+    def learn(self, text, label):
+        """Add one labelled example to the model"""
+        with self._lock:
+            self.exact_labels[normalize_key(text)] = label
+            self.label_counts[label] += 1
+            self.label_words[label].update(words_of(text))
+            for token in tokenize(text):
+                self.token_counts[label][token] += 1
+                self.token_totals[label] += 1
+                self.vocabulary.add(token)
+
+    def train(self, examples):
+        for text, label in examples:
+            if label in LABELS:
+                self.learn(text, label)
+
+    def predict(self, text):
+        """Return (label, confidence) where confidence is the posterior probability of the label"""
+        exact_label = self.exact_labels.get(normalize_key(text))
+        if exact_label:
+            return exact_label, 1.0
+
+        tokens = tokenize(text)
+        with self._lock:
+            total_examples = sum(self.label_counts.values())
+            vocabulary_size = len(self.vocabulary) + 1
+            log_scores = {}
+            for label in LABELS:
+                score = math.log((self.label_counts[label] + 1) / (total_examples + len(LABELS)))
+                denominator = self.token_totals[label] + vocabulary_size
+                for token in tokens:
+                    score += math.log((self.token_counts[label][token] + 1) / denominator)
+                log_scores[label] = score
+
+        best = max(log_scores, key=log_scores.get)
+        normalizer = max(log_scores.values())
+        total = sum(math.exp(score - normalizer) for score in log_scores.values())
+        return best, 1.0 / total
+
+    def confident_label(self, text):
+        """
+        The label when the local model may decide on its own, otherwise None: the text was labelled before,
+        or the posterior clears the threshold and every word appears in examples of that label, so an
+        unfamiliar topic ("how are the lakers doing") is never decided from a few familiar words
+        """
+        exact_label = self.exact_labels.get(normalize_key(text))
+        if exact_label:
+            return exact_label
+        label, confidence = self.predict(text)
+        words = words_of(text)
+        with self._lock:
+            covered = bool(words) and all(word in self.label_words[label] for word in words)
+        return label if covered and confidence >= self.threshold else None
+
+    def classify(self, text):
+        """Return the label if the local model is confident enough, otherwise None"""
+        label = self.confident_label(text)
+        if label is None:
+            return None
+        if random.random() < self.audit_rate:
+            # Let the AI decide this one; record_llm_decision() scores the local answer against it
+            self.audits += 1
+            return None
+        self.local_decisions += 1
+        self.log_decision(text, label, "local", self.predict(text)[1])
+        return label
+
+    def record_llm_decision(self, text, llm_label):
+        """Record an AI classification: track agreement with the local model and learn from it"""
+        if llm_label not in LABELS:
+            return
+        local_label, confidence = self.predict(text)
+        confident_label = self.confident_label(text)
+        self.llm_decisions += 1
+        if local_label == llm_label:
+            self.agreements += 1
+        if confident_label:
+            self.confident_checks += 1
+            if confident_label == llm_label:
+                self.confident_agreements += 1
+        self.log_decision(text, llm_label, "llm", confidence, local_label, confident=confident_label is not None)
+        self.learn(text, llm_label)
+
+    def agreement_rate(self):
+        """Share of AI classifications the local model predicted correctly"""
+        return self.agreements / self.llm_decisions if self.llm_decisions else None
+
+    def confident_agreement_rate(self):
+        """Share of AI classifications the local model would have answered by itself, and got right"""
+        return self.confident_agreements / self.confident_checks if self.confident_checks else None
+
+    def log_decision(self, text, label, source, confidence, local_label=None, confident=False):
+        record = {
+            "time": time.time(),
+            "text": text,
+            "label": label,
+            "source": source,
+            "confidence": round(confidence, 4),
+        }
+        if local_label:
+            record["local_label"] = local_label
+        if confident:
+            record["confident"] = True
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with self._lock:
+                with open(self.log_path, "a", encoding="utf-8") as log_file:
+                    log_file.write(json.dumps(record) + "\n")
+                self._log_records += 1
+                if self._log_records > self.max_log_records:
+                    self._compact_log()
+        except OSError as e:
+            print(f"Classifier log error: {e}")
+
+    def _compact_log(self):
+        """Keep the newest half of the log so it is cheap to append to and to re-read at startup (caller holds the lock)"""
+        with open(self.log_path, encoding="utf-8") as log_file:
+            lines = log_file.readlines()[-(self.max_log_records // 2):]
+        temporary_path = self.log_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as log_file:
+            log_file.writelines(lines)
+        os.replace(temporary_path, self.log_path)
+        self._log_records = len(lines)
+
+    def read_log(self):
+        if not os.path.exists(self.log_path):
+            return []
+        records = []
+        with open(self.log_path, encoding="utf-8") as log_file:
+            for line in log_file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def load_logged_examples(self, records=None):
+        """Only AI-labelled decisions are training data; local decisions would just reinforce the model"""
+        records = self.read_log() if records is None else records
+        return [(record["text"], record["label"]) for record in records if record.get("source") == "llm"]
+
+    def stats(self):
+        return {
+            "local_decisions": self.local_decisions,
+            "llm_decisions": self.llm_decisions,
+            "agreement_rate": self.agreement_rate(),
+            "audits": self.audits,
+            "confident_agreement_rate": self.confident_agreement_rate(),
+        }
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Return the process-wide intent classifier, training it on first use"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier(
+                    threshold=float(os.environ.get("JARVIS_CLASSIFIER_THRESHOLD", 0.95)),
+                    audit_rate=float(os.environ.get("JARVIS_CLASSIFIER_AUDIT_RATE", 0.1)),
+                )
+    return _classifier
+
+
+def report(classifier):
+    records = classifier.read_log()
+    llm_records = [record for record in records if record.get("source") == "llm"]
+    agreed = sum(1 for record in llm_records if record.get("local_label") == record["label"])
+    local_count = len(records) - len(llm_records)
+    print(f"📊 Logged decisions: {len(records)} ({local_count} local, {len(llm_records)} AI)")
+    if records:
+        print(f"⚡ Answered locally: {local_count / len(records):.1%}")
+    if llm_records:
+        print(f"🤝 Agreement with AI: {agreed / len(llm_records):.1%}")
+    confident_records = [record for record in llm_records if record.get("confident")]
+    if confident_records:
+        confident_agreed = sum(1 for record in confident_records if record.get("local_label") == record["label"])
+        print(f"🎯 Agreement on confident (audited) decisions: {confident_agreed / len(confident_records):.1%} of {len(confident_records)}")
+
+
+if __name__ == "__main__":
+    classifier = get_intent_classifier()
+    if len(sys.argv) > 1 and sys.argv[1] == "report":
+        report(classifier)
+    elif len(sys.argv) > 1:
+        text = " ".join(sys.argv[1:])
+        label, confidence = classifier.predict(text)
+        print(f"{text!r} -> {label} ({confidence:.3f})")
+    else:
+        print(__doc__)
@@ -0,0 +1,173 @@
+"""
+JARVIS text extraction - one bounded, streaming HTML-to-text engine for search snippets and RAG pages
+The page is fed to lxml's event-driven HTML parser in chunks; text inside boilerplate (script, style,
+nav, header, footer, aside, forms, ARIA navigation/banner regions) is skipped, and parsing stops as soon
+as enough main-content text has been collected, so a 300-character snippet never parses the whole page.
+Without lxml the same collector runs on the standard library's html.parser.
+"""
+
+import re
+from html.parser import HTMLParser
+
+# Elements whose text is never main content
+BOILERPLATE_TAGS = frozenset({
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+    "head", "nav", "header", "footer", "aside", "form", "button", "select", "option",
+})
+BOILERPLATE_ROLES = frozenset({"navigation", "banner", "contentinfo", "complementary", "search", "menu", "menubar"})
+
+# Elements that end a run of text, so words on either side are not glued together
+BLOCK_TAGS = frozenset({
+    "p", "div", "br", "li", "ul", "ol", "tr", "td", "th", "table", "section", "article", "main",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "dd", "dt", "dl", "figcaption", "hr",
+})
+
+# Elements without content or end tag; html.parser never reports an end for them, so they must never open a
+# skipped region (one <img aria-hidden="true"> would hide the rest of the page)
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "meta", "param",
+    "source", "track", "wbr",
+})
+
+# Elements allowed in <head>; html.parser does not imply an omitted </head>, so any other start tag closes it
+HEAD_TAGS = frozenset({"title", "meta", "link", "style", "script", "base", "noscript", "template"})
+
+CHUNK_SIZE = 16 * 1024
+WHITESPACE = re.compile(r"\s+")
+
+
+class StopExtraction(Exception):
+    """Raised from the parser callbacks once enough text has been collected"""
+
+
+class TextCollector:
+    """Parser target: gathers visible text outside boilerplate until max_chars are collected"""
+
+    def __init__(self, max_chars=None, skip_tags=BOILERPLATE_TAGS):
+        self.max_chars = max_chars
+        self.skip_tags = skip_tags
+        self.pieces = []
+        self.length = 0
+        self.done = False
+        self._skip_tag = None  # tag that opened the skipped region, nested copies are counted in _skip_depth
+        self._skip_depth = 0
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if self._skip_depth and self._skip_tag == "head" and tag not in HEAD_TAGS:
+            self._skip_depth = 0
+        if self._skip_depth:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self._separate()
+            return
+        role = (attrib.get("role") or "").lower()
+        if tag in self.skip_tags or role in BOILERPLATE_ROLES or "hidden" in attrib or attrib.get("aria-hidden") == "true":
+            self._skip_tag = tag
+            self._skip_depth = 1
+        elif tag in BLOCK_TAGS:
+            self._separate()
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag in VOID_TAGS:
+            return
+        if self._skip_depth:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+            return
+        if tag in BLOCK_TAGS:
+            self._separate()
+
+    def data(self, text):
+        if self._skip_depth or self.done:
+            return
+        text = WHITESPACE.sub(" ", text)
+        if not text.strip():
+            self._separate()
+            return
+        self.pieces.append(text)
+        self.length += len(text)
+        # length over-counts spaces that collapse later, so confirm on the real text before stopping
+        if self.max_chars is not None and self.length > self.max_chars and len(self.text()) > self.max_chars:
+            self.done = True
+            raise StopExtraction()
+
+    def _separate(self):
+        if self.pieces and not self.pieces[-1].endswith(" "):
+            self.pieces.append(" ")
+            self.length += 1
+
+    def close(self):
+        return self.text()
+
+    def text(self):
+        return " ".join("".join(self.pieces).split())
+
+
+class _StdlibParser(HTMLParser):
+    """html.parser front end for TextCollector, used when lxml is not installed"""
+
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, {name: value or "" for name, value in attrs})
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+_lxml = None  # lxml.etree, loaded on first use; False when lxml is unavailable
+
+
+def _parser(collector):
+    global _lxml
+    if _lxml is None:
+        try:
+            from lxml import etree
+            _lxml = etree
+        except ImportError:
+            _lxml = False
+    if _lxml:
+        return _lxml.HTMLParser(target=collector, recover=True, no_network=True)
+    return _StdlibParser(collector)
+
+
+def extract_text(html, max_chars=None, skip_tags=BOILERPLATE_TAGS, chunk_size=CHUNK_SIZE):
+    """
+    Visible main-content text of an HTML page with whitespace collapsed.
+    max_chars: stop parsing once more than this many characters were collected (the result is cut to it)
+    """
+    if not html:
+        return ""
+    collector = TextCollector(max_chars, skip_tags)
+    parser = _parser(collector)
+    try:
+        for start in range(0, len(html), chunk_size):
+            parser.feed(html[start:start + chunk_size])
+            if collector.done:
+                break
+        else:
+            parser.close()
+    except StopExtraction:
+        pass
+    except Exception as e:
+        # lxml re-raises target exceptions wrapped on some versions; anything else is a real parse error
+        if not collector.done:
+            print(f"Text extraction error: {e}")
+    text = collector.text()
+    return text[:max_chars] if max_chars is not None else text
+
+
+def extract_snippet(html, max_chars=300):
+    """The first max_chars characters of main-content text, with "..." when the page has more"""
+    text = extract_text(html, max_chars + 1)
+    return text[:max_chars] + "..." if len(text) > max_chars else text
@@ -0,0 +1,175 @@
+"""
+JARVIS conversation memory - history assembled by token budget instead of message count
+Recent turns are sent verbatim while they fit the budget; older turns are folded into a rolling
+summary that is updated incrementally (previous summary + the turns that just fell out).
+"""
+
+import re
+import threading
+
+_encoding = None  # tiktoken encoding, loaded on first use; False when tiktoken is unavailable
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators the API adds around every message
+IMAGE_TOKENS = 765  # a high-detail 1024x1024 image; small images cost less
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def estimate_tokens(text):
+    """Token count of a string, exact with tiktoken installed, otherwise a close offline estimate"""
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Roughly one token per short word or punctuation mark, plus extra for long words
+    pieces = re.findall(r"\w+|[^\w\s]", text)
+    return sum(1 + len(piece) // 8 for piece in pieces)
+
+
+def message_tokens(message):
+    """Tokens one chat message adds to a prompt, including text and image parts"""
+    content = message.get("content")
+    if isinstance(content, list):
+        tokens = 0
+        for part in content:
+            if part.get("type") == "text":
+                tokens += estimate_tokens(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS
+    else:
+        tokens = estimate_tokens(content or "")
+    return tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+def messages_tokens(messages):
+    return sum(message_tokens(message) for message in messages)
+
+
+class ConversationMemory:
+    def __init__(self, budget=1500, summarize=None, compact_to=0.75):
+        """
+        budget: tokens of history (summary included) sent with each prompt
+        summarize: function(previous_summary, messages) -> new summary; without it old turns are dropped
+        compact_to: once history exceeds the budget, fold old turns until it is under this share of it
+        """
+        self.budget = budget
+        self.summarize = summarize
+        self.compact_to = compact_to
+
+        self.messages = []
+        self.summary = ""
+        self.compactions = 0
+        self.lock = threading.RLock()
+        self._compacting = False
+        self._generation = 0  # bumped by clear()/load() so an in-flight compaction does not apply to new history
+
+    def add(self, user_input, response):
+        with self.lock:
+            self.messages.append({"role": "user", "content": user_input})
+            self.messages.append({"role": "assistant", "content": response})
+
+    def summary_message(self):
+        return {"role": "system", "content": SUMMARY_PREFIX + self.summary} if self.summary else None
+
+    def context(self):
+        """Summary message (if any) and the newest turns that fit the budget, oldest first"""
+        with self.lock:
+            summary_message = self.summary_message()
+            remaining = self.budget - (message_tokens(summary_message) if summary_message else 0)
+            selected = []
+            # Walk back a whole turn (user + assistant) at a time so an answer never loses its question
+            for start in range(len(self.messages) - 2, -1, -2):
+                turn = self.messages[start:start + 2]
+                cost = messages_tokens(turn)
+                if cost > remaining:
+                    break
+                selected[:0] = turn
+                remaining -= cost
+            return ([summary_message] if summary_message else []) + selected
+
+    def total_tokens(self):
+        with self.lock:
+            summary_message = self.summary_message()
+            return messages_tokens(self.messages) + (message_tokens(summary_message) if summary_message else 0)
+
+    def needs_compaction(self):
+        return self.total_tokens() > self.budget
+
+    def compact(self):
+        """
+        Fold the oldest turns into the rolling summary until history is back under compact_to * budget.
+        The model call runs without the lock held, so prompts can still be built meanwhile.
+        """
+        with self.lock:
+            if self._compacting or not self.needs_compaction():
+                return False
+            target = self.budget * self.compact_to
+            total = self.total_tokens()
+            count = 0
+            while count < len(self.messages) and total > target:
+                total -= messages_tokens(self.messages[count:count + 2])
+                count += 2
+            dropped = list(self.messages[:count])
+            previous_summary = self.summary
+            generation = self._generation
+            self._compacting = True
+
+        try:
+            summary = previous_summary
+            if self.summarize:
+                try:
+                    summary = self.summarize(previous_summary, dropped) or previous_summary
+                except Exception as e:
+                    print(f"History summary error: {e}")
+            with self.lock:
+                if generation == self._generation:
+                    del self.messages[:count]
+                    self.summary = summary
+                    self.compactions += 1
+                    print(f"🧠 Compacted {count} messages into the summary (~{self.total_tokens()} history tokens)")
+            return True
+        finally:
+            with self.lock:
+                self._compacting = False
+
+    def clear(self):
+        with self.lock:
+            self.messages = []
+            self.summary = ""
+            self._generation += 1
+
+    def export_state(self):
+        with self.lock:
+            return {"chat_history": list(self.messages), "summary": self.summary}
+
+    def load_state(self, state):
+        with self.lock:
+            self.messages = list(state.get("chat_history", []))
+            self.summary = state.get("summary", "")
+            self._generation += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "messages": len(self.messages),
+                "history_tokens": self.total_tokens(),
+                "budget": self.budget,
+                "summary_tokens": estimate_tokens(self.summary),
+                "compactions": self.compactions,
+            }
+
+
+def summary_messages(previous_summary, messages):
+    """Prompt asking the model to fold new turns into the running summary"""
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages if isinstance(message.get("content"), str))
+    return [
+        {"role": "system", "content": "You maintain a running summary of a conversation between a user and JARVIS, an AI assistant. Merge the new exchanges into the existing summary. Keep names, facts, preferences and open questions; drop small talk. Reply with the updated summary only, in at most 120 words."},
+        {"role": "user", "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew exchanges:\n{transcript}"}
+    ]
@@ -0,0 +1,159 @@
+"""
+JARVIS HTTP client - one process-wide, connection-pooled session for every web fetch
+Keeps TCP/TLS connections alive between requests so repeated hosts skip the handshake
+get_async_http_client() is the asyncio counterpart, one pooled httpx.AsyncClient per event loop
+"""
+
+import os
+import threading
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.exceptions import EmptyPoolError
+urllib3.disable_warnings()
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Connection': 'keep-alive',
+}
+
+
+def _timed_pool(pool_class, pool_timeout):
+    """Connection pool class that waits at most pool_timeout seconds for a free connection"""
+    class TimedPool(pool_class):
+        def urlopen(self, method, url, *args, pool_timeout=pool_timeout, **kwargs):
+            return super().urlopen(method, url, *args, pool_timeout=pool_timeout, **kwargs)
+    return TimedPool
+
+
+class PoolTimeoutAdapter(HTTPAdapter):
+    """
+    Blocking HTTPAdapter with a pool timeout: once a host's connections are all in use, a request waits
+    pool_timeout seconds and then fails, instead of waiting out stragglers an earlier caller stopped waiting for
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ["pool_timeout"]
+
+    def __init__(self, pool_timeout=None, **kwargs):
+        self.pool_timeout = pool_timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _timed_pool(pool_class, self.pool_timeout)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, *args, **kwargs):
+        try:
+            return super().send(request, *args, **kwargs)
+        except EmptyPoolError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+
+class HTTPClient:
+    def __init__(self, pool_hosts=32, pool_per_host=8, pool_total=32, timeout=10, pool_timeout=5, headers=None):
+        """
+        pool_hosts: number of per-host connection pools kept alive
+        pool_per_host: maximum open connections to a single host
+        pool_total: maximum requests in flight across all hosts
+        pool_timeout: seconds to wait for a free connection to a busy host before failing
+        """
+        self.timeout = timeout
+        self.pool_hosts = pool_hosts
+        self.pool_per_host = pool_per_host
+        self.pool_total = pool_total
+        self.pool_timeout = pool_timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        # pool_block makes the per-host limit a hard cap instead of opening throwaway connections
+        adapter = PoolTimeoutAdapter(pool_timeout=pool_timeout, pool_connections=pool_hosts,
+                                     pool_maxsize=pool_per_host, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # requests has no global cap, so bound total in-flight requests ourselves
+        self._slots = threading.BoundedSemaphore(pool_total)
+
+    def get(self, url, headers=None, timeout=None, verify=True, **kwargs):
+        """GET a URL through the shared pool with the client's default headers and timeout"""
+        with self._slots:
+            return self.session.get(
+                url,
+                headers=headers,
+                timeout=timeout or self.timeout,
+                verify=verify,
+                **kwargs
+            )
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def get_http_client() -> HTTPClient:
+    """Return the process-wide HTTP client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient(
+                    pool_hosts=_env_int("JARVIS_HTTP_POOL_HOSTS", 32),
+                    pool_per_host=_env_int("JARVIS_HTTP_POOL_PER_HOST", 8),
+                    pool_total=_env_int("JARVIS_HTTP_POOL_TOTAL", 32),
+                    timeout=_env_int("JARVIS_HTTP_TIMEOUT", 10),
+                    pool_timeout=_env_int("JARVIS_HTTP_POOL_TIMEOUT", 5),
+                )
+    return _client
+
+
+def configure_http_client(**kwargs) -> HTTPClient:
+    """Replace the process-wide HTTP client, e.g. configure_http_client(pool_per_host=4, timeout=5)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HTTPClient(**kwargs)
+    return _client
+
+
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    """
+    Return the pooled async client for the running event loop, creating it on first use.
+    Like fetch_url() it does not verify certificates, since search results point at arbitrary sites.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx  # only the async server needs it
+        pool_total = _env_int("JARVIS_HTTP_POOL_TOTAL", 32)
+        client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=_env_int("JARVIS_HTTP_TIMEOUT", 10),
+            limits=httpx.Limits(max_connections=pool_total, max_keepalive_connections=pool_total),
+            follow_redirects=True,
+            verify=False,
+        )
+        _async_clients[loop] = client
+    return client
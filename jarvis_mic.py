@@ -0,0 +1,315 @@
+"""
+JARVIS microphone - one always-open input stream with VAD segmentation and pre-roll
+A capture thread writes every frame into a NumPy ring buffer, tracks the background noise floor (a low
+percentile of recent frame levels) and cuts the stream into utterances. Each utterance starts a little before speech was detected (pre-roll),
+so words spoken right after the wake word are never clipped, and no per-turn calibration is needed.
+"""
+
+import os
+import time
+import queue
+import threading
+from contextlib import contextmanager, nullcontext
+import numpy as np
+from jarvis_wakeword import pcm_to_float
+
+SAMPLE_RATE = 16000
+
+
+class RingBuffer:
+    """Fixed-size float32 sample buffer addressed by absolute sample index"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.written = 0  # total samples ever written
+
+    def write(self, samples):
+        samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+        self.written += len(samples)
+
+    def read(self, start, end):
+        """Samples [start, end) by absolute index; anything already overwritten is skipped"""
+        start = max(start, self.written - self.capacity, 0)
+        end = min(end, self.written)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        indices = np.arange(start, end) % self.capacity
+        return self.data[indices]
+
+
+class Utterance:
+    def __init__(self, samples, start_time, end_time, sample_rate=SAMPLE_RATE):
+        self.samples = samples
+        self.start_time = start_time
+        self.end_time = end_time
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    def to_audio_data(self):
+        """speech_recognition AudioData, so recognize_google() and friends can be used as before"""
+        import speech_recognition as sr
+        pcm = (np.clip(self.samples, -1, 1) * 32767).astype(np.int16).tobytes()
+        return sr.AudioData(pcm, self.sample_rate, 2)
+
+
+class MicrophoneStream:
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=30, buffer_seconds=30, pre_roll=0.3,
+                 end_silence=0.8, min_speech=0.15, max_utterance=15.0, speech_ratio=3.0,
+                 min_rms=0.003, noise_window=10.0, noise_percentile=20, barge_in_ratio=2.0, echo_window=5.0,
+                 on_barge_in=None, device_index=None):
+        """
+        pre_roll: seconds of audio kept before the detected start of speech
+        end_silence: seconds of silence that end an utterance
+        min_speech: seconds of continuous speech needed to start one, filters clicks
+        max_utterance: utterances are cut at this length
+        speech_ratio: a frame is speech when its RMS exceeds the noise floor by this factor
+        noise_window, noise_percentile: the noise floor is this percentile of the frame levels of the last
+            noise_window seconds, speech included; pauses between words keep it at the background level,
+            and a step rise in background noise (a fan, a TV) lifts it within a fifth of the window
+        barge_in_ratio, echo_window: while muted, speech this many times louder than JARVIS's own voice as
+            the microphone hears it (the 95th percentile level of the last echo_window seconds of playback)
+            is the user talking over JARVIS; there is no echo cancellation, so nothing counts as barge-in
+            until a second of playback has been heard
+        on_barge_in: called (on a separate thread) when that happens, e.g. SpeechPipeline.interrupt;
+            None (the default) turns barge-in off
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.frame_seconds = self.frame_size / sample_rate
+        self.pre_roll = int(pre_roll * sample_rate)
+        self.end_silence_frames = max(1, int(end_silence / self.frame_seconds))
+        self.min_speech_frames = max(1, int(min_speech / self.frame_seconds))
+        self.max_utterance = int(max_utterance * sample_rate)
+        self.speech_ratio = speech_ratio
+        self.min_rms = min_rms
+        self.noise_percentile = noise_percentile
+        self.barge_in_ratio = barge_in_ratio
+        self.on_barge_in = on_barge_in
+        self.device_index = device_index
+
+        self.ring = RingBuffer(int(buffer_seconds * sample_rate))
+        self.noise_floor = None
+        self._levels = np.zeros(max(1, int(noise_window / self.frame_seconds)), dtype=np.float32)
+        self._level_count = 0
+        self._echo_levels = np.zeros(max(1, int(echo_window / self.frame_seconds)), dtype=np.float32)
+        self._echo_count = 0
+        self.utterances = queue.Queue(maxsize=32)
+
+        self.frames = 0
+        self.segmented = 0
+        self.dropped = 0
+        self.barge_ins = 0
+
+        self._speech_run = 0
+        self._silence_run = 0
+        self._utterance_start = None
+        self._muted = 0
+        self._barged_in = False  # set once the user talks over JARVIS; segmentation resumes while still muted
+        self._started_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Open the input stream and start the capture thread (idempotent)"""
+        if self._thread is not None:
+            return self
+        import pyaudio
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+            frames_per_buffer=self.frame_size, input_device_index=self.device_index
+        )
+        self._started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="jarvis-microphone", daemon=True)
+        self._thread.start()
+        print("🎙️ Microphone stream open")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+            self._stream.stop_stream()
+            self._stream.close()
+            self._audio.terminate()
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            try:
+                data = self._stream.read(self.frame_size, exception_on_overflow=False)
+            except OSError as e:
+                print(f"Microphone read error: {e}")
+                time.sleep(0.1)
+                continue
+            self.process(pcm_to_float(data))
+
+    def time_at(self, sample_index):
+        return (self._started_at or 0.0) + sample_index / self.sample_rate
+
+    def is_speech(self, rms):
+        return rms > max(self.min_rms, (self.noise_floor or 0.0) * self.speech_ratio)
+
+    def echo_level(self):
+        """Level of JARVIS's own voice at the microphone, or None before a second of playback was heard"""
+        count = min(self._echo_count, len(self._echo_levels))
+        if count < int(1.0 / self.frame_seconds):
+            return None
+        return float(np.percentile(self._echo_levels[:count], 95))
+
+    def barge_in_threshold(self):
+        """RMS above which a frame heard during playback is the user, or None while the echo level is unknown"""
+        echo = self.echo_level()
+        if echo is None:
+            return None
+        return max(self.min_rms, (self.noise_floor or 0.0) * self.speech_ratio, echo) * self.barge_in_ratio
+
+    def process(self, frame):
+        """Append one frame, update the noise floor and the utterance segmentation"""
+        with self._lock:
+            self.ring.write(frame)
+            self.frames += 1
+            rms = float(np.sqrt(np.mean(frame ** 2))) if len(frame) else 0.0
+
+            if self._muted and not self._barged_in:
+                # Our own speech is playing: neither learn from it nor segment it, unless the user talks over it
+                threshold = self.barge_in_threshold()
+                self._echo_levels[self._echo_count % len(self._echo_levels)] = rms
+                self._echo_count += 1
+                if self.on_barge_in is None or threshold is None or rms <= threshold:
+                    self._reset()
+                    return
+                self._speech_run += 1
+                if self._speech_run < self.min_speech_frames:
+                    return
+                self._barged_in = True
+                self.barge_ins += 1
+                speech_start = self.ring.written - self._speech_run * self.frame_size
+                self._utterance_start = max(0, speech_start - self.pre_roll)
+                self._silence_run = 0
+                print("✋ Barge-in: the user is talking")
+                threading.Thread(target=self.on_barge_in, daemon=True).start()
+                return
+
+            self._track_noise(rms)
+            speech = self.is_speech(rms)
+
+            if self._utterance_start is None:
+                if speech:
+                    self._speech_run += 1
+                    if self._speech_run >= self.min_speech_frames:
+                        speech_start = self.ring.written - self._speech_run * self.frame_size
+                        self._utterance_start = max(0, speech_start - self.pre_roll)
+                        self._silence_run = 0
+                else:
+                    self._speech_run = 0
+                return
+
+            self._silence_run = 0 if speech else self._silence_run + 1
+            too_long = self.ring.written - self._utterance_start >= self.max_utterance
+            if self._silence_run >= self.end_silence_frames or too_long:
+                self._emit(self._utterance_start, self.ring.written)
+                self._reset()
+
+    def _track_noise(self, rms):
+        """Record one frame level, speech included, and recompute the noise floor from the recent levels"""
+        self._levels[self._level_count % len(self._levels)] = rms
+        self._level_count += 1
+        self.noise_floor = float(np.percentile(self._levels[:min(self._level_count, len(self._levels))], self.noise_percentile))
+
+    def _reset(self):
+        self._utterance_start = None
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def _emit(self, start, end):
+        utterance = Utterance(self.ring.read(start, end), self.time_at(start), self.time_at(end), self.sample_rate)
+        if self.utterances.full():
+            # Nobody is listening; keep the newest speech
+            self.utterances.get_nowait()
+            self.dropped += 1
+        self.utterances.put(utterance)
+        self.segmented += 1
+
+    def listen(self, timeout=None, since=None):
+        """
+        Return the next utterance, or None after timeout seconds.
+        since: ignore utterances that ended before this time.time(), e.g. speech from before a button press
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                utterance = self.utterances.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if since is None or utterance.end_time >= since:
+                return utterance
+
+    def flush(self):
+        """Drop utterances nobody has picked up yet"""
+        while True:
+            try:
+                self.utterances.get_nowait()
+            except queue.Empty:
+                return
+
+    @contextmanager
+    def muted(self):
+        """Suspend segmentation, e.g. while JARVIS is talking, so it does not hear itself"""
+        with self._lock:
+            self._muted += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._muted -= 1
+                if not self._muted:
+                    self._barged_in = False
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "utterances": self.segmented,
+            "dropped": self.dropped,
+            "barge_ins": self.barge_ins,
+            "noise_floor": self.noise_floor,
+            "echo_level": self.echo_level(),
+        }
+
+
+_microphone = None
+_microphone_lock = threading.Lock()
+
+
+def get_microphone() -> MicrophoneStream:
+    """Return the process-wide microphone stream, opening it on first use"""
+    global _microphone
+    if _microphone is None:
+        with _microphone_lock:
+            if _microphone is None:
+                _microphone = MicrophoneStream(
+                    pre_roll=float(os.environ.get("JARVIS_MIC_PRE_ROLL", 0.3)),
+                    end_silence=float(os.environ.get("JARVIS_MIC_END_SILENCE", 0.8)),
+                    barge_in_ratio=float(os.environ.get("JARVIS_MIC_BARGE_IN_RATIO", 2.0)),
+                ).start()
+    return _microphone
+
+
+def muted_microphone():
+    """muted() of the process-wide microphone stream if it is open, otherwise a no-op"""
+    if _microphone is None:
+        return nullcontext()
+    return _microphone.muted()
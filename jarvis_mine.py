@@ -1,18 +1,35 @@
 import os
-import openai
-import subprocess
 import time
-import asyncio
-import requests
 import datetime
-from typing import List
-from googlesearch import search as _search
-from bs4 import BeautifulSoup
-from charset_normalizer import detect
-from requests_html import AsyncHTMLSession
-import urllib3
-urllib3.disable_warnings()
+import json
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple
 from config import OPENAI_API_KEY
+from jarvis_http import get_http_client
+from jarvis_cache import get_page_cache, get_search_cache, get_answer_cache, get_vision_cache, normalize_key
+from jarvis_classifier import get_intent_classifier
+from jarvis_tts import SpeechPipeline, create_speech_engine
+from jarvis_history import ConversationMemory, summary_messages, messages_tokens
+from jarvis_tracing import span, annotate, count
+from jarvis_extract import extract_text, extract_snippet as extract_main_snippet
+# openai and googlesearch are imported on first use: together they are most of the startup time
+
+
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """Return the process-wide OpenAI client (and its connection pool), creating it on first use"""
+    global _openai_client
+    if _openai_client is None:
+        with _openai_client_lock:
+            if _openai_client is None:
+                import openai
+                _openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+    return _openai_client
 
 
 class Jarvis:
@@ -25,13 +42,24 @@ class Jarvis:
         # model and api
         self.open_ai_key = OPENAI_API_KEY
         self.model = "gpt-4o"
-        self.openai_client = openai.OpenAI(api_key=self.open_ai_key)
-        self.session = AsyncHTMLSession()
+        self.vision_model = "gpt-4o"  # Use GPT-4o for vision
+        self._openai_client = None  # Shared client, see the openai_client property
 
         # conversation history
         self.conversation_history = []
         self.conversation_history_length=10
-        self.chat_history = []  # For casual conversation memory
+        # Casual conversation memory: recent turns within a token budget plus a rolling summary of older ones
+        self.memory = ConversationMemory(
+            budget=int(os.environ.get("JARVIS_HISTORY_TOKEN_BUDGET", 1500)),
+            summarize=self.summarize_history
+        )
+        # Token usage reported by the API, to keep an eye on prompt size
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "last_prompt_tokens": 0}
+
+        # Classify, extract the question and keywords in one model call instead of three
+        self.fused_preprocessing = True
+        # Local casual/search classifier, the AI is only asked when it is unsure (see intent_classifier)
+        self._intent_classifier = None
 
         #voice setting
         self.voice_setting = {
@@ -41,55 +69,143 @@ class Jarvis:
             "voice": "en-US-Standard-A",
             "language": "en-US",
         }
+        self._speech_engine = None
+        self._speech_pipeline = None
+
+    @property
+    def openai_client(self):
+        """OpenAI client shared by every Jarvis, created on the first model call instead of at startup"""
+        if self._openai_client is None:
+            self._openai_client = get_openai_client()
+        return self._openai_client
+
+    @property
+    def session(self):
+        """Shared connection pool for web fetches"""
+        return get_http_client()
+
+    @property
+    def intent_classifier(self):
+        if self._intent_classifier is None:
+            self._intent_classifier = get_intent_classifier()
+        return self._intent_classifier
+
+    def _completion_args(self, messages, max_tokens, temperature, model=None):
+        """Sampling parameters shared by every chat completion call"""
+        return {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": 0.9,
+            "frequency_penalty": 0.1,
+            "presence_penalty": 0.1,
+        }
 
-    def generate_response(self, messages, max_tokens=200, temperature=0.1):
+    def generate_response(self, messages, max_tokens=200, temperature=0.1, response_format=None, on_delta=None):
         """
         Generate response using OpenAI with controlled parameters like Llama
+        If on_delta is given the completion is streamed and on_delta(text) is called for every delta
         """
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=0.9,
-                frequency_penalty=0.1,
-                presence_penalty=0.1
-            )
-            return response.choices[0].message.content
+            with span("llm", model=self.model, stream=bool(on_delta)):
+                if on_delta:
+                    return self._collect_stream(self.stream_response(messages, max_tokens, temperature), on_delta)
+                extra_args = {"response_format": response_format} if response_format else {}
+                response = self.openai_client.chat.completions.create(
+                    **self._completion_args(messages, max_tokens, temperature),
+                    **extra_args
+                )
+                self.record_usage(response.usage)
+                return response.choices[0].message.content
         except Exception as e:
             print(f"Response generation error: {e}")
             return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues."
 
+    def stream_response(self, messages, max_tokens=200, temperature=0.1, model=None):
+        """Yield text deltas from OpenAI as they are generated"""
+        stream = self.openai_client.chat.completions.create(
+            **self._completion_args(messages, max_tokens, temperature, model),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            if chunk.usage:
+                self.record_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _collect_stream(self, deltas, on_delta):
+        """Forward each delta to on_delta and return the full text"""
+        stream_start = time.perf_counter()
+        parts = []
+        for delta in deltas:
+            if not parts:
+                annotate(first_token_seconds=round(time.perf_counter() - stream_start, 4))
+            parts.append(delta)
+            on_delta(delta)
+        return "".join(parts)
+
+    def record_usage(self, usage):
+        """Add the token counts the API reported for one call to self.usage"""
+        if usage is None:
+            return
+        self.usage["calls"] += 1
+        self.usage["prompt_tokens"] += usage.prompt_tokens
+        self.usage["completion_tokens"] += usage.completion_tokens
+        self.usage["last_prompt_tokens"] = usage.prompt_tokens
+        count(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        print(f"📏 Prompt tokens: {usage.prompt_tokens} (completion {usage.completion_tokens})")
+
     
+    @property
+    def speech_engine(self):
+        """Platform TTS engine (macOS say, espeak, pyttsx3), chosen on first use"""
+        if self._speech_engine is None:
+            # Daniel is a good male voice for JARVIS on macOS
+            self._speech_engine = create_speech_engine(rate=self.voice_setting["rate"], voices={"say": "Daniel"})
+        return self._speech_engine
+
     def speak(self, _text: str):
-        """Speak the given text using macOS native TTS"""
-        
-        # Use macOS native 'say' command with voice settings
-        voice = "Daniel"  # Good male voice for JARVIS
-        rate = self.voice_setting["rate"]
-        
-        # Build the say command
-        cmd = [
-            "say",
-            "-v", voice,
-            "-r", str(rate),
-            _text
-        ]
-        
-        # Execute the command
-        subprocess.run(cmd, check=True, timeout=30)
+        """Speak the given text with the speech engine, blocking until it is said or interrupted"""
+        from jarvis_mic import muted_microphone
         print(f"🗣️ JARVIS: {_text}")
+        # An open microphone must not take our own voice for a command (barge-in still gets through)
+        with muted_microphone(), span("tts", engine=self.speech_engine.name, chars=len(_text)):
+            self.speech_engine.speak(_text)
 
-    def greet(self):
-        hour=time.localtime().tm_hour
+    @property
+    def speech_pipeline(self):
+        """Single ordered speech queue, created on first use; interrupt() cuts it off"""
+        if self._speech_pipeline is None:
+            self._speech_pipeline = SpeechPipeline(self.speak, stop_fn=self.speech_engine.stop)
+        return self._speech_pipeline
+
+    def greeting(self, hour):
         if hour<12:
-            greeting=f"Good morning, {self.user_name}. JARVIS at your service."
+            return f"Good morning, {self.user_name}. JARVIS at your service."
         elif hour<17:
-            greeting=f"Good afternoon, {self.user_name}. How may I assist you today?"
+            return f"Good afternoon, {self.user_name}. How may I assist you today?"
         else:
-            greeting=f"Good evening, {self.user_name}. JARVIS ready for your commands." 
-        self.speak(greeting)
+            return f"Good evening, {self.user_name}. JARVIS ready for your commands."
+
+    def greet(self):
+        self.speak(self.greeting(time.localtime().tm_hour))
+
+    def spoken_phrases(self):
+        """Phrases JARVIS says over and over: greetings, acknowledgements, goodbyes and apologies"""
+        return [self.greeting(hour) for hour in (9, 14, 20)] + [
+            "Yes, I'm listening",
+            f"Memory cleared, {self.user_name}. Starting fresh.",
+            f"Goodbye, {self.user_name}. JARVIS signing off.",
+            f"I apologize, {self.user_name}. There seems to be an error.",
+            f"I apologize, {self.user_name}. I'm experiencing some connectivity issues.",
+            f"I apologize, {self.user_name}. I'm experiencing some connectivity issues with image processing.",
+        ]
+
+    def prewarm_speech(self, phrases=()):
+        """Render the recurring phrases into the audio cache in the background, so they play without delay"""
+        return self.speech_engine.prewarm(self.spoken_phrases() + list(phrases))
 
     def listen(self):
         print("Listening... (Speak now)")
@@ -100,160 +216,318 @@ class Jarvis:
             print(f"Error: {e}")
             return input("You: ").strip()
 
-    def get_ai_response(self, user_input):
-        """Get AI response - either casual chat or Q&A based on input type"""
+    def chat_messages(self, user_input):
+        """Build the casual chat prompt: system message, recent history and the user input"""
+        # Get current date and time for context
+        current_date = datetime.datetime.now().strftime("%B %d, %Y")
+        current_time = datetime.datetime.now().strftime("%I:%M %p")
+
+        messages = [
+            {"role": "system", "content": f"You are JARVIS, a friendly AI assistant. You're chatting with {self.user_name}. Be conversational, friendly, and engaging. Keep responses natural and not too formal. You can ask questions, share thoughts, and have a normal conversation. Remember previous parts of the conversation to maintain context. CURRENT DATE: {current_date} at {current_time}"}
+        ]
+        
+        # Add conversation history (summary and recent turns within the token budget)
+        for msg in self.recent_history():
+            messages.append(msg)
+        
+        # Add current user input
+        messages.append({"role": "user", "content": user_input})
+        return messages
+
+    def vision_messages(self, user_input, image_data=None, image_mime="image/jpeg"):
+        """
+        Build the vision prompt: system message, recent history and a text and/or image user message
+        image_data: base64 image, ideally from jarvis_image.prepare_image(), whose .mime goes in image_mime
+        """
+        # Get current date and time for context
+        current_date = datetime.datetime.now().strftime("%B %d, %Y")
+        current_time = datetime.datetime.now().strftime("%I:%M %p")
+        
+        messages = [
+            {"role": "system", "content": f"You are JARVIS, a friendly AI assistant with vision capabilities. You're chatting with {self.user_name}. You can see and analyze images. Be conversational, friendly, and engaging. Keep responses natural and not too formal. You can ask questions, share thoughts, and have a normal conversation. Remember previous parts of the conversation to maintain context. CURRENT DATE: {current_date} at {current_time}"}
+        ]
+        
+        # Add conversation history
+        for msg in self.recent_history():
+            messages.append(msg)
+        
+        # Prepare user message
+        if image_data:
+            if user_input:
+                # Both text and image
+                user_message = [
+                    {"type": "text", "text": user_input},
+                    {"type": "image_url", "image_url": {"url": f"data:{image_mime};base64,{image_data}"}}
+                ]
+            else:
+                # Only image
+                user_message = [
+                    {"type": "image_url", "image_url": {"url": f"data:{image_mime};base64,{image_data}"}}
+                ]
+        else:
+            # Only text
+            user_message = user_input
+        
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
+    @property
+    def chat_history(self):
+        return self.memory.messages
+
+    def recent_history(self):
+        """Rolling summary plus the newest history messages that fit the token budget"""
+        history = self.memory.context()
+        summary_note = " + summary" if self.memory.summary else ""
+        print(f"🧠 History: ~{messages_tokens(history)} tokens ({len(history) - bool(self.memory.summary)} of {len(self.memory.messages)} messages{summary_note})")
+        return history
+
+    def remember(self, user_input, response):
+        """Add an exchange to the conversation history"""
+        self.memory.add(user_input, response)
+        # Fold turns that no longer fit the budget into the summary, off the response path
+        if self.memory.needs_compaction():
+            threading.Thread(target=self.memory.compact, daemon=True).start()
+
+    def summarize_history(self, previous_summary, messages):
+        """Merge turns that fell out of the token budget into the rolling summary"""
+        response = self.openai_client.chat.completions.create(
+            **self._completion_args(summary_messages(previous_summary, messages), 200, 0.1)
+        )
+        self.record_usage(response.usage)
+        return response.choices[0].message.content.strip()
+
+    def clear_history(self):
+        self.conversation_history = []
+        self.memory.clear()
+
+    def export_state(self):
+        """Conversation state as plain JSON-serializable data, e.g. for spilling an idle session to disk"""
+        return self.memory.export_state()
+
+    def load_state(self, state):
+        """Restore conversation state saved by export_state()"""
+        self.memory.load_state(state)
+
+    def get_ai_response(self, user_input, on_delta=None):
+        """Get AI response - either casual chat or Q&A based on input type, streamed to on_delta if given"""
+        with span("request", chars=len(user_input)):
+            return self._get_ai_response(user_input, on_delta)
+
+    def _get_ai_response(self, user_input, on_delta=None):
         try:
-            # Get current date and time for context
-            current_date = datetime.datetime.now().strftime("%B %d, %Y")
-            current_time = datetime.datetime.now().strftime("%I:%M %p")
-            
             # Check if this is a casual conversation or a question that needs web search
-            if self.is_casual_conversation(user_input):
+            local_label = self.classify_locally(user_input)
+            preprocessed = None
+            if local_label != "casual" and self.fused_preprocessing:
+                preprocessed = self.preprocess(user_input)
+
+            if preprocessed:
+                is_casual = preprocessed["label"] == "casual"
+            elif local_label:
+                is_casual = local_label == "casual"
+            else:
+                is_casual = self.classify_with_ai(user_input)
+
+            annotate(route="casual" if is_casual else "search")
+            if is_casual:
                 # Use direct AI response for casual chat with memory
-                messages = [
-                    {"role": "system", "content": f"You are JARVIS, a friendly AI assistant. You're chatting with {self.user_name}. Be conversational, friendly, and engaging. Keep responses natural and not too formal. You can ask questions, share thoughts, and have a normal conversation. Remember previous parts of the conversation to maintain context. CURRENT DATE: {current_date} at {current_time}"}
-                ]
-                
-                # Add conversation history (last 10 exchanges)
-                for msg in self.chat_history[-20:]:  # Keep last 20 messages
-                    messages.append(msg)
-                
-                # Add current user input
-                messages.append({"role": "user", "content": user_input})
-                
-                response = self.generate_response(messages, max_tokens=150, temperature=0.7)
-                
-                # Add to conversation history
-                self.chat_history.append({"role": "user", "content": user_input})
-                self.chat_history.append({"role": "assistant", "content": response})
-                
-                # Keep only last 20 messages to avoid context overflow
-                if len(self.chat_history) > 20:
-                    self.chat_history = self.chat_history[-20:]
+                response = self.generate_response(self.chat_messages(user_input), max_tokens=150, temperature=0.7, on_delta=on_delta)
             else:
                 # Use pipeline for questions that might need web search, but also record the conversation
-                response = pipeline(user_input)
-                
-                # Add to conversation history for search-based responses too
-                self.chat_history.append({"role": "user", "content": user_input})
-                self.chat_history.append({"role": "assistant", "content": response})
-                
-                # Keep only last 20 messages to avoid context overflow
-                if len(self.chat_history) > 20:
-                    self.chat_history = self.chat_history[-20:]
+                if preprocessed:
+                    response = pipeline(user_input, core_question=preprocessed["question"], search_keywords=preprocessed["keywords"], on_delta=on_delta)
+                else:
+                    response = pipeline(user_input, on_delta=on_delta)
+            
+            # Add to conversation history for both casual and search-based responses
+            self.remember(user_input, response)
             return response
         except Exception as e:
             print(f"Error getting AI response: {e}")
             return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues."
     
-    def get_ai_response_with_vision(self, user_input, image_data=None):
-        """Get AI response with vision support for image analysis"""
+    def get_ai_response_with_vision(self, user_input, image_data=None, on_delta=None, image_mime="image/jpeg", image_hash=None, cache_prompt=None, image_thumbnail=None):
+        """
+        Get AI response with vision support for image analysis, streamed to on_delta if given
+        image_hash, image_thumbnail: PreparedImage.phash and .thumbnail; a visually identical image asked with
+        the same cache_prompt (default: user_input) reuses the earlier analysis instead of calling the model
+        """
         try:
-            # Get current date and time for context
-            current_date = datetime.datetime.now().strftime("%B %d, %Y")
-            current_time = datetime.datetime.now().strftime("%I:%M %p")
-            
-            messages = [
-                {"role": "system", "content": f"You are JARVIS, a friendly AI assistant with vision capabilities. You're chatting with {self.user_name}. You can see and analyze images. Be conversational, friendly, and engaging. Keep responses natural and not too formal. You can ask questions, share thoughts, and have a normal conversation. Remember previous parts of the conversation to maintain context. CURRENT DATE: {current_date} at {current_time}"}
-            ]
-            
-            # Add conversation history
-            for msg in self.chat_history[-20:]:
-                messages.append(msg)
-            
-            # Prepare user message
-            if image_data:
-                if user_input:
-                    # Both text and image
-                    user_message = [
-                        {"type": "text", "text": user_input},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}}
-                    ]
-                else:
-                    # Only image
-                    user_message = [
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}}
-                    ]
-            else:
-                # Only text
-                user_message = user_input
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            # Generate response with vision model
-            response = self.generate_response_with_vision(messages, max_tokens=200, temperature=0.7)
+            response = self.analyze_image(user_input, image_data, on_delta, image_mime, image_hash, cache_prompt, image_thumbnail)
             
             # Add to conversation history
-            self.chat_history.append({"role": "user", "content": user_input or "[Image]"})
-            self.chat_history.append({"role": "assistant", "content": response})
-            
-            # Keep only last 20 messages to avoid context overflow
-            if len(self.chat_history) > 20:
-                self.chat_history = self.chat_history[-20:]
-                
+            self.remember(user_input or "[Image]", response)
             return response
         except Exception as e:
             print(f"Error getting AI response with vision: {e}")
             return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues with image processing."
+
+    def analyze_image(self, prompt, image_data=None, on_delta=None, image_mime="image/jpeg", image_hash=None, cache_prompt=None, image_thumbnail=None):
+        """
+        get_ai_response_with_vision() without touching the conversation history, for analyses nobody asked
+        for in the chat, e.g. screen watch
+        """
+        with span("vision", image_bytes=len(image_data or ""), mime=image_mime) as vision_span:
+            cache_prompt = prompt if cache_prompt is None else cache_prompt
+            response = self.cached_vision_response(image_hash, cache_prompt, on_delta, image_thumbnail)
+            vision_span.set(cached=response is not None)
+            if response is None:
+                # Generate response with vision model
+                messages = self.vision_messages(prompt, image_data, image_mime)
+                response = self.generate_response_with_vision(messages, max_tokens=200, temperature=0.7, on_delta=on_delta)
+                self.cache_vision_response(image_hash, cache_prompt, response, image_thumbnail)
+            return response
     
-    def generate_response_with_vision(self, messages, max_tokens=200, temperature=0.7):
+    def cached_vision_response(self, image_hash, prompt, on_delta=None, thumbnail=None):
+        """Return a cached analysis of a visually identical image (delivered to on_delta as one piece), or None"""
+        if image_hash is None:
+            return None
+        response = get_vision_cache().get(image_hash, prompt, thumbnail)
+        if response is not None:
+            print(f"♻️ Vision cache hit: {response}")
+            if on_delta:
+                on_delta(response)
+        return response
+
+    def cache_vision_response(self, image_hash, prompt, response, thumbnail=None):
+        if image_hash is not None and not response.startswith("I apologize"):
+            get_vision_cache().set(image_hash, prompt, response, thumbnail)
+
+    def generate_response_with_vision(self, messages, max_tokens=200, temperature=0.7, on_delta=None):
         """Generate response using OpenAI with vision capabilities"""
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # Use GPT-4o for vision
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=0.9,
-                frequency_penalty=0.1,
-                presence_penalty=0.1
-            )
-            return response.choices[0].message.content
+            with span("llm", model=self.vision_model, stream=bool(on_delta)):
+                if on_delta:
+                    return self._collect_stream(self.stream_response(messages, max_tokens, temperature, model=self.vision_model), on_delta)
+                response = self.openai_client.chat.completions.create(
+                    **self._completion_args(messages, max_tokens, temperature, model=self.vision_model)
+                )
+                self.record_usage(response.usage)
+                return response.choices[0].message.content
         except Exception as e:
             print(f"Vision response generation error: {e}")
             return f"I apologize, {self.user_name}. I'm experiencing some connectivity issues."
     
     def is_casual_conversation(self, user_input):
-        """Use AI to determine if the input is casual conversation or needs web search"""
-        try:
-            messages = [
-                {"role": "system", "content": """You are a conversation classifier. Your job is to determine if a user's input is:
-                
-                CASUAL CONVERSATION (respond with "casual"):
-                - Greetings, small talk, personal opinions
-                - Emotional expressions, feelings, thoughts
-                - Jokes, entertainment requests
-                - Personal questions about you or the user
-                - General conversation, chit-chat
-                - Philosophical discussions, opinions
-                
-                QUESTION NEEDING WEB SEARCH (respond with "search"):
-                - Factual questions about current events, people, places
-                - Questions about specific dates, times, prices, weather
-                - Questions requiring up-to-date information
-                - Questions about recent news, politics, sports
-                - Questions about specific facts, statistics, data
-                - Questions that might have changed answers over time
-                
-                Respond with ONLY "casual" or "search" - no other text."""},
-                {"role": "user", "content": f"Classify this input: {user_input}"}
-            ]
-            
-            response = self.generate_response(messages, max_tokens=10, temperature=0.1)
-            response = response.strip().lower()
+        """Determine if the input is casual conversation or needs web search, locally when confident"""
+        local_label = self.classify_locally(user_input)
+        if local_label:
+            return local_label == "casual"
+        return self.classify_with_ai(user_input)
+
+    def classify_locally(self, user_input):
+        """Return "casual"/"search" from the on-box classifier, or None when it is not confident"""
+        with span("classify.local") as classify_span:
+            label = self.intent_classifier.classify(user_input)
+            classify_span.set(label=label)
+        if label:
+            print(f"⚡ Locally classified '{user_input}' as: {label}")
+        return label
+
+    def classifier_messages(self, user_input):
+        return [
+            {"role": "system", "content": """You are a conversation classifier. Your job is to determine if a user's input is:
             
-            print(f"🤖 AI classified '{user_input}' as: {response}")
+            CASUAL CONVERSATION (respond with "casual"):
+            - Greetings, small talk, personal opinions
+            - Emotional expressions, feelings, thoughts
+            - Jokes, entertainment requests
+            - Personal questions about you or the user
+            - General conversation, chit-chat
+            - Philosophical discussions, opinions
             
-            return response == "casual"
+            QUESTION NEEDING WEB SEARCH (respond with "search"):
+            - Factual questions about current events, people, places
+            - Questions about specific dates, times, prices, weather
+            - Questions requiring up-to-date information
+            - Questions about recent news, politics, sports
+            - Questions about specific facts, statistics, data
+            - Questions that might have changed answers over time
             
+            Respond with ONLY "casual" or "search" - no other text."""},
+            {"role": "user", "content": f"Classify this input: {user_input}"}
+        ]
+
+    def parse_classification(self, user_input, response):
+        """Turn the classifier reply into is_casual and record it for the local classifier"""
+        response = response.strip().lower()
+        print(f"🤖 AI classified '{user_input}' as: {response}")
+        self.intent_classifier.record_llm_decision(user_input, response)
+        return response == "casual"
+
+    def fallback_classification(self, user_input):
+        """Fallback: treat as casual if it's short or doesn't contain question words"""
+        input_lower = user_input.lower()
+        return len(user_input.split()) <= 5 or not any(word in input_lower for word in ['what', 'who', 'where', 'when', 'how', 'why', '?'])
+
+    def classify_with_ai(self, user_input):
+        """Use AI to determine if the input is casual conversation or needs web search"""
+        try:
+            with span("classify.llm"):
+                response = self.generate_response(self.classifier_messages(user_input), max_tokens=10, temperature=0.1)
+                return self.parse_classification(user_input, response)
         except Exception as e:
             print(f"Error in conversation classification: {e}")
-            # Fallback: treat as casual if it's short or doesn't contain question words
-            input_lower = user_input.lower()
-            return len(user_input.split()) <= 5 or not any(word in input_lower for word in ['what', 'who', 'where', 'when', 'how', 'why', '?'])
+            return self.fallback_classification(user_input)
     
+    def preprocess_messages(self, user_input):
+        return [
+            {"role": "system", "content": """You are the preprocessing stage of a voice assistant. For the user's input, return a JSON object with:
+            
+            "label": "casual" or "search"
+                - "casual": greetings, small talk, opinions, feelings, jokes, personal questions, chit-chat, philosophical discussions
+                - "search": factual questions about current events, people, places, dates, times, prices, weather, news, politics, sports, statistics, or anything whose answer may have changed over time
+            "question": the core question with irrelevant information removed (do not answer it); empty string if label is "casual"
+            "keywords": a list of web search keywords for the question; empty list if label is "casual"
+                - if the question contains "most", "how many", "how long", "how tall", "who", "where", "first", "last", "who's", "which", these words must be included
+                - if the question contains "according to...", include "according to..." as a keyword
+            
+            Respond with ONLY the JSON object."""},
+            {"role": "user", "content": user_input}
+        ]
+
+    def parse_preprocessed(self, user_input, response):
+        """Validate the preprocessing reply; returns {"label", "question", "keywords"} or None"""
+        try:
+            data = json.loads(response)
+        except (TypeError, ValueError):
+            print(f"⚠️ Preprocessing returned invalid JSON, falling back: {response}")
+            return None
+
+        label = str(data.get("label", "")).strip().lower() if isinstance(data, dict) else ""
+        if label == "casual":
+            print(f"🤖 AI classified '{user_input}' as: casual")
+            self.intent_classifier.record_llm_decision(user_input, "casual")
+            return {"label": "casual", "question": "", "keywords": ""}
+
+        question = data.get("question") if label == "search" else None
+        keywords = data.get("keywords") if label == "search" else None
+        if isinstance(keywords, list):
+            keywords = ", ".join(str(keyword).strip() for keyword in keywords if str(keyword).strip())
+        if not isinstance(question, str) or not question.strip() or not isinstance(keywords, str) or not keywords.strip():
+            print(f"⚠️ Preprocessing result failed validation, falling back: {response}")
+            return None
+
+        print(f"🤖 AI classified '{user_input}' as: search")
+        self.intent_classifier.record_llm_decision(user_input, "search")
+        return {"label": "search", "question": question.strip(), "keywords": keywords.strip()}
+
+    def preprocess(self, user_input):
+        """
+        Classify the input, extract the core question and the search keywords in one structured-output call.
+        Returns {"label", "question", "keywords"} or None if the reply is unusable, so callers can fall back
+        to is_casual_conversation() and the extraction agents.
+        """
+        with span("preprocess") as preprocess_span:
+            response = self.generate_response(self.preprocess_messages(user_input), max_tokens=150, temperature=0.1, response_format={"type": "json_object"})
+            preprocessed = self.parse_preprocessed(user_input, response)
+            preprocess_span.set(label=preprocessed["label"] if preprocessed else None)
+            return preprocessed
+
     def run(self):
         """Main JARVIS loop"""
+        self.prewarm_speech()
         self.greet()
         while True:
             try:
@@ -263,11 +537,11 @@ class Jarvis:
                         self.speak(f"Goodbye, {self.user_name}. JARVIS signing off.")
                         break
                     if any(word in user_input.lower() for word in ['clear memory', 'forget', 'reset conversation']):
-                        self.conversation_history = []
+                        self.clear_history()
                         self.speak(f"Memory cleared, {self.user_name}. Starting fresh.")
                         continue
-                    response = self.get_ai_response(user_input)
-                    self.speak(response)
+                    # Speak each sentence as soon as it has been generated
+                    self.speech_pipeline.speak_streamed(lambda on_delta: self.get_ai_response(user_input, on_delta=on_delta))
 
             except KeyboardInterrupt:
                 print("\nShutting down JARVIS...")
@@ -276,88 +550,139 @@ class Jarvis:
             except Exception as e:
                 print(f"Error: {e}")
                 self.speak(f"I apologize, {self.user_name}. There seems to be an error.")
+        if self.speech_engine.stats():
+            print(f"🔊 Audio cache: {self.speech_engine.stats()}")
 
 # Web search functions (moved outside class for modularity)
-def fetch_url(url: str):
-    """Optimized synchronous URL fetching using requests with shorter timeouts"""
-    try:
-        print(f"🔗 Fetching: {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10, verify=False)
+def html_from_page(url: str, response):
+    """Return the page text if the response is a successful HTML page, otherwise None"""
+    if response.status_code == 200:
+        content_type = response.content_type
+        print(f"📄 Content-Type: {content_type}")
         
-        if response.status_code == 200:
-            content_type = response.headers.get('Content-Type', '')
-            print(f"📄 Content-Type: {content_type}")
-            
-            if 'text/html' in content_type:
-                print(f"✅ Successfully fetched: {url}")
-                return response.text
-            else:
-                print(f"❌ Not HTML content: {content_type}")
-                return None
+        if 'text/html' in content_type:
+            print(f"✅ Successfully fetched: {url}{' (cached)' if response.from_cache else ''}")
+            return response.text
         else:
-            print(f"❌ HTTP {response.status_code} for {url}")
+            print(f"❌ Not HTML content: {content_type}")
             return None
+    else:
+        print(f"❌ HTTP {response.status_code} for {url}")
+        return None
+
+def fetch_url(url: str):
+    """Fetch a URL through the page cache and the shared keep-alive connection pool"""
+    try:
+        print(f"🔗 Fetching: {url}")
+        with span("fetch", url=url) as fetch_span:
+            page = get_page_cache().fetch(url, verify=False)
+            fetch_span.set(status=page.status_code, bytes=len(page.text or ""), cached=page.from_cache)
+            return html_from_page(url, page)
     except Exception as e:
         print(f"❌ Error fetching {url}: {e}")
         return None
 
+def fetch_urls_concurrently(urls: List[str], n_results: int, max_workers: int=8) -> List[Tuple[str, str]]:
+    """Fetch all URLs at once and return (url, html) pairs as soon as n_results HTML pages have arrived"""
+    results = []
+    if not urls:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    # Each fetch runs in a copy of the caller's context so its span nests under the search span
+    futures = {executor.submit(contextvars.copy_context().run, fetch_url, url): url for url in urls}
+    try:
+        for future in as_completed(futures):
+            html_content = future.result()
+            if html_content:
+                results.append((futures[future], html_content))
+                if len(results) >= n_results:  # First N good pages win
+                    break
+    finally:
+        # Drop the stragglers: queued fetches are cancelled, running ones finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+def search_urls(keyword: str, num_results: int) -> List[str]:
+    """Look up result URLs for a keyword string, going to the search engine only on a cache miss"""
+    search_cache = get_search_cache()
+    cache_key = f"{num_results}:{normalize_key(keyword)}"
+    with span("search.engine", keyword=keyword) as engine_span:
+        urls = search_cache.get(cache_key)
+        engine_span.set(cached=urls is not None)
+        if urls is not None:
+            print(f"♻️ Search cache hit ({search_cache.hits} search engine round trips saved)")
+            return urls
+
+        from googlesearch import search as _search
+        urls = list(_search(keyword, num_results=num_results, lang="en", unique=True))
+        engine_span.set(results=len(urls))
+        if urls:  # Don't cache empty results, they are usually rate limiting
+            search_cache.set(cache_key, urls)
+        return urls
+
+def extract_snippet(html_content: str) -> str:
+    """Extract the first 300 characters of main-content text from a page, parsing no further than needed"""
+    return extract_main_snippet(html_content, 300)
+
+def extract_snippets(pages: List[Tuple[str, str]]) -> List[str]:
+    """Extract snippets from (url, html) pairs, reusing snippets cached for unchanged pages"""
+    page_cache = get_page_cache()
+    text_results = []
+    for url, html_content in pages:
+        cached_text = page_cache.get_text(url, "snippet")
+        if cached_text is not None:
+            text_results.append(cached_text)
+            continue
+        try:
+            with span("parse", url=url, bytes=len(html_content)):
+                text_content = extract_snippet(html_content)
+            text_results.append(text_content)
+            page_cache.put_text(url, "snippet", text_content)
+        except Exception as e:
+            print(f"❌ Error parsing HTML: {e}")
+            continue
+    return text_results
+
 def search(keyword: str, n_results: int=2) -> List[str]:
     """Search function that searches keywords and returns text content from web pages"""
-    try:
-        print(f"🔍 Searching for: '{keyword}'")
-        keyword = keyword[:100]
+    with span("search", keyword=keyword[:100], n_results=n_results):
+        try:
+            print(f"🔍 Searching for: '{keyword}'")
+            keyword = keyword[:100]
+            timings = {}
         
-        # Search using Google 
-        search_urls = list(_search(keyword, num_results=n_results * 2, lang="en", unique=True))
-        print(f"📄 Found {len(search_urls)} URLs from search")
+            # Search using Google 
+            stage_start = time.perf_counter()
+            urls = search_urls(keyword, n_results * 2)
+            timings["search"] = time.perf_counter() - stage_start
+            print(f"📄 Found {len(urls)} URLs from search")
         
-        if not search_urls:
-            print("❌ No search URLs found")
-            return []
+            if not urls:
+                print("❌ No search URLs found")
+                return []
         
-        # Fetch HTML content synchronously
-        results = []
-        for url in search_urls[:n_results * 2]:  # Limit to fewer URLs
-            html_content = fetch_url(url)
-            if html_content:
-                results.append(html_content)
-                if len(results) >= n_results:  # Stop when we have enough
-                    break
+            # Fetch HTML content concurrently
+            stage_start = time.perf_counter()
+            results = fetch_urls_concurrently(urls[:n_results * 2], n_results)
+            timings["fetch"] = time.perf_counter() - stage_start
         
-        print(f"📄 Successfully fetched {len(results)} HTML pages")
+            print(f"📄 Successfully fetched {len(results)} HTML pages")
         
-        # Parse HTML and extract text with faster processing
-        text_results = []
-        for html_content in results:
-            try:
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Remove script and style elements for faster processing
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                
-                text_content = soup.get_text()
-                # Clean up the text more efficiently
-                lines = (line.strip() for line in text_content.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                text_content = ' '.join(chunk for chunk in chunks if chunk)
-                
-                if len(text_content) > 300:  # Shorter content for faster processing
-                    text_content = text_content[:300] + "..."
-                text_results.append(text_content)
-            except Exception as e:
-                print(f"❌ Error parsing HTML: {e}")
-                continue
+            # Parse HTML and extract text with faster processing
+            stage_start = time.perf_counter()
+            text_results = extract_snippets(results)
         
-        print(f"📄 Extracted text from {len(text_results)} pages")
-        return text_results[:n_results]
+            timings["parse"] = time.perf_counter() - stage_start
         
-    except Exception as e:
-        print(f"❌ Search error: {e}")
-        return []
+            print(f"📄 Extracted text from {len(text_results)} pages")
+            annotate(urls=len(urls), pages=len(results), snippets=len(text_results))
+            print("⏱️ Search timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+            return text_results[:n_results]
+        
+        except Exception as e:
+            print(f"❌ Search error: {e}")
+            return []
 
 class JarvisAgent():
 
@@ -369,20 +694,41 @@ class JarvisAgent():
         self.max_tokens=max_tokens
         self.llm = llm  # LLM indicates which LLM backend this agent is using.
     
-    def inference(self, message:str) -> str:
+    def messages(self, message:str):
         # Format the messsages first.
         if self.verbose:
             print(f" Agent Role {self.role_description}")
             print(f" Tasks: {self.task_description}")
             print(f" User message: {message}")
-        messages = [
+        return [
             {"role": "system", "content": f"your role：{self.role_description}, please reply in English"},  
             {"role": "user", "content": f"your task: {self.task_description}\n message: {message}"},
         ]
-        return self.llm.generate_response(messages)
 
-# Create a Jarvis instance for the agents
-jarvis_instance = Jarvis()
+    def inference(self, message:str, on_delta=None) -> str:
+        llm = self.llm or get_jarvis()
+        return llm.generate_response(self.messages(message), on_delta=on_delta)
+
+
+_jarvis = None
+_jarvis_lock = threading.Lock()
+
+
+def get_jarvis() -> Jarvis:
+    """Return the Jarvis shared by the agents and the frontends, creating it on first use"""
+    global _jarvis
+    if _jarvis is None:
+        with _jarvis_lock:
+            if _jarvis is None:
+                _jarvis = Jarvis()
+    return _jarvis
+
+
+def __getattr__(name):
+    # jarvis_instance used to be built at import time; keep the name working without the startup cost
+    if name == "jarvis_instance":
+        return get_jarvis()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 question_extraction_agent = JarvisAgent(
     role_description="You are a question extraction agent, your task is to extract the question from the message, and avoid responding things irrelevant to the question",
@@ -390,7 +736,7 @@ question_extraction_agent = JarvisAgent(
                         2. Dont just answer the question
                         3. When generating response, please directly answer the question, no need to say anything else
                     """,
-    llm=jarvis_instance,
+    llm=None,  # the shared get_jarvis() instance
     verbose=False
 )
 
@@ -402,7 +748,7 @@ keyword_extraction_agent = JarvisAgent(
                         4. when generating response, please directly answer the keywords, no need to say anything else, and use comma to separate the keywords
                         5. if the question contains "according to...", then should also add the "according to..." to the keywords
                     """,
-    llm=jarvis_instance,
+    llm=None,  # the shared get_jarvis() instance
     verbose=False
 )
 
@@ -424,49 +770,55 @@ qa_agent = JarvisAgent(
                         Answer format: Short, direct response with source mentioned
                         Your response should be in English
                     """,
-    llm=jarvis_instance,
+    llm=None,  # the shared get_jarvis() instance
     verbose=False
 )
 
 '''      RAG PIPELINE:      '''
 
 def fetch_html(url):
-    """ Fetches clean text from a webpage using requests & BeautifulSoup. """
-    headers = {"User-Agent": "Mozilla/5.0"}
-
+    """ Fetches clean main-content text from a webpage using the page cache & the streaming extractor. """
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        page_cache = get_page_cache()
+        with span("fetch", url=url) as fetch_span:
+            response = page_cache.fetch(url)
+            fetch_span.set(status=response.status_code, bytes=len(response.text or ""), cached=response.from_cache)
 
         if response.status_code != 200:
             print(f"Failed to fetch {url}, Status Code: {response.status_code}")
             return None
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.text, "html.parser")
 
-        # Remove unnecessary elements
-        for script in soup(["script", "style", "header", "footer", "nav", "aside"]):
-            script.extract()
-
-        # Extract visible text
-        text = soup.get_text(separator=" ")
-
-        # Clean up extra spaces
-        clean_text = " ".join(text.split())
-
-        return clean_text[:10000]  # Truncate to avoid excessive length
+        # Reuse the text extracted last time if the page has not changed
+        cached_text = page_cache.get_text(url, "clean_text")
+        if cached_text is not None:
+            return cached_text
+        
+        # Main-content text without scripts, navigation, headers, footers and asides, truncated to avoid
+        # excessive length; parsing stops once 10,000 characters are collected
+        with span("parse", url=url, bytes=len(response.text)):
+            clean_text = extract_text(response.text, 10000)
+        page_cache.put_text(url, "clean_text", clean_text)
+        return clean_text
 
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
     
-def pipeline(question: str) -> str:
-    core_question=question_extraction_agent.inference(question)
-    print(f"core question:{core_question}")
-    search_keywords=keyword_extraction_agent.inference(core_question)
-    print(f"search keywords:{search_keywords}")
-    search_results=search(search_keywords)
-    print(f"search results:{search_results}")
+def cached_answer_for(core_question: str, on_delta=None):
+    """Return a cached answer for the core question (delivered to on_delta as one piece), or None"""
+    cached_answer = get_answer_cache().get(core_question)
+    if cached_answer is not None:
+        print(f"♻️ Answer cache hit: {cached_answer}")
+        if on_delta:
+            on_delta(cached_answer)
+    return cached_answer
+
+def cache_answer(core_question: str, search_results: List[str], answer: str):
+    # Only cache answers backed by a successful search and a successful model call
+    if search_results and not answer.startswith("I apologize"):
+        get_answer_cache().set(core_question, answer)
+
+def build_qa_prompt(core_question: str, search_results: List[str]) -> str:
     MAX_CONTEXT_SIZE = 8000  # Reduced context size for faster processing
     # Ensure the text fits within the model’s limit
     retrieved_text = "\n\n".join(search_results)  # Join all search results into one text block
@@ -492,10 +844,35 @@ def pipeline(question: str) -> str:
     3. If web search is unclear: Use your knowledge and say "Based on my knowledge"
     4. Keep it short and to the point
     """
-    answer=qa_agent.inference(qa_prompt)
-    print(f"answer:{answer}")
-    return answer
+    return qa_prompt
+
+def pipeline(question: str, core_question: str=None, search_keywords: str=None, on_delta=None) -> str:
+    """
+    Answer a question from web search; core_question/search_keywords skip the extraction agents when already known.
+    If on_delta is given the answer is streamed to it as it is generated.
+    """
+    with span("pipeline") as pipeline_span:
+        if core_question is None:
+            with span("extract_question"):
+                core_question=question_extraction_agent.inference(question)
+        print(f"core question:{core_question}")
+        cached_answer = cached_answer_for(core_question, on_delta)
+        pipeline_span.set(cached=cached_answer is not None)
+        if cached_answer is not None:
+            return cached_answer
+        if search_keywords is None:
+            with span("extract_keywords"):
+                search_keywords=keyword_extraction_agent.inference(core_question)
+        print(f"search keywords:{search_keywords}")
+        search_results=search(search_keywords)
+        print(f"search results:{search_results}")
+        qa_prompt = build_qa_prompt(core_question, search_results)
+        with span("qa", chars=len(qa_prompt)):
+            answer=qa_agent.inference(qa_prompt, on_delta=on_delta)
+        print(f"answer:{answer}")
+        cache_answer(core_question, search_results, answer)
+        return answer
 
 if __name__ == "__main__":
-    jarvis = Jarvis()
+    jarvis = get_jarvis()
     jarvis.run()
\ No newline at end of file
@@ -14,13 +14,13 @@ import time
 import os
 import sys
 import datetime
-import base64
 from PIL import Image, ImageTk
-import io
 # import pyautogui  # For screen capture - temporarily disabled
 
 # Import ALL JARVIS functionality from jarvis_mine.py
-from jarvis_mine import Jarvis, JarvisAgent, fetch_html, pipeline, question_extraction_agent, keyword_extraction_agent, qa_agent, search
+from jarvis_mine import get_jarvis, JarvisAgent, fetch_html, pipeline, question_extraction_agent, keyword_extraction_agent, qa_agent, search
+from jarvis_image import prepare_image
+from jarvis_mic import get_microphone
 
 class ModernJarvisVisionGUI:
     def __init__(self):
@@ -36,7 +36,10 @@ class ModernJarvisVisionGUI:
         self.root.after_idle(self.root.attributes, '-topmost', False)
         
         # Initialize JARVIS
-        self.jarvis = Jarvis()
+        self.jarvis = get_jarvis()
+        
+        # One ordered speech queue: responses are spoken sentence by sentence while still streaming in
+        self.speech = self.jarvis.speech_pipeline
         
         # Also have direct access to all functions and agents
         self.question_agent = question_extraction_agent
@@ -45,13 +48,14 @@ class ModernJarvisVisionGUI:
         
         # Speech recognition setup
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.mic = None  # shared jarvis_mic stream, opened on the first voice input
         self.is_listening = False
         self.audio_queue = queue.Queue()
         
         # Image handling
         self.current_image = None
         self.image_data = None
+        self.prepared_image = None  # PreparedImage behind image_data: MIME type and perceptual hash
         
         # Separate queues for different message types
         self.user_message_queue = queue.Queue()  # For user messages (text, voice, image)
@@ -61,6 +65,9 @@ class ModernJarvisVisionGUI:
         self.typing_animation_id = None
         self.is_typing = False
         
+        # True while a streamed JARVIS reply is being rendered into the conversation area
+        self.is_streaming = False
+        
         # Setup GUI
         self.setup_gui()
         
@@ -102,8 +109,9 @@ class ModernJarvisVisionGUI:
         welcome_message = "Good evening, Sir. JARVIS ready for your commands. I can now see images too!"
         self.add_message("JARVIS", welcome_message, "assistant")
         
-        # Speak the welcome message
-        threading.Thread(target=self.jarvis.speak, args=(welcome_message,), daemon=True).start()
+        # Speak the welcome message; it and the other fixed replies are played from the audio cache once rendered
+        self.jarvis.prewarm_speech([welcome_message])
+        self.speech.speak(welcome_message)
     
     def setup_modern_header(self, parent):
         """Setup ultra-modern header with gradient and effects"""
@@ -371,9 +379,9 @@ class ModernJarvisVisionGUI:
                 self.image_preview.configure(image=photo, text="")
                 self.image_preview.image = photo  # Keep a reference
                 
-                # Store original image data
-                with open(file_path, 'rb') as img_file:
-                    self.image_data = base64.b64encode(img_file.read()).decode('utf-8')
+                # Store a downscaled, recompressed copy for the vision request
+                self.prepared_image = prepare_image(file_path)
+                self.image_data = self.prepared_image.data
                 
                 self.animate_status(f"Image loaded: {os.path.basename(file_path)}", "#58a6ff")
                 
@@ -387,30 +395,23 @@ class ModernJarvisVisionGUI:
         try:
             # Try to use mss library first (usually available)
             try:
-                import mss
-                with mss.mss() as sct:
-                    # Capture the entire screen
-                    screenshot = sct.shot()
-                    # Load the screenshot with PIL
-                    screenshot_img = Image.open(screenshot)
-                    # Clean up the temporary file
-                    os.remove(screenshot)
-                    
-                    # Convert PIL image to base64 for AI processing
-                    img_buffer = io.BytesIO()
-                    screenshot_img.save(img_buffer, format='PNG')
-                    img_buffer.seek(0)
-                    self.image_data = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-                    
-                    # Update the image preview
-                    self.current_image = screenshot_img
-                    self.image_preview.configure(text="Screen captured - Desktop")
-                    
-                    # Show the image preview area
-                    self.image_frame.grid()
-                    
-                    # Show status
-                    self.animate_status("Screen captured successfully!", "#58a6ff")
+                from jarvis_capture import capture_monitor
+                # Capture the entire screen straight from the pixel buffer, no temporary file
+                screenshot_img = capture_monitor()
+                
+                # Downscale and recompress for AI processing instead of sending a full-resolution PNG
+                self.prepared_image = prepare_image(screenshot_img)
+                self.image_data = self.prepared_image.data
+                
+                # Update the image preview
+                self.current_image = screenshot_img
+                self.image_preview.configure(text="Screen captured - Desktop")
+                
+                # Show the image preview area
+                self.image_frame.grid()
+                
+                # Show status
+                self.animate_status("Screen captured successfully!", "#58a6ff")
                     
             except ImportError:
                 # Fallback: show a message to install mss
@@ -479,6 +480,28 @@ class ModernJarvisVisionGUI:
         # Auto-scroll to bottom
         self.conversation_text.see(tk.END)
     
+    def begin_streaming_message(self, sender, message_type):
+        """Start a message whose text will arrive in pieces"""
+        self.add_message(sender, "", message_type)
+        # Streamed text goes in front of the blank lines add_message leaves after the message
+        self.conversation_text.mark_set("stream_end", "end-3c")
+        self.conversation_text.mark_gravity("stream_end", tk.RIGHT)
+        self.conversation_text.mark_set("stream_start", "stream_end")
+        self.conversation_text.mark_gravity("stream_start", tk.LEFT)
+        self.is_streaming = True
+    
+    def append_streaming_text(self, text):
+        """Append a text delta to the message being streamed"""
+        self.conversation_text.insert("stream_end", text)
+        self.conversation_text.see(tk.END)
+    
+    def finish_streaming_message(self, text):
+        """Replace the streamed pieces with the final text"""
+        self.conversation_text.delete("stream_start", "stream_end")
+        self.conversation_text.insert("stream_end", text)
+        self.conversation_text.see(tk.END)
+        self.is_streaming = False
+    
     def send_message(self, event=None):
         """Send a message and get AI response"""
         # Get text from the Text widget
@@ -491,6 +514,9 @@ class ModernJarvisVisionGUI:
         # Clear input field
         self.text_input.delete("1.0", tk.END)
         
+        # A new message cuts off whatever JARVIS is still saying
+        self.speech.interrupt()
+        
         # Add user message to conversation
         if message:
             self.add_message("You", message, "user")
@@ -501,7 +527,7 @@ class ModernJarvisVisionGUI:
         self.show_typing_indicator()
         
         # Queue the message for processing
-        self.user_message_queue.put((message, self.image_data))
+        self.user_message_queue.put((message, self.prepared_image if self.image_data else None))
     
     def animate_status(self, text, color):
         """Animate status bar with color transition"""
@@ -524,6 +550,9 @@ class ModernJarvisVisionGUI:
         self.voice_button.configure(bg='#f85149', text="⏹️")
         self.animate_status("Listening...", "#58a6ff")
         
+        # Stop talking so the user can be heard
+        self.speech.interrupt()
+        
         # Start voice recognition in separate thread
         threading.Thread(target=self.listen_for_speech, daemon=True).start()
     
@@ -536,12 +565,16 @@ class ModernJarvisVisionGUI:
     def listen_for_speech(self):
         """Listen for speech input"""
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                self.process_speech(audio)
-        except sr.WaitTimeoutError:
-            self.stop_voice_input()
+            # The stream stays open and calibrated between presses; speech that started just before
+            # the press is still in the pre-roll
+            pressed_at = time.time()
+            if self.mic is None:
+                self.mic = get_microphone()
+            utterance = self.mic.listen(timeout=5, since=pressed_at)
+            if utterance is None:
+                self.stop_voice_input()
+                return
+            self.process_speech(utterance.to_audio_data())
         except Exception as e:
             print(f"Voice recognition error: {e}")
             self.stop_voice_input()
@@ -571,38 +604,52 @@ class ModernJarvisVisionGUI:
         while True:
             try:
                 # Get user message
-                user_message, image_data = self.user_message_queue.get(timeout=1)
+                user_message, image = self.user_message_queue.get(timeout=1)
+                
+                # Stream text deltas to the main thread as they are generated
+                def on_delta(delta):
+                    self.response_queue.put(("delta", delta))
                 
-                # Get AI response with vision support
-                if image_data:
-                    ai_response = self.jarvis.get_ai_response_with_vision(user_message, image_data)
+                # Get AI response with vision support, speaking each sentence as soon as it is complete
+                if image:
+                    # Re-asking about a visually identical image reuses the earlier analysis
+                    generate = lambda feed: self.jarvis.get_ai_response_with_vision(user_message, image.data, on_delta=feed, image_mime=image.mime, image_hash=image.phash, image_thumbnail=image.thumbnail)
                 else:
-                    ai_response = self.jarvis.get_ai_response(user_message)
+                    generate = lambda feed: self.jarvis.get_ai_response(user_message, on_delta=feed)
+                ai_response = self.speech.speak_streamed(generate, on_delta=on_delta, wait=False)
                 
-                # Queue the response
-                self.response_queue.put(ai_response)
+                # Queue the final response
+                self.response_queue.put(("done", ai_response))
                 
             except queue.Empty:
                 continue
             except Exception as e:
                 print(f"Error processing message: {e}")
-                self.response_queue.put(f"I apologize, Sir. There seems to be an error: {e}")
+                self.response_queue.put(("done", f"I apologize, Sir. There seems to be an error: {e}"))
     
     def process_message_queue(self):
         """Process queued messages in main thread"""
         try:
             # Check for AI responses
             while not self.response_queue.empty():
-                response = self.response_queue.get_nowait()
+                kind, response = self.response_queue.get_nowait()
+                
+                if kind == "delta":
+                    # Render tokens as they arrive
+                    if not self.is_streaming:
+                        self.hide_typing_indicator()
+                        self.begin_streaming_message("JARVIS", "assistant")
+                    self.append_streaming_text(response)
+                    continue
                 
                 # Hide typing indicator
                 self.hide_typing_indicator()
                 
-                # Add AI response to conversation
-                self.add_message("JARVIS", response, "assistant")
-                
-                # Speak the response
-                threading.Thread(target=self.jarvis.speak, args=(response,), daemon=True).start()
+                # Commit the final AI response to the conversation
+                if self.is_streaming:
+                    self.finish_streaming_message(response)
+                else:
+                    self.add_message("JARVIS", response, "assistant")
                 
         except queue.Empty:
             pass
@@ -0,0 +1,220 @@
+"""
+JARVIS sessions - isolated conversation state per session ID for multi-user deployments
+Each session owns its own Jarvis (and chat history). Live sessions are kept in memory up to a
+session count and memory cap; idle or least-recently-used ones are spilled to SQLite and
+reloaded transparently the next time their ID is used.
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, asynccontextmanager
+from jarvis_cache import _cache_path
+
+
+class Session:
+    """One conversation: its Jarvis plus locks that keep its requests in order"""
+
+    def __init__(self, session_id, jarvis):
+        self.session_id = session_id
+        self.jarvis = jarvis
+        self.lock = threading.RLock()  # for sync callers
+        self.async_lock = asyncio.Lock()  # for coroutines on the shared event loop
+        self.busy = 0  # requests in flight; busy sessions are never spilled
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.memory_bytes = 0
+
+    def measure(self):
+        """Approximate memory held by the conversation state, as the size of its JSON form"""
+        self.memory_bytes = len(json.dumps(self.jarvis.export_state()).encode("utf-8"))
+        return self.memory_bytes
+
+
+class SessionManager:
+    def __init__(self, jarvis_factory=None, max_sessions=1000, max_memory_bytes=64 * 1024 * 1024,
+                 idle_timeout=30 * 60, path=None):
+        """
+        jarvis_factory: callable returning a fresh Jarvis (or AsyncJarvis) for a new session
+        max_sessions: live sessions kept in memory before least-recently-used ones are spilled
+        max_memory_bytes: global cap on conversation state held in memory across all sessions
+        idle_timeout: seconds without activity after which evict_idle() spills a session
+        """
+        if jarvis_factory is None:
+            from jarvis_mine import Jarvis
+            jarvis_factory = Jarvis
+        self.jarvis_factory = jarvis_factory
+        self.max_sessions = max_sessions
+        self.max_memory_bytes = max_memory_bytes
+        self.idle_timeout = idle_timeout
+
+        self.created = 0
+        self.evictions = 0
+        self.reloads = 0
+
+        self._sessions = OrderedDict()  # session id -> Session, least recently used first
+        self._lock = threading.RLock()
+        self._janitor = None
+        self._db = sqlite3.connect(path or _cache_path("sessions.sqlite3"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                state TEXT,
+                updated_at REAL
+            )
+        """)
+        self._db.commit()
+
+    def acquire(self, session_id) -> Session:
+        """Return the live session for an ID, reloading it from disk or creating it; release() when done"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._restore(session_id)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.busy += 1
+            session.last_access = time.time()
+        return session
+
+    def release(self, session):
+        """Mark a request on the session as finished and re-check the memory cap"""
+        with self._lock:
+            session.busy = max(0, session.busy - 1)
+            session.last_access = time.time()
+            session.measure()
+            self._enforce_limits()
+
+    def get(self, session_id) -> Session:
+        """Touch a session without holding it busy, e.g. when a client connects"""
+        session = self.acquire(session_id)
+        self.release(session)
+        return session
+
+    @contextmanager
+    def use(self, session_id):
+        """with manager.use(session_id) as session: ... keeps the session in memory while in use"""
+        session = self.acquire(session_id)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    @asynccontextmanager
+    async def async_use(self, session_id):
+        """use() for coroutines: reloading and spilling touch SQLite, so they run in a worker thread"""
+        session = await asyncio.to_thread(self.acquire, session_id)
+        try:
+            yield session
+        finally:
+            await asyncio.to_thread(self.release, session)
+
+    def _restore(self, session_id):
+        """Build a session, loading spilled state if there is any (caller holds the lock)"""
+        session = Session(session_id, self.jarvis_factory())
+        row = self._db.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row:
+            try:
+                session.jarvis.load_state(json.loads(row[0]))
+                self.reloads += 1
+                print(f"💾 Reloaded session {session_id}")
+            except ValueError as e:
+                print(f"Session reload error: {e}")
+        else:
+            self.created += 1
+        session.measure()
+        return session
+
+    def _spill(self, session):
+        """Write a session's state to SQLite and drop it from memory (caller holds the lock)"""
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+            (session.session_id, json.dumps(session.jarvis.export_state()), time.time())
+        )
+        self._db.commit()
+        self._sessions.pop(session.session_id, None)
+        self.evictions += 1
+
+    def spill(self, session_id):
+        """Persist a session and free its memory unless a request is still using it"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and not session.busy:
+                self._spill(session)
+
+    def _enforce_limits(self):
+        """Spill least-recently-used idle sessions until both caps hold (caller holds the lock)"""
+        for session in list(self._sessions.values()):
+            if len(self._sessions) <= self.max_sessions and self.memory_bytes() <= self.max_memory_bytes:
+                break
+            if not session.busy:
+                self._spill(session)
+
+    def evict_idle(self):
+        """Spill every session that has been idle for longer than idle_timeout; returns how many"""
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            idle = [session for session in self._sessions.values() if not session.busy and session.last_access < cutoff]
+            for session in idle:
+                self._spill(session)
+        if idle:
+            print(f"💾 Spilled {len(idle)} idle sessions")
+        return len(idle)
+
+    def start_janitor(self, interval=60):
+        """Run evict_idle() every interval seconds on a daemon thread"""
+        if self._janitor is not None:
+            return
+
+        def janitor_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    print(f"Session janitor error: {e}")
+
+        self._janitor = threading.Thread(target=janitor_loop, name="jarvis-session-janitor", daemon=True)
+        self._janitor.start()
+
+    def delete(self, session_id):
+        """Forget a session entirely, in memory and on disk"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.commit()
+
+    def memory_bytes(self):
+        return sum(session.memory_bytes for session in self._sessions.values())
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def metrics(self):
+        with self._lock:
+            spilled = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {
+                "sessions_active": len(self._sessions),
+                "sessions_busy": sum(1 for session in self._sessions.values() if session.busy),
+                "sessions_on_disk": spilled,
+                "memory_bytes": self.memory_bytes(),
+                "max_memory_bytes": self.max_memory_bytes,
+                "created": self.created,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+            }
+
+
+def session_manager_from_env(jarvis_factory=None) -> SessionManager:
+    """Build a SessionManager configured from JARVIS_SESSION_* environment variables"""
+    return SessionManager(
+        jarvis_factory=jarvis_factory,
+        max_sessions=int(os.environ.get("JARVIS_SESSION_MAX", 1000)),
+        max_memory_bytes=int(float(os.environ.get("JARVIS_SESSION_MEMORY_MB", 64)) * 1024 * 1024),
+        idle_timeout=float(os.environ.get("JARVIS_SESSION_IDLE_TIMEOUT", 30 * 60)),
+    )
@@ -1,81 +1,105 @@
 import speech_recognition as sr
-import subprocess
 import threading
 import time
 import os
-import sys
 from datetime import datetime
 import pytz
-import mss
-import base64
-from PIL import Image
-import io
-import openai
-from jarvis_mine import Jarvis, pipeline, search, JarvisAgent, fetch_html
+from jarvis_mine import get_jarvis
+from jarvis_wakeword import WakeWordDetector
+from jarvis_mic import get_microphone
+# Screen capture, image and watch modules (mss, Pillow, NumPy) are imported when first needed
 
 class VoiceJarvis:
     def __init__(self):
         # Initialize JARVIS core with same search capabilities as jarvis_mine.py
-        self.jarvis = Jarvis()
+        self.jarvis = get_jarvis()
+        
+        # JARVIS's one ordered speech queue, spoken sentence by sentence while the rest of a response is still
+        # being generated; the microphone is muted while it plays
+        self.tts = self.jarvis.speech_engine
+        self.speech = self.jarvis.speech_pipeline
         
         # Speech recognition setup
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
-        
-        # Adjust for ambient noise
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
+        # One always-open microphone stream: no per-turn calibration, and pre-roll keeps the first word
+        self.mic = get_microphone()
+        # Talking over JARVIS stops it mid-sentence; opt-in, since without echo cancellation loud speakers
+        # can still make JARVIS interrupt itself
+        if os.environ.get("JARVIS_MIC_BARGE_IN", "0") == "1":
+            self.mic.on_barge_in = self.speech.interrupt
         
         # Voice control state
         self.is_listening = False
         self.wake_word = "hey jarvis"
+        # Local wake word spotting: audio goes to Google only after an on-device match
+        self.wake_word_detector = WakeWordDetector.load()
+        self.confirm_wake_word = os.environ.get("JARVIS_WAKEWORD_CONFIRM", "1") == "1"
         self.screenshot_command = "look at my screen"
+        self.window_command = "look at this window"
+        self.watch_command = "watch my screen"
+        self.stop_watch_command = "stop watching"
+        # Fixed replies, pre-rendered into the audio cache at startup
+        self.spoken_phrases = [
+            "I've stopped watching your screen",
+            "Watching your screen. I'll tell you when something changes",
+            "Capturing the active window and analyzing it",
+            "Taking a screenshot and analyzing it",
+            "Analyzing your screen",
+            "I didn't catch that. Please try again.",
+            "Sorry, there was an error with speech recognition.",
+            "I didn't hear a command. Please try again.",
+            "Sorry, I couldn't take a screenshot",
+            "Sorry, there was an error processing your request",
+            "Sorry, I couldn't process that command",
+            "Goodbye!",
+        ]
+        
+        # Screen watch mode: the vision model is only asked when the screen changed enough
+        self._screen_watcher = None
         
         # Taiwan timezone for context
         self.taiwan_tz = pytz.timezone('Asia/Taipei')
         
         print("🎤 Voice JARVIS initialized!")
         print(f"Wake word: '{self.wake_word}'")
+        if not self.wake_word_detector.enrolled:
+            print("Wake word not enrolled, every chunk goes to Google. Run: python jarvis_wakeword.py record 5")
         print(f"Screenshot command: '{self.screenshot_command}'")
+        print(f"Window command: '{self.window_command}'")
+        print(f"Watch commands: '{self.watch_command}' / '{self.stop_watch_command}'")
         print("Say 'hey jarvis' to activate, then speak your command")
         print("Uses same intelligent search method as jarvis_mine.py")
     
     def speak(self, text):
-        """Speak text using macOS say command"""
-        try:
-            # Clean text for speech
-            clean_text = text.replace('"', '').replace("'", "")
-            subprocess.run(['say', '-v', 'Samantha', clean_text], check=True)
-        except Exception as e:
-            print(f"Speech error: {e}")
+        """Queue text behind anything already being said and wait until it is spoken or interrupted"""
+        self.speech.speak(text)
+        self.speech.wait()
     
-    def take_screenshot(self):
-        """Take a screenshot of the entire screen"""
+    @property
+    def screen_watcher(self):
+        if self._screen_watcher is None:
+            from jarvis_watch import watcher_from_env
+            self._screen_watcher = watcher_from_env(self.jarvis, on_response=self.speech.speak)
+        return self._screen_watcher
+
+    def take_screenshot(self, target="monitor"):
+        """Capture the primary monitor (or the active window with target="window") as an in-memory image"""
         try:
-            with mss.mss() as sct:
-                # Capture the entire screen
-                monitor = sct.monitors[1]  # Primary monitor
-                screenshot = sct.grab(monitor)
-                
-                # Convert to PIL Image
-                img = Image.frombytes('RGB', screenshot.size, screenshot.rgb)
-                
-                # Save temporarily
-                temp_path = "temp_screenshot.png"
-                img.save(temp_path)
-                
-                print("📸 Screenshot captured!")
-                return temp_path
+            from jarvis_capture import capture
+            screenshot = capture(target)
+            print(f"📸 Screenshot captured! ({screenshot.width}x{screenshot.height})")
+            return screenshot
         except Exception as e:
             print(f"Screenshot error: {e}")
             return None
     
-    def analyze_screenshot(self, image_path):
+    def analyze_screenshot(self, screenshot, on_delta=None):
         """Analyze screenshot using JARVIS vision capabilities with same search method"""
         try:
             # Use JARVIS vision to analyze the image
-            with open(image_path, "rb") as image_file:
-                image_data = base64.b64encode(image_file.read()).decode('utf-8')
+            # Downscaled, recompressed copy of the screenshot, encoded in memory
+            from jarvis_image import prepare_image
+            image = prepare_image(screenshot)
             
             # Create prompt for screenshot analysis
             current_time = datetime.now(self.taiwan_tz).strftime("%Y-%m-%d %H:%M:%S")
@@ -88,7 +112,11 @@ class VoiceJarvis:
             """
             
             # Use JARVIS vision response (same method as jarvis_mine.py)
-            response = self.jarvis.get_ai_response_with_vision(prompt, image_data)
+            response = self.jarvis.get_ai_response_with_vision(
+                prompt, image.data, on_delta=on_delta, image_mime=image.mime,
+                # The prompt embeds the current time, so key the cache on the screen alone
+                image_hash=image.phash, image_thumbnail=image.thumbnail, cache_prompt="analyze screenshot"
+            )
             return response
             
         except Exception as e:
@@ -101,19 +129,33 @@ class VoiceJarvis:
         
         while True:
             try:
-                with self.microphone as source:
-                    audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=3)
+                utterance = self.mic.listen(timeout=1)
+                if utterance is None:
+                    # Timeout, continue listening
+                    continue
                 
                 try:
-                    # Recognize speech
-                    text = self.recognizer.recognize_google(audio).lower()
+                    # Cheap on-device check first; only a local match reaches the network
+                    local = self.wake_word_detector.enrolled
+                    if local and not self.wake_word_detector.detect(utterance.samples):
+                        continue
+                    if local and not self.confirm_wake_word:
+                        text = self.wake_word  # trust the local match
+                    else:
+                        # Recognize speech
+                        text = self.recognizer.recognize_google(utterance.to_audio_data()).lower()
                     print(f"🎤 Heard: {text}")
                     
                     # Check for wake word
                     if self.wake_word in text:
                         print("🔔 Wake word detected!")
-                        self.speak("Yes, I'm listening")
-                        self.handle_voice_command()
+                        # "hey jarvis, what's the weather" in one breath: the command is already here
+                        command = text.split(self.wake_word, 1)[1].strip(" ,.")
+                        if command:
+                            self.handle_voice_command(command)
+                        else:
+                            self.speak("Yes, I'm listening")
+                            self.handle_voice_command()
                         
                 except sr.UnknownValueError:
                     # No speech detected, continue listening
@@ -121,27 +163,36 @@ class VoiceJarvis:
                 except sr.RequestError as e:
                     print(f"Speech recognition error: {e}")
                     
-            except sr.WaitTimeoutError:
-                # Timeout, continue listening
-                pass
             except KeyboardInterrupt:
                 print("\n👋 Goodbye!")
                 break
     
-    def handle_voice_command(self):
-        """Handle voice commands after wake word"""
-        print("🎤 Listening for command...")
-        
+    def handle_voice_command(self, command=None):
+        """Handle voice commands after wake word; listens for one unless it was said with the wake word"""
         try:
-            with self.microphone as source:
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
+            if command is None:
+                print("🎤 Listening for command...")
+                utterance = self.mic.listen(timeout=5)
+                if utterance is None:
+                    raise sr.WaitTimeoutError("no command")
             
             try:
-                command = self.recognizer.recognize_google(audio).lower()
+                if command is None:
+                    command = self.recognizer.recognize_google(utterance.to_audio_data()).lower()
                 print(f"🎤 Command: {command}")
                 
-                # Check for screenshot command
-                if self.screenshot_command in command:
+                # Check for screen watch and screenshot commands
+                if self.stop_watch_command in command:
+                    if self._screen_watcher:
+                        self._screen_watcher.stop()
+                    self.speak("I've stopped watching your screen")
+                elif self.watch_command in command:
+                    self.speak("Watching your screen. I'll tell you when something changes")
+                    self.screen_watcher.start()
+                elif self.window_command in command:
+                    self.speak("Capturing the active window and analyzing it")
+                    self.handle_screenshot_command(command, target="window")
+                elif self.screenshot_command in command:
                     self.speak("Taking a screenshot and analyzing it")
                     self.handle_screenshot_command(command)
                 else:
@@ -157,24 +208,15 @@ class VoiceJarvis:
         except sr.WaitTimeoutError:
             self.speak("I didn't hear a command. Please try again.")
     
-    def handle_screenshot_command(self, command):
+    def handle_screenshot_command(self, command, target="monitor"):
         """Handle screenshot and analysis"""
         try:
             # Take screenshot
-            screenshot_path = self.take_screenshot()
-            if screenshot_path:
-                # Analyze the screenshot
+            screenshot = self.take_screenshot(target)
+            if screenshot:
+                # Analyze the screenshot, speaking the analysis as it streams in
                 self.speak("Analyzing your screen")
-                analysis = self.analyze_screenshot(screenshot_path)
-                
-                # Speak the analysis
-                self.speak(analysis)
-                
-                # Clean up temp file
-                try:
-                    os.remove(screenshot_path)
-                except:
-                    pass
+                self.speech.speak_streamed(lambda on_delta: self.analyze_screenshot(screenshot, on_delta=on_delta))
             else:
                 self.speak("Sorry, I couldn't take a screenshot")
                 
@@ -191,10 +233,8 @@ class VoiceJarvis:
             
             # Use the same pipeline method as jarvis_mine.py for intelligent search
             # This will automatically decide whether to search web or use AI knowledge
-            response = self.jarvis.get_ai_response(context_command)
-            
-            # Speak the response
-            self.speak(response)
+            # Each sentence is spoken as soon as it has been generated
+            self.speech.speak_streamed(lambda on_delta: self.jarvis.get_ai_response(context_command, on_delta=on_delta))
             
         except Exception as e:
             print(f"General command error: {e}")
@@ -206,10 +246,15 @@ class VoiceJarvis:
         print("Commands:")
         print(f"- Say '{self.wake_word}' to activate")
         print(f"- Say '{self.screenshot_command}' to analyze screen")
+        print(f"- Say '{self.window_command}' to analyze only the active window")
+        print(f"- Say '{self.watch_command}' to comment on screen changes, '{self.stop_watch_command}' to stop")
         print("- Say any other command for general assistance")
         print("- Uses intelligent search (web + AI knowledge)")
         print("- Press Ctrl+C to exit")
         
+        # Fixed replies are rendered once and then played straight from the audio cache
+        self.tts.prewarm(self.jarvis.spoken_phrases() + self.spoken_phrases)
+        
         # Start listening in a separate thread
         voice_thread = threading.Thread(target=self.listen_for_wake_word, daemon=True)
         voice_thread.start()
@@ -221,6 +266,7 @@ class VoiceJarvis:
         except KeyboardInterrupt:
             print("\n👋 Shutting down Voice JARVIS...")
             self.speak("Goodbye!")
+            print(f"🔊 Audio cache: {self.tts.stats()}")
 
 def main():
     """Main function to run Voice JARVIS"""
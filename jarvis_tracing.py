@@ -0,0 +1,248 @@
+"""
+JARVIS tracing - per-stage spans for the request path with pluggable exporters
+Every stage (classification, extraction, search, page fetches, parsing, model calls, vision, TTS) runs
+inside a span that records its duration and attributes such as url, bytes and tokens. Spans nest through
+contextvars, so they follow threads started with copy_context() as well as asyncio tasks.
+
+Exporters:
+    JsonLinesExporter writes one JSON object per finished span (JARVIS_TRACE_FILE, "1" = cache dir)
+    PrometheusExporter keeps latency histograms and attribute totals for a /metrics endpoint
+
+Usage:
+    python jarvis_tracing.py traces.jsonl     # per-stage latency summary of a trace file
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a cache hit to a slow model answer
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Numeric attributes that are summed per span name and exported as counters
+COUNTED_ATTRIBUTES = ("bytes", "prompt_tokens", "completion_tokens", "chars")
+
+_current_span = contextvars.ContextVar("jarvis_current_span", default=None)
+
+
+class Span:
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.status = "ok"
+        self.duration = None
+        self._start = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, **counts):
+        """Add to numeric attributes, e.g. tokens of several model calls made within one span"""
+        for key, value in counts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def finish(self, error=None):
+        self.duration = self.elapsed()
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class JsonLinesExporter:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as trace_file:
+                trace_file.write(line + "\n")
+
+
+class PrometheusExporter:
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="jarvis"):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._histograms = {}  # span name -> [bucket counts..., +Inf count], sum
+        self._errors = {}
+        self._totals = {}  # (span name, attribute) -> sum
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            counts, total = self._histograms.get(span.name, ([0] * (len(self.buckets) + 1), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if span.duration <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            self._histograms[span.name] = (counts, total + span.duration)
+            if span.status == "error":
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+            for attribute in COUNTED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    key = (span.name, attribute)
+                    self._totals[key] = self._totals.get(key, 0) + value
+
+    def render(self):
+        """Metrics in the Prometheus text exposition format"""
+        name = f"{self.prefix}_span_duration_seconds"
+        lines = [f"# HELP {name} Duration of JARVIS request stages", f"# TYPE {name} histogram"]
+        with self._lock:
+            for span_name, (counts, total) in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{name}_bucket{{span="{span_name}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{span="{span_name}",le="+Inf"}} {counts[-1]}')
+                lines.append(f'{name}_sum{{span="{span_name}"}} {total:.6f}')
+                lines.append(f'{name}_count{{span="{span_name}"}} {counts[-1]}')
+
+            errors = f"{self.prefix}_span_errors_total"
+            lines += [f"# HELP {errors} Stages that raised an exception", f"# TYPE {errors} counter"]
+            for span_name, count in sorted(self._errors.items()):
+                lines.append(f'{errors}{{span="{span_name}"}} {count}')
+
+            totals = f"{self.prefix}_span_attribute_total"
+            lines += [f"# HELP {totals} Bytes, tokens and characters handled per stage", f"# TYPE {totals} counter"]
+            for (span_name, attribute), value in sorted(self._totals.items()):
+                lines.append(f'{totals}{{span="{span_name}",attribute="{attribute}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    def __init__(self, exporters=None, enabled=True):
+        self.exporters = list(exporters or [])
+        self.enabled = enabled
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block as a child of the current span"""
+        if not self.enabled:
+            yield Span(name, attributes=attributes)
+            return
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish(error)
+            self.export(span)
+
+    def export(self, span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"Trace export error: {e}")
+
+    @property
+    def prometheus(self):
+        for exporter in self.exporters:
+            if isinstance(exporter, PrometheusExporter):
+                return exporter
+        return None
+
+
+def current_span():
+    return _current_span.get()
+
+
+def annotate(**attributes):
+    """Set attributes on the innermost running span, if any"""
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+def count(**counts):
+    """Add to numeric attributes of the innermost running span, if any"""
+    span = _current_span.get()
+    if span is not None:
+        span.add(**counts)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Return the process-wide tracer, configured on first use:
+    JARVIS_TRACING=0 turns spans off, JARVIS_TRACE_FILE adds a JSON-lines exporter ("1" for the cache dir)
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                exporters = [PrometheusExporter()]
+                trace_file = os.environ.get("JARVIS_TRACE_FILE")
+                if trace_file:
+                    from jarvis_cache import CACHE_DIR
+                    exporters.append(JsonLinesExporter(os.path.join(CACHE_DIR, "traces.jsonl") if trace_file == "1" else trace_file))
+                _tracer = Tracer(exporters, enabled=os.environ.get("JARVIS_TRACING", "1") == "1")
+    return _tracer
+
+
+def span(name, **attributes):
+    """Context manager timing a stage with the process-wide tracer"""
+    return get_tracer().span(name, **attributes)
+
+
+def summarize(path):
+    """Per-span count and p50/p95 latency of a JSON-lines trace file"""
+    durations = {}
+    with open(path, encoding="utf-8") as trace_file:
+        for line in trace_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            durations.setdefault(record["name"], []).append(record["duration_ms"])
+    print(f"  {'span':<24} {'n':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        p50 = values[len(values) // 2]
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"  {name:<24} {len(values):>6} {p50:9.1f} {p95:9.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        summarize(sys.argv[1])
+    else:
+        print(__doc__)
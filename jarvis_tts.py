@@ -0,0 +1,392 @@
+"""
+JARVIS speech pipeline - start speaking the first sentence while the rest is still being generated
+Streamed text is split into sentences on the producer side and spoken in order by one playback worker.
+Speech engines wrap the platform TTS (macOS say, espeak on Linux, pyttsx3) and can be stopped mid-sentence;
+recurring phrases are played from a disk cache of pre-rendered audio.
+"""
+
+import os
+import re
+import sys
+import queue
+import shutil
+import threading
+import tempfile
+import subprocess
+from abc import ABC, abstractmethod
+from jarvis_tracing import annotate
+
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "u.s"}
+# Abbreviations only when a number follows ("No. 5"), otherwise ordinary words ("The answer is no.")
+NUMBER_ABBREVIATIONS = {"no", "nr", "vol"}
+
+SENTENCE_BOUNDARY = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+
+
+def split_sentences(text):
+    """Split text into (complete sentences, unfinished remainder)"""
+    sentences = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        candidate = text[start:match.end()].strip()
+        last_word = candidate.rstrip(".!?\"')] ").split(" ")[-1].lower() if candidate else ""
+        if match.group().startswith(".") and last_word in ABBREVIATIONS:
+            continue
+        if match.group().startswith(".") and last_word in NUMBER_ABBREVIATIONS:
+            if match.end() == len(text):
+                break  # the next delta decides
+            if text[match.end()].isdigit():
+                continue
+        if candidate:
+            sentences.append(candidate)
+        start = match.end()
+    return sentences, text[start:]
+
+
+def audio_player():
+    """Command line that plays an audio file, or None when no player is installed"""
+    if sys.platform == "darwin":
+        return ["afplay"]
+    if shutil.which("paplay"):
+        return ["paplay"]
+    if shutil.which("aplay"):
+        return ["aplay", "-q"]
+    if shutil.which("ffplay"):
+        return ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"]
+    return None
+
+
+class SpeechEngine:
+    """Text-only fallback: prints instead of speaking. Subclasses speak() blocking until done and stop() from any thread"""
+    name = "print"
+    extension = None  # audio file type render() writes; None when the engine cannot render to a file
+    timeout = 60
+
+    def __init__(self, voice=None, rate=None):
+        self.voice = voice
+        self.rate = rate
+        self._process = None
+        self._lock = threading.Lock()
+
+    def speak(self, text):
+        print(f"🔇 (no TTS engine) {text}")
+
+    def render(self, text, path):
+        """Synthesize text into an audio file instead of speaking it; returns path, or None if the engine cannot"""
+        return None
+
+    def play_file(self, path):
+        self._run(audio_player() + [path])
+
+    def prewarm(self, phrases):
+        """Prepare phrases so they play without synthesis delay; only caching engines do anything"""
+        return None
+
+    def stats(self):
+        return {}
+
+    def _run(self, command):
+        """Run a command to completion; stop() terminates it"""
+        with self._lock:
+            self._process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            process = self._process
+        try:
+            process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        finally:
+            with self._lock:
+                self._process = None
+
+    def stop(self):
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                self._process.terminate()
+
+
+class CommandEngine(SpeechEngine, ABC):
+    """Runs a TTS command line per sentence"""
+    binary = None
+
+    @classmethod
+    def available(cls):
+        return shutil.which(cls.binary) is not None
+
+    @abstractmethod
+    def command(self, text, path=None):
+        """Command that speaks text, or writes it to path"""
+
+    def speak(self, text):
+        self._run(self.command(text))
+
+    def render(self, text, path):
+        subprocess.run(self.command(text, path), check=True, timeout=self.timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return path
+
+
+class SayEngine(CommandEngine):
+    """macOS native TTS"""
+    name = "say"
+    binary = "say"
+    extension = "aiff"
+
+    def command(self, text, path=None):
+        output = ["-o", path] if path else []
+        return ["say", "-v", self.voice or "Daniel", "-r", str(self.rate or 200)] + output + [text]
+
+
+class EspeakEngine(CommandEngine):
+    """espeak-ng or espeak, works on headless Linux"""
+    name = "espeak"
+    binary = "espeak-ng" if shutil.which("espeak-ng") else "espeak"
+    extension = "wav"
+
+    def command(self, text, path=None):
+        output = ["-w", path] if path else []
+        return [self.binary, "-v", self.voice or "en-us", "-s", str(self.rate or 175)] + output + [text]
+
+
+class Pyttsx3Engine(SpeechEngine):
+    """pyttsx3 (SAPI5, NSSpeechSynthesizer or espeak), created in the playback thread that uses it"""
+    name = "pyttsx3"
+
+    def __init__(self, voice=None, rate=None):
+        super().__init__(voice, rate)
+        self._engine = None
+
+    @classmethod
+    def available(cls):
+        try:
+            import pyttsx3  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def speak(self, text):
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            if self.rate:
+                self._engine.setProperty("rate", self.rate)
+            if self.voice:
+                self._engine.setProperty("voice", self.voice)
+        self._engine.say(text)
+        self._engine.runAndWait()
+
+    def stop(self):
+        super().stop()
+        if self._engine is not None:
+            self._engine.stop()
+
+
+class CachedSpeechEngine(SpeechEngine):
+    """
+    Plays recurring phrases from pre-rendered audio files, so they start without synthesis delay.
+    Other text is spoken directly; once it has come up recur_after times it is rendered in the background.
+    """
+
+    def __init__(self, engine, cache, recur_after=2, max_chars=160):
+        super().__init__(engine.voice, engine.rate)
+        self.engine = engine
+        self.cache = cache
+        self.name = engine.name
+        self.recur_after = recur_after
+        self.max_chars = max_chars
+        self.enabled = engine.extension is not None and audio_player() is not None
+        self._seen = {}
+        self._rendering = set()
+
+    def key(self, text):
+        return self.engine.name, self.engine.voice, self.engine.rate, text
+
+    def speak(self, text):
+        if not self.enabled:
+            return self.engine.speak(text)
+        path = self.cache.get(*self.key(text))
+        annotate(cached=path is not None)
+        if path:
+            return self.engine.play_file(path)
+        self.engine.speak(text)
+        with self._lock:
+            if len(self._seen) > 1000:
+                self._seen.clear()
+            self._seen[text] = self._seen.get(text, 0) + 1
+            recurring = self._seen[text] >= self.recur_after
+        if recurring and len(text) <= self.max_chars:
+            self.prewarm([text])
+
+    def render_to_cache(self, text):
+        """Render one text into the cache unless it is already there; returns True if it was rendered"""
+        with self._lock:
+            if text in self._rendering or self.cache.contains(*self.key(text)):
+                return False
+            self._rendering.add(text)
+        try:
+            handle, path = tempfile.mkstemp(suffix="." + self.engine.extension)
+            os.close(handle)
+            try:
+                if self.engine.render(text, path) is None:
+                    return False
+                self.cache.put(*self.key(text), path)
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+            return True
+        except Exception as e:
+            print(f"Audio render error: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._rendering.discard(text)
+
+    def prewarm(self, phrases):
+        """Render phrases (and each of their sentences, as the speech queue splits them) in the background"""
+        if not self.enabled:
+            return None
+        texts = []
+        for phrase in phrases:
+            sentences, remainder = split_sentences(phrase + " ")
+            for text in [phrase.strip()] + sentences + [remainder.strip()]:
+                if text and text not in texts:
+                    texts.append(text)
+
+        def render_all():
+            rendered = sum(self.render_to_cache(text) for text in texts)
+            if rendered:
+                print(f"🔊 Pre-rendered {rendered} phrases ({self.cache.stats()['entries']} cached)")
+
+        thread = threading.Thread(target=render_all, name="jarvis-tts-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.engine.stop()
+
+    def stats(self):
+        return self.cache.stats()
+
+
+ENGINES = {engine.name: engine for engine in (SayEngine, EspeakEngine, Pyttsx3Engine, SpeechEngine)}
+
+
+def create_speech_engine(name=None, rate=None, voices=None, cache=True) -> SpeechEngine:
+    """
+    Speech engine chosen by name or JARVIS_TTS_ENGINE (say, espeak, pyttsx3, print), else the first available:
+    say on macOS, then espeak, then pyttsx3, then printing only.
+    voices: preferred voice per engine name, e.g. {"say": "Daniel"}; JARVIS_TTS_VOICE overrides it
+    cache: play recurring phrases from pre-rendered audio (disabled with JARVIS_AUDIO_CACHE=0)
+    """
+    name = name or os.environ.get("JARVIS_TTS_ENGINE")
+    if name:
+        engine_class = ENGINES[name]
+    elif sys.platform == "darwin" and SayEngine.available():
+        engine_class = SayEngine
+    elif EspeakEngine.available():
+        engine_class = EspeakEngine
+    elif Pyttsx3Engine.available():
+        engine_class = Pyttsx3Engine
+    else:
+        engine_class = SpeechEngine
+    voice = os.environ.get("JARVIS_TTS_VOICE") or (voices or {}).get(engine_class.name)
+    print(f"🔊 Speech engine: {engine_class.name}")
+    engine = engine_class(voice=voice, rate=rate)
+    if cache and os.environ.get("JARVIS_AUDIO_CACHE", "1") == "1":
+        from jarvis_cache import get_audio_cache
+        engine = CachedSpeechEngine(engine, get_audio_cache())
+    return engine
+
+
+class SpeechPipeline:
+    def __init__(self, speak_fn, stop_fn=None):
+        """
+        speak_fn: blocking function that speaks one piece of text, called only from the playback worker
+        stop_fn: cuts off the sentence being spoken, e.g. SpeechEngine.stop; used by interrupt()
+        """
+        self.speak_fn = speak_fn
+        self.stop_fn = stop_fn
+        self.interruptions = 0
+        self._generation = 0  # bumped by interrupt(); text queued for an older generation is dropped
+        self._buffer = ""
+        self._buffer_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._playback_loop, daemon=True)
+        self._worker.start()
+
+    def feed(self, text, generation=None):
+        """Add streamed text; every sentence completed by it is queued for playback immediately"""
+        with self._buffer_lock:
+            if generation is not None and generation != self._generation:
+                return
+            sentences, self._buffer = split_sentences(self._buffer + text)
+            for sentence in sentences:
+                self._queue.put((self._generation, sentence))
+
+    def flush(self, generation=None):
+        """Queue whatever is left in the buffer, e.g. a final sentence without punctuation"""
+        with self._buffer_lock:
+            if generation is not None and generation != self._generation:
+                return
+            remainder, self._buffer = self._buffer.strip(), ""
+            if remainder:
+                self._queue.put((self._generation, remainder))
+
+    def speak(self, text):
+        """Queue a complete text, still sentence by sentence"""
+        self.feed(text)
+        self.flush()
+
+    def speak_streamed(self, generate, on_delta=None, wait=True):
+        """
+        Call generate(on_delta) and speak its text sentence by sentence as it streams.
+        If nothing was streamed (errors, cached replies) the returned text is spoken instead.
+        on_delta: optional extra consumer of the deltas, e.g. a GUI
+        """
+        streamed = []
+        # After an interrupt() the rest of this response is still generated (and shown) but not spoken
+        generation = self._generation
+
+        def feed(delta):
+            streamed.append(delta)
+            self.feed(delta, generation)
+            if on_delta:
+                on_delta(delta)
+
+        response = generate(feed)
+        if not streamed and response:
+            self.feed(response, generation)
+        self.flush(generation)
+        if wait:
+            self.wait()
+        return response
+
+    def interrupt(self):
+        """Stop talking now: drop queued sentences and cut off the one being spoken (barge-in, new message)"""
+        with self._buffer_lock:
+            self._generation += 1
+            self._buffer = ""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        self.interruptions += 1
+        if self.stop_fn:
+            self.stop_fn()
+
+    def wait(self):
+        """Block until everything queued so far has been spoken"""
+        self._queue.join()
+
+    def _playback_loop(self):
+        while True:
+            generation, sentence = self._queue.get()
+            try:
+                if generation == self._generation:
+                    self.speak_fn(sentence)
+            except Exception as e:
+                print(f"Speech error: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,303 @@
+"""
+JARVIS wake word - on-device "hey jarvis" spotting so audio only goes to the cloud after a local hit
+An energy VAD drops silent chunks, then log-mel features of the voiced audio are matched against a
+few enrolled recordings with subsequence DTW (the wake word may be followed by the command).
+
+Usage:
+    python jarvis_wakeword.py record 5                       # record 5 enrollment clips of "hey jarvis"
+    python jarvis_wakeword.py enroll clip1.wav clip2.wav ...  # enroll from existing 8/16/24/32-bit WAV files
+    python jarvis_wakeword.py evaluate positives/ negatives/  # detection rate and false triggers on WAV clips
+"""
+
+import os
+import sys
+import glob
+import time
+import wave
+import threading
+import numpy as np
+from jarvis_cache import CACHE_DIR
+
+SAMPLE_RATE = 16000
+FRAME = 400  # 25 ms
+HOP = 160  # 10 ms
+N_FFT = 512
+N_MELS = 26
+
+MODEL_PATH = os.path.join(CACHE_DIR, "wakeword.npz")
+CLIPS_DIR = os.path.join(CACHE_DIR, "wakeword_clips")
+
+
+def pcm_to_float(data: bytes, sample_width=2) -> np.ndarray:
+    """Little-endian PCM bytes (8, 16, 24 or 32 bit) to float32 samples in [-1, 1]"""
+    if sample_width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if sample_width == 3:
+        # Widen every 3-byte sample to an int32 by putting it in the top bytes, the sign comes along
+        padded = np.zeros((len(data) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = np.frombuffer(data, dtype=np.uint8)[:len(padded) * 3].reshape(-1, 3)
+        return padded.view("<i4").ravel().astype(np.float32) / np.iinfo(np.int32).max
+    if sample_width not in (2, 4):
+        raise ValueError(f"Unsupported PCM sample width: {sample_width} bytes (8, 16, 24 or 32 bit expected)")
+    dtype = {2: np.int16, 4: np.int32}[sample_width]
+    return np.frombuffer(data, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+
+
+def read_wav(path) -> np.ndarray:
+    """Read a WAV file as mono float32 samples at SAMPLE_RATE"""
+    with wave.open(path, "rb") as wav_file:
+        samples = pcm_to_float(wav_file.readframes(wav_file.getnframes()), wav_file.getsampwidth())
+        channels, rate = wav_file.getnchannels(), wav_file.getframerate()
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+def write_wav(path, samples):
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def _frames(samples):
+    if len(samples) < FRAME:
+        samples = np.pad(samples, (0, FRAME - len(samples)))
+    count = 1 + (len(samples) - FRAME) // HOP
+    return samples[np.arange(FRAME)[None, :] + HOP * np.arange(count)[:, None]]
+
+
+def frame_energy(samples) -> np.ndarray:
+    """RMS energy of every 25 ms frame"""
+    return np.sqrt(np.mean(_frames(samples) ** 2, axis=1))
+
+
+def voiced_frames(samples, min_rms=0.01, floor_ratio=3.0):
+    """
+    Energy VAD: (segment, mask) for the span from the first to the last frame clearly above the noise
+    floor, where mask marks the voiced frames of the segment; (None, None) for silence.
+    The floor is the 20th percentile of frame energies, so the loudest speech never raises it.
+    """
+    energies = frame_energy(samples)
+    threshold = max(min_rms, np.percentile(energies, 20) * floor_ratio)
+    voiced = np.flatnonzero(energies > threshold)
+    if len(voiced) == 0:
+        return None, None
+    return samples[voiced[0] * HOP:voiced[-1] * HOP + FRAME], energies[voiced[0]:voiced[-1] + 1] > threshold
+
+
+def voiced_segment(samples, min_rms=0.01, floor_ratio=3.0):
+    """The voiced span of voiced_frames(), or None"""
+    return voiced_frames(samples, min_rms, floor_ratio)[0]
+
+
+def _mel_filterbank():
+    to_mel = lambda hz: 2595 * np.log10(1 + hz / 700)
+    to_hz = lambda mel: 700 * (10 ** (mel / 2595) - 1)
+    points = to_hz(np.linspace(to_mel(0), to_mel(SAMPLE_RATE / 2), N_MELS + 2))
+    bins = np.floor((N_FFT + 1) * points / SAMPLE_RATE).astype(int)
+    filterbank = np.zeros((N_MELS, N_FFT // 2 + 1), dtype=np.float32)
+    for index in range(1, N_MELS + 1):
+        left, center, right = bins[index - 1], bins[index], bins[index + 1]
+        filterbank[index - 1, left:center] = (np.arange(left, center) - left) / max(center - left, 1)
+        filterbank[index - 1, center:right] = (right - np.arange(center, right)) / max(right - center, 1)
+    return filterbank
+
+
+MEL_FILTERBANK = _mel_filterbank()
+WINDOW = np.hamming(FRAME).astype(np.float32)
+
+
+def mel_features(samples) -> np.ndarray:
+    """(frames, N_MELS) log-mel features, one frame per frame_energy() frame"""
+    emphasized = np.append(samples[:1], samples[1:] - 0.97 * samples[:-1])
+    power = np.abs(np.fft.rfft(_frames(emphasized) * WINDOW, N_FFT)) ** 2 / N_FFT
+    return np.log(power @ MEL_FILTERBANK.T + 1e-10)
+
+
+def normalize(features, voiced=None, mean_frames=None) -> np.ndarray:
+    """
+    Remove the mean of the voiced frames (only the first mean_frames of them if given) so loudness and
+    mic colour cancel out; pauses and a command after the wake word don't shift the features that way
+    """
+    reference = features[voiced] if voiced is not None and voiced.any() else features
+    if mean_frames:
+        reference = reference[:mean_frames]
+    return features - reference.mean(axis=0)
+
+
+def log_mel(samples, voiced=None, mean_frames=None) -> np.ndarray:
+    """(frames, N_MELS) log-mel features normalized over the voiced frames"""
+    return normalize(mel_features(samples), voiced, mean_frames)
+
+
+def subsequence_dtw(template, features) -> float:
+    """
+    Average per-frame distance of the best alignment of the whole template to any part of features.
+    Each template frame advances 0-2 feature frames, so every path is exactly len(template) steps
+    and a row of the DP can be computed at once.
+    """
+    cost = np.sqrt(((template[:, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+    row = cost[0].copy()
+    for index in range(1, len(template)):
+        best = row.copy()
+        best[1:] = np.minimum(best[1:], row[:-1])
+        best[2:] = np.minimum(best[2:], row[:-2])
+        row = cost[index] + best
+    return float(row.min() / len(template))
+
+
+class WakeWordDetector:
+    def __init__(self, templates=None, threshold=None, path=MODEL_PATH):
+        """
+        templates: log-mel feature arrays of enrolled wake word recordings
+        threshold: maximum DTW distance for a detection; derived from the templates when enrolling
+        """
+        self.templates = templates or []
+        self.threshold = threshold
+        self.path = path
+
+        self.chunks = 0
+        self.silent = 0
+        self.detections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enrolled(self):
+        return bool(self.templates) and self.threshold is not None
+
+    def enroll(self, clips, margin=1.25):
+        """
+        Build templates from a few recordings of the wake word (float samples).
+        The threshold is the largest distance between two enrollment clips, plus a margin.
+        """
+        segments = [voiced_frames(clip) for clip in clips]
+        self.templates = [log_mel(segment, voiced) for segment, voiced in segments if segment is not None]
+        if len(self.templates) < 2:
+            raise ValueError("Need at least 2 enrollment clips with audible speech")
+        distances = [subsequence_dtw(first, second)
+                     for i, first in enumerate(self.templates)
+                     for j, second in enumerate(self.templates) if i != j]
+        self.threshold = max(distances) * margin
+        print(f"🎙️ Enrolled {len(self.templates)} templates, threshold {self.threshold:.2f}")
+
+    def distance(self, samples):
+        """Best DTW distance of the voiced part of the audio to any template, or None for silence"""
+        segment, voiced = voiced_frames(samples)
+        if segment is None:
+            return None
+        # The wake word comes first, so each template is compared with features normalized over a wake
+        # word's worth of voiced frames rather than the whole utterance including the command
+        features = mel_features(segment)
+        return min(subsequence_dtw(template, normalize(features, voiced, len(template))) for template in self.templates)
+
+    def detect(self, samples) -> bool:
+        with self._lock:
+            self.chunks += 1
+        distance = self.distance(samples)
+        if distance is None:
+            with self._lock:
+                self.silent += 1
+            return False
+        detected = distance <= self.threshold
+        if detected:
+            with self._lock:
+                self.detections += 1
+            print(f"🔔 Local wake word match (distance {distance:.2f} <= {self.threshold:.2f})")
+        return detected
+
+    def detect_audio(self, audio) -> bool:
+        """detect() for a speech_recognition AudioData"""
+        return self.detect(pcm_to_float(audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)))
+
+    def save(self, path=None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {f"template_{index}": template for index, template in enumerate(self.templates)}
+        np.savez(path, threshold=np.array(self.threshold), **arrays)
+        print(f"💾 Wake word model saved to {path}")
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        """Load an enrolled model, or return an empty (not enrolled) detector if there is none"""
+        if not os.path.exists(path):
+            return cls(path=path)
+        with np.load(path) as data:
+            templates = [data[key] for key in sorted(data.files, key=lambda name: (len(name), name)) if key.startswith("template_")]
+            return cls(templates, float(data["threshold"]), path=path)
+
+    def stats(self):
+        return {"chunks": self.chunks, "silent": self.silent, "detections": self.detections}
+
+
+def evaluate(detector, positive_dir, negative_dir):
+    """Detection rate on clips containing the wake word and false triggers on clips without it"""
+    def run(directory):
+        results = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+            samples = read_wav(path)
+            start = time.perf_counter()
+            detected = detector.detect(samples)
+            results.append((path, detected, time.perf_counter() - start, len(samples) / SAMPLE_RATE))
+        return results
+
+    positives, negatives = run(positive_dir), run(negative_dir)
+    for path, detected, _, _ in positives:
+        if not detected:
+            print(f"  missed: {os.path.basename(path)}")
+    for path, detected, _, _ in negatives:
+        if detected:
+            print(f"  false trigger: {os.path.basename(path)}")
+
+    hits = sum(detected for _, detected, _, _ in positives)
+    false_triggers = sum(detected for _, detected, _, _ in negatives)
+    negative_hours = sum(seconds for _, _, _, seconds in negatives) / 3600
+    timings = [elapsed for _, _, elapsed, _ in positives + negatives]
+    if positives:
+        print(f"🎯 Detection rate: {hits}/{len(positives)} ({hits / len(positives):.1%})")
+    if negatives:
+        print(f"🚫 False triggers: {false_triggers}/{len(negatives)} clips ({false_triggers / max(negative_hours, 1e-9):.1f} per hour of audio)")
+    if timings:
+        print(f"⏱️ Mean detection time: {np.mean(timings) * 1000:.1f} ms per clip")
+    return {
+        "positives": len(positives),
+        "detected": hits,
+        "negatives": len(negatives),
+        "false_triggers": false_triggers,
+    }
+
+
+def record_clips(count, seconds=2.0):
+    """Record enrollment clips from the default microphone"""
+    import speech_recognition as sr
+    os.makedirs(CLIPS_DIR, exist_ok=True)
+    recognizer = sr.Recognizer()
+    paths = []
+    with sr.Microphone(sample_rate=SAMPLE_RATE) as source:
+        recognizer.adjust_for_ambient_noise(source, duration=1)
+        for index in range(count):
+            input(f"Press Enter and say 'hey jarvis' ({index + 1}/{count})")
+            audio = recognizer.record(source, duration=seconds)
+            path = os.path.join(CLIPS_DIR, f"enroll_{int(time.time())}_{index}.wav")
+            write_wav(path, pcm_to_float(audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)))
+            paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "record":
+        detector = WakeWordDetector()
+        detector.enroll([read_wav(path) for path in record_clips(int(sys.argv[2]))])
+        detector.save()
+    elif len(sys.argv) > 3 and sys.argv[1] == "enroll":
+        detector = WakeWordDetector()
+        detector.enroll([read_wav(path) for path in sys.argv[2:]])
+        detector.save()
+    elif len(sys.argv) > 3 and sys.argv[1] == "evaluate":
+        evaluate(WakeWordDetector.load(), sys.argv[2], sys.argv[3])
+    else:
+        print(__doc__)
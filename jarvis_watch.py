@@ -0,0 +1,151 @@
+"""
+JARVIS screen watch - keep an eye on the screen and only ask the vision model when it really changed
+Every interval the screen is captured and shrunk to a small grayscale array; the share of pixels that
+differ from the last analyzed frame gates the expensive vision call. Analyses stay out of the chat history.
+
+Usage:
+    python jarvis_watch.py              # watch the primary monitor and print what JARVIS notices
+    python jarvis_watch.py window       # watch only the active window
+"""
+
+import os
+import sys
+import time
+import threading
+import numpy as np
+from PIL import Image
+from jarvis_capture import capture
+from jarvis_image import prepare_image, gray_thumbnail, changed_share
+
+WATCH_PROMPT = ("This is my screen, which just changed. In one or two sentences, tell me what changed "
+                "and point out anything that needs my attention.")
+
+
+class ScreenWatcher:
+    def __init__(self, jarvis, on_response=None, interval=2.0, threshold=0.005, cooldown=30.0,
+                 target="monitor", prompt=WATCH_PROMPT, pixel_delta=16, frame_size=(256, 144)):
+        """
+        on_response: called with every analysis, e.g. a speech pipeline's speak()
+        interval: seconds between screen samples
+        threshold: share of downsampled pixels (0-1) that must change before the model is asked
+        cooldown: minimum seconds between two model calls, however much the screen changes
+        pixel_delta: grayscale difference (0-255) for a pixel to count as changed, ignores compression noise
+        frame_size: size of the grayscale frame the difference is computed on; at 256x144 replacing small text
+            across a 1920x1080 screen changes about 1.5% of the pixels (larger fonts up to 10%), a toast 1.5%
+        """
+        self.jarvis = jarvis
+        self.on_response = on_response or (lambda response: print(f"👁️ JARVIS: {response}"))
+        self.interval = interval
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.target = target
+        self.prompt = prompt
+        self.pixel_delta = pixel_delta
+        self.frame_size = frame_size
+
+        self.samples = 0
+        self.analyses = 0
+        self.below_threshold = 0
+        self.in_cooldown = 0
+
+        self._reference = None  # frame of the last analyzed screen
+        self._last_analysis = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def frame(self, image: Image.Image) -> np.ndarray:
+        """Downsample a screenshot to a small grayscale array"""
+        return gray_thumbnail(image, self.frame_size)
+
+    def change(self, frame: np.ndarray) -> float:
+        """Share of pixels that differ noticeably from the last analyzed frame"""
+        if self._reference is None:
+            return 1.0
+        return changed_share(frame, self._reference, self.pixel_delta)
+
+    def check(self, image: Image.Image=None):
+        """Take one sample; returns the analysis if the model was asked, otherwise None"""
+        image = image if image is not None else capture(self.target)
+        frame = self.frame(image)
+        change = self.change(frame)
+        self.samples += 1
+
+        if change < self.threshold:
+            self.below_threshold += 1
+            return None
+        if time.time() - self._last_analysis < self.cooldown:
+            # Keep the old reference so the change is still noticed once the cooldown is over
+            self.in_cooldown += 1
+            return None
+
+        print(f"👁️ Screen changed ({change:.1%} of pixels), analyzing")
+        self._reference = frame
+        self._last_analysis = time.time()
+        self.analyses += 1
+        prepared = prepare_image(image)
+        # Unprompted analyses are not part of the conversation, so they stay out of the chat history
+        response = self.jarvis.analyze_image(
+            self.prompt, prepared.data, image_mime=prepared.mime, image_hash=prepared.phash, image_thumbnail=prepared.thumbnail
+        )
+        self.on_response(response)
+        return response
+
+    def _watch_loop(self):
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Screen watch error: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.time() - started)))
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._reference = None
+        self._thread = threading.Thread(target=self._watch_loop, name="jarvis-screen-watch", daemon=True)
+        self._thread.start()
+        print(f"👁️ Watching the screen every {self.interval}s (threshold {self.threshold:.1%}, cooldown {self.cooldown}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        print(f"👁️ Stopped watching: {self.stats()}")
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "analyses": self.analyses,
+            "below_threshold": self.below_threshold,
+            "in_cooldown": self.in_cooldown,
+        }
+
+
+def watcher_from_env(jarvis, on_response=None, target="monitor") -> ScreenWatcher:
+    """Build a ScreenWatcher configured from JARVIS_WATCH_* environment variables"""
+    return ScreenWatcher(
+        jarvis,
+        on_response=on_response,
+        interval=float(os.environ.get("JARVIS_WATCH_INTERVAL", 2.0)),
+        threshold=float(os.environ.get("JARVIS_WATCH_THRESHOLD", 0.005)),
+        cooldown=float(os.environ.get("JARVIS_WATCH_COOLDOWN", 30.0)),
+        target=target,
+    )
+
+
+if __name__ == "__main__":
+    from jarvis_mine import Jarvis
+    watcher = watcher_from_env(Jarvis(), target=sys.argv[1] if len(sys.argv) > 1 else "monitor")
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
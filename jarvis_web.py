@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+JARVIS Web - multi-session Socket.IO server for templates/jarvis_web.html
+Every browser gets its own conversation, kept by the SessionManager from jarvis_sessions.py across
+reconnects and page reloads (idle ones are spilled to disk and reloaded when the browser returns).
+Model and search work runs on the shared asyncio event loop from jarvis_async.py, so a slow answer
+for one client never blocks the others, and responses are streamed back as partial jarvis_response
+events while they are generated.
+
+Usage:
+    python jarvis_web.py --host 0.0.0.0 --port 5000     # gunicorn, one worker with threads
+    gunicorn -w 1 --threads 100 -b 0.0.0.0:5000 'jarvis_web:create_app()'
+    python jarvis_web.py --dev                          # Werkzeug development server on localhost
+"""
+
+import os
+import sys
+import uuid
+import asyncio
+import argparse
+import threading
+from flask import Flask, Response, render_template, request, session, jsonify
+from flask_socketio import SocketIO
+from jarvis_async import AsyncJarvis, get_event_loop
+from jarvis_cache import _cache_path
+from jarvis_sessions import session_manager_from_env
+from jarvis_tracing import get_tracer, span
+
+# Maximum number of requests processed at once across all clients; the rest wait their turn
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("JARVIS_WEB_MAX_CONCURRENT", 64))
+
+
+
+def secret_key():
+    """
+    Key signing the session cookie that holds the conversation id: JARVIS_WEB_SECRET_KEY, or else one
+    generated once and kept in the cache dir, so conversations survive restarts
+    """
+    key = os.environ.get("JARVIS_WEB_SECRET_KEY")
+    if key:
+        return key
+    path = _cache_path("web_secret_key")
+    try:
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, "w") as key_file:
+            key_file.write(os.urandom(32).hex())
+        print(f"🔑 JARVIS_WEB_SECRET_KEY is not set, generated a key in {path}")
+    except FileExistsError:
+        pass
+    with open(path) as key_file:
+        return key_file.read().strip()
+
+
+def cors_origins():
+    """Origins allowed to open a socket: JARVIS_WEB_CORS_ORIGINS (comma-separated, "*" for any), same-origin by default"""
+    origins = os.environ.get("JARVIS_WEB_CORS_ORIGINS", "").strip()
+    if not origins:
+        return None
+    if origins == "*":
+        return "*"
+    return [origin.strip() for origin in origins.split(",") if origin.strip()]
+
+
+app = Flask(__name__)
+socketio = SocketIO(app, async_mode="threading", cors_allowed_origins=cors_origins())
+
+
+sessions = None  # SessionManager, created by create_app() in the serving process
+connections = {}  # Socket.IO sid -> conversation session id
+connections_lock = threading.Lock()
+_request_slots = None
+_request_slots_lock = threading.Lock()
+
+
+def session_id_for(sid):
+    with connections_lock:
+        return connections.get(sid, sid)
+
+
+def request_slots() -> asyncio.Semaphore:
+    """Semaphore bounding concurrent requests, created on the event loop that uses it"""
+    global _request_slots
+    if _request_slots is None:
+        with _request_slots_lock:
+            if _request_slots is None:
+                _request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return _request_slots
+
+
+async def respond(sid, text):
+    """Answer one message, streaming partial chunks to the client and finishing with the full response"""
+    request_id = uuid.uuid4().hex[:8]
+
+    def on_delta(delta):
+        socketio.emit('jarvis_response', {'message': delta, 'type': 'partial', 'id': request_id}, to=sid)
+
+    try:
+        async with request_slots():
+            async with sessions.async_use(session_id_for(sid)) as conversation:
+                async with conversation.async_lock:
+                    with span("web.request", session=conversation.session_id):
+                        response = await conversation.jarvis.async_get_ai_response(text, on_delta=on_delta)
+        socketio.emit('jarvis_response', {'message': response, 'type': 'response', 'id': request_id}, to=sid)
+    except Exception as e:
+        print(f"Web request error: {e}")
+        socketio.emit('jarvis_response', {'message': "I apologize, Sir. There seems to be an error.", 'type': 'error', 'id': request_id}, to=sid)
+
+
+def submit(sid, data):
+    """Hand a message to the event loop and return immediately so the socket thread stays free"""
+    if isinstance(data, dict):
+        data = data.get('text')
+    text = data.strip() if isinstance(data, str) else ""
+    if text:
+        asyncio.run_coroutine_threadsafe(respond(sid, text), get_event_loop())
+
+
+@app.route('/')
+def index():
+    # The conversation id lives in the signed session cookie so a reload picks the conversation back up
+    session.setdefault('jarvis_session_id', uuid.uuid4().hex)
+    return render_template('jarvis_web.html')
+
+
+@app.route('/stats')
+def stats():
+    return jsonify(sessions.metrics())
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms plus session gauges"""
+    lines = [get_tracer().prometheus.render()]
+    for name, value in sessions.metrics().items():
+        name = "jarvis_" + (name if name.startswith("sessions_") else f"sessions_{name}")
+        if name.endswith(("created", "evictions", "reloads")):
+            lines.append(f"# TYPE {name}_total counter\n{name}_total {value}\n")
+        else:
+            lines.append(f"# TYPE {name} gauge\n{name} {value}\n")
+    return Response("".join(lines), mimetype="text/plain; version=0.0.4")
+
+
+@socketio.on('connect')
+def handle_connect():
+    session_id = session.get('jarvis_session_id', request.sid)
+    with connections_lock:
+        connections[request.sid] = session_id
+    sessions.get(session_id)
+    print(f"🌐 Client connected: {request.sid} ({len(connections)} connected, {len(sessions)} sessions in memory)")
+
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    with connections_lock:
+        session_id = connections.pop(request.sid, request.sid)
+        still_connected = session_id in connections.values()
+    if not still_connected:
+        sessions.spill(session_id)
+    print(f"🌐 Client disconnected: {request.sid} ({len(connections)} connected, {len(sessions)} sessions in memory)")
+
+
+@socketio.on('text_input')
+def handle_text_input(data):
+    submit(request.sid, data)
+
+
+@socketio.on('voice_input')
+def handle_voice_input(data):
+    submit(request.sid, data)
+
+
+def create_app():
+    """WSGI entry point: loads the cookie key, opens the session store and starts its janitor in the serving process"""
+    global sessions
+    if not app.config['SECRET_KEY']:
+        app.config['SECRET_KEY'] = secret_key()
+    if sessions is None:
+        sessions = session_manager_from_env(jarvis_factory=AsyncJarvis)
+        sessions.start_janitor()
+    return app
+
+
+def serve(host, port, threads):
+    """
+    Run under gunicorn's threaded worker, the production server Flask-SocketIO supports for
+    async_mode="threading". One worker only: sessions live in its memory and Socket.IO needs sticky
+    connections; threads bounds the connected clients.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class JarvisServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", 1)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+
+        def load(self):
+            return create_app()
+
+    JarvisServer().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JARVIS web server")
+    parser.add_argument("--host", default=os.environ.get("JARVIS_WEB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("JARVIS_WEB_PORT", 5000)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("JARVIS_WEB_THREADS", 100)),
+                        help="gunicorn worker threads, one per connected client")
+    parser.add_argument("--dev", action="store_true", help="use the Werkzeug development server instead of gunicorn")
+    args = parser.parse_args()
+
+    print(f"🌐 JARVIS web server on http://{args.host}:{args.port}")
+    if args.dev:
+        create_app()
+        socketio.run(app, host=args.host, port=args.port, allow_unsafe_werkzeug=True)
+        return
+    try:
+        serve(args.host, args.port, args.threads)
+    except ImportError:
+        print("❌ gunicorn is not installed: pip install gunicorn, or use --dev for local development")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
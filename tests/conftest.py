@@ -0,0 +1,36 @@
+import os
+import sys
+import types
+import tempfile
+
+import pytest
+
+# Caches write under JARVIS_CACHE_DIR, which jarvis_cache reads at import time
+os.environ.setdefault("JARVIS_CACHE_DIR", tempfile.mkdtemp(prefix="jarvis-tests-"))
+os.environ.setdefault("JARVIS_TRACING", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# jarvis_mine reads the API key from the untracked config.py; the tests never call the API
+try:
+    import config  # noqa: F401
+except ImportError:
+    sys.modules["config"] = types.SimpleNamespace(OPENAI_API_KEY="test-key")
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    """Intent classifier logging to a temp file, without audit calls"""
+    from jarvis_classifier import IntentClassifier
+    return IntentClassifier(log_path=str(tmp_path / "decisions.jsonl"), audit_rate=0)
+
+
+@pytest.fixture
+def jarvis(classifier):
+    """Jarvis whose model calls go to a scripted FakeOpenAI client"""
+    from fake_openai import FakeOpenAI
+    from jarvis_mine import Jarvis
+    jarvis = Jarvis()
+    jarvis._openai_client = FakeOpenAI()
+    jarvis._intent_classifier = classifier
+    return jarvis
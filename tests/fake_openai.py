@@ -0,0 +1,72 @@
+"""An in-process stand-in for the OpenAI client: scripted replies, recorded calls, optional streaming"""
+
+from types import SimpleNamespace
+
+
+def _chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeCompletions:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        reply = self.replies.pop(0) if self.replies else "ok"
+        if callable(reply):
+            reply = reply(kwargs["messages"])
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=len(reply.split()))
+        if kwargs.get("stream"):
+            # One delta per word, then a usage-only chunk like stream_options={"include_usage": True}
+            words = reply.split(" ")
+            deltas = [word + " " for word in words[:-1]] + words[-1:]
+            return iter([_chunk(delta) for delta in deltas] + [_chunk(usage=usage)])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))], usage=usage)
+
+
+class FakeOpenAI:
+    def __init__(self, replies=()):
+        self.chat = SimpleNamespace(completions=FakeCompletions(replies))
+
+    @property
+    def calls(self):
+        return self.chat.completions.calls
+
+    def reply(self, *replies):
+        self.chat.completions.replies.extend(replies)
+
+
+class _AsyncStream:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncCompletions(FakeCompletions):
+    def __init__(self, replies, delay=0.0):
+        super().__init__(replies)
+        self.delay = delay
+
+    async def create(self, **kwargs):
+        import asyncio
+        await asyncio.sleep(self.delay)
+        result = super().create(**kwargs)
+        return _AsyncStream(result) if kwargs.get("stream") else result
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """FakeOpenAI for openai.AsyncOpenAI callers; every call waits delay seconds without blocking the loop"""
+
+    def __init__(self, replies=(), delay=0.0):
+        self.chat = SimpleNamespace(completions=FakeAsyncCompletions(replies, delay))
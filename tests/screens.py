@@ -0,0 +1,26 @@
+"""Synthetic screenshots shared by the vision cache and screen watch tests"""
+
+import random
+import string
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+@lru_cache(maxsize=None)
+def screen(text_seed, clock="12:00", changed_line=None):
+    """A 1920x1080 text-heavy screen: the layout is fixed, text_seed picks the words"""
+    words = random.Random(text_seed)
+    layout = random.Random(0)
+    font = ImageFont.load_default()
+    image = Image.new("RGB", (1920, 1080), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 1920, 40), fill=(40, 40, 40))
+    draw.text((1800, 14), clock, fill=(255, 255, 255), font=font)
+    draw.rectangle((0, 40, 300, 1080), fill=(235, 235, 240))
+    for line in range(45):
+        lengths = [layout.randint(2, 9) for _ in range(20)]
+        rng = random.Random(99) if line == changed_line else words
+        text = " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(length)) for length in lengths)
+        draw.text((340, 60 + line * 22), text, fill=(20, 20, 20), font=font)
+    return image
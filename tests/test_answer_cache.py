@@ -0,0 +1,64 @@
+import pytest
+
+from jarvis_cache import AnswerCache, answer_ttl, canonical_question
+
+
+@pytest.fixture
+def cache():
+    cache = AnswerCache(similarity=True)
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_exact_question_hits_after_normalisation(cache):
+    cache.set("What is the capital of Peru?", "Lima")
+    assert cache.get("what is the capital of peru") == "Lima"
+
+
+def test_polite_phrasing_articles_and_contractions_hit(cache):
+    cache.set("What is the capital of Peru?", "Lima")
+    assert cache.get("Jarvis, can you tell me what's the capital of Peru") == "Lima"
+    assert cache.get("please tell me what is capital of peru") == "Lima"
+    assert cache.stats()["similar_hits"] == 2
+
+
+def test_word_order_is_kept(cache):
+    cache.set("did brazil beat france", "Yes")
+    assert cache.get("did france beat brazil") is None
+
+
+def test_tense_and_auxiliaries_are_kept(cache):
+    cache.set("who was president", "Someone")
+    assert cache.get("who is president") is None
+    cache.set("does it rain in lima", "Rarely")
+    assert cache.get("did it rain in lima") is None
+
+
+def test_other_entity_misses(cache):
+    cache.set("what is the capital of peru", "Lima")
+    assert cache.get("what is the capital of chile") is None
+
+
+def test_similarity_off_needs_the_same_question(cache):
+    cache.set("what is the capital of peru", "Lima")
+    strict = AnswerCache(similarity=False)
+    assert strict.get("can you tell me what is the capital of peru") is None
+    assert strict.get("What is the capital of Peru?") == "Lima"
+
+
+def test_canonical_question():
+    assert canonical_question("Hey Jarvis, could you please tell me who's the CEO of a company?") == "who is ceo of company"
+    assert canonical_question("can you swim") == "can you swim"
+
+
+@pytest.mark.parametrize("question, ttl", [
+    ("what is the weather in paris", 5 * 60),
+    ("bitcoin price right now", 5 * 60),
+    ("latest news about nasa", 60 * 60),
+    ("when was the eiffel tower founded", 30 * 24 * 3600),
+    ("is the war in gaza over", 24 * 3600),
+    ("how tall is mount everest", 24 * 3600),
+])
+def test_answer_ttl(question, ttl):
+    assert answer_ttl(question) == ttl
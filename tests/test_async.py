@@ -0,0 +1,122 @@
+import asyncio
+import inspect
+import threading
+import time
+
+import pytest
+
+import jarvis_async
+import jarvis_mine
+from fake_openai import FakeAsyncOpenAI
+from jarvis_async import AsyncJarvis, async_pipeline, get_async_jarvis, run_sync
+from jarvis_mine import Jarvis
+
+
+def off_the_event_loop(function):
+    """Wrap a blocking function so the test fails if it is called on the event loop thread"""
+    def wrapper(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return function(*args, **kwargs)
+        raise AssertionError(f"{function.__name__} blocked the event loop")
+    return wrapper
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeAsyncOpenAI()
+    monkeypatch.setattr(jarvis_async, "get_async_openai_client", lambda: client)
+    return client
+
+
+@pytest.fixture
+def jarvis(client, classifier):
+    """AsyncJarvis on the fake async client; the shared jarvis fixture is the sync Jarvis"""
+    jarvis = AsyncJarvis()
+    classifier.classify = off_the_event_loop(classifier.classify)
+    jarvis._intent_classifier = classifier
+    return jarvis
+
+
+def test_sync_methods_are_not_overridden_with_coroutines():
+    for name, member in inspect.getmembers(Jarvis, inspect.isfunction):
+        assert getattr(AsyncJarvis, name) is member, name
+    assert all(name.startswith(("async_", "_async_")) for name, member in vars(AsyncJarvis).items()
+               if inspect.iscoroutinefunction(member) or inspect.isasyncgenfunction(member))
+
+
+def test_shared_async_jarvis_is_created_once(monkeypatch):
+    monkeypatch.setattr(jarvis_async, "_async_jarvis", None)
+    instances = []
+    threads = [threading.Thread(target=lambda: instances.append(get_async_jarvis())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(instance) for instance in instances}) == 1
+
+
+def test_casual_reply_streams(jarvis, client):
+    client.reply('{"label": "casual"}', "Splendid, thank you for asking.")
+    deltas = []
+    response = asyncio.run(jarvis.async_get_ai_response("how has your week been going", on_delta=deltas.append))
+    assert response == "".join(deltas) == "Splendid, thank you for asking."
+    assert jarvis.chat_history[-1]["content"] == response
+
+
+def test_model_calls_run_concurrently(client):
+    client.chat.completions.delay = 0.2
+
+    async def many():
+        return await asyncio.gather(*(AsyncJarvis().async_generate_response([{"role": "user", "content": "hi"}]) for _ in range(10)))
+
+    started = time.perf_counter()
+    assert len(asyncio.run(many())) == 10
+    assert time.perf_counter() - started < 1.0
+
+
+def test_pipeline_keeps_blocking_cache_calls_off_the_event_loop(monkeypatch, client):
+    stored = []
+    monkeypatch.setattr(jarvis_async, "cached_answer_for", off_the_event_loop(lambda question, on_delta=None: None))
+    monkeypatch.setattr(jarvis_async, "cache_answer", off_the_event_loop(lambda *args: stored.append(args)))
+
+    async def search(keywords, n_results=2):
+        return ["Argentina beat France on penalties in the 2022 final."]
+
+    monkeypatch.setattr(jarvis_async, "async_search", search)
+    client.reply("Based on web search, Argentina.")
+    answer = asyncio.run(async_pipeline("who won", core_question="Who won the 2022 World Cup?", search_keywords="2022 World Cup"))
+    assert answer == "Based on web search, Argentina."
+    assert stored == [("Who won the 2022 World Cup?", ["Argentina beat France on penalties in the 2022 final."], answer)]
+
+
+def test_cached_answer_is_delivered_on_the_event_loop(monkeypatch):
+    monkeypatch.setattr(jarvis_mine, "get_answer_cache", lambda: {"q": "Cached answer"})
+    monkeypatch.setattr(jarvis_async, "cached_answer_for", off_the_event_loop(jarvis_mine.cached_answer_for))
+    deltas = []
+
+    def on_delta(delta):
+        asyncio.get_running_loop()  # raises on a worker thread
+        deltas.append(delta)
+
+    assert asyncio.run(async_pipeline("q", core_question="q", on_delta=on_delta)) == "Cached answer"
+    assert deltas == ["Cached answer"]
+
+
+def test_cached_page_lookup_runs_off_the_event_loop(monkeypatch):
+    class Cache:
+        lookup = staticmethod(off_the_event_loop(
+            lambda url: (type("Page", (), {"status_code": 200, "text": "<p>hi</p>", "from_cache": True,
+                                           "content_type": "text/html"})(), None, None)))
+
+    monkeypatch.setattr(jarvis_async, "get_page_cache", Cache)
+    assert asyncio.run(jarvis_async.async_fetch_url("http://example.com")) == ("http://example.com", "<p>hi</p>")
+
+
+def test_run_sync_from_plain_threads():
+    async def double(value):
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    assert run_sync(double(21)) == 42
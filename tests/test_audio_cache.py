@@ -0,0 +1,123 @@
+import os
+import threading
+
+import pytest
+
+import jarvis_tts
+from jarvis_cache import AudioCache
+from jarvis_tts import CachedSpeechEngine, CommandEngine, SpeechEngine
+
+
+class FakeEngine(SpeechEngine):
+    """Renders text as a small file of known size and records what it spoke or played"""
+    name = "fake"
+    extension = "wav"
+
+    def __init__(self, voice="voice", rate=180):
+        super().__init__(voice, rate)
+        self.spoken, self.played, self.rendered = [], [], []
+
+    def speak(self, text):
+        self.spoken.append(text)
+
+    def render(self, text, path):
+        self.rendered.append(text)
+        with open(path, "wb") as audio_file:
+            audio_file.write(b"\0" * 100)
+        return path
+
+    def play_file(self, path):
+        self.played.append(path)
+
+
+def rendered_file(tmp_path, name="source.wav", size=100):
+    path = tmp_path / name
+    path.write_bytes(b"\0" * size)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AudioCache(directory=str(tmp_path / "audio"), max_bytes=250)
+
+
+def test_put_and_get(cache, tmp_path):
+    path = cache.put("fake", "voice", 180, "Hello", rendered_file(tmp_path))
+    assert cache.get("fake", "voice", 180, "Hello") == path and os.path.exists(path)
+    assert cache.get("fake", "other voice", 180, "Hello") is None
+    assert cache.get("fake", "voice", 200, "Hello") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_least_recently_played_audio_is_evicted(cache, tmp_path):
+    first = cache.put("fake", "v", 1, "one", rendered_file(tmp_path, "1.wav"))
+    cache.put("fake", "v", 1, "two", rendered_file(tmp_path, "2.wav"))
+    cache.get("fake", "v", 1, "one")
+    cache.put("fake", "v", 1, "three", rendered_file(tmp_path, "3.wav"))
+    assert cache.get("fake", "v", 1, "two") is None
+    assert cache.get("fake", "v", 1, "one") == first
+    assert cache.evictions == 1 and cache.stats()["entries"] == 2
+
+
+def test_cache_survives_a_restart(cache, tmp_path):
+    cache.put("fake", "v", 1, "Good evening", rendered_file(tmp_path))
+    assert AudioCache(directory=cache.directory).get("fake", "v", 1, "Good evening") is not None
+
+
+@pytest.fixture
+def engine(cache, monkeypatch):
+    monkeypatch.setattr(jarvis_tts, "audio_player", lambda: ["true"])
+    fake = FakeEngine()
+    return fake, CachedSpeechEngine(fake, cache)
+
+
+def test_prewarmed_phrases_play_from_the_cache(engine):
+    fake, cached = engine
+    cached.prewarm(["Good evening, Sir. JARVIS ready."]).join()
+    assert fake.rendered == ["Good evening, Sir. JARVIS ready.", "Good evening, Sir.", "JARVIS ready."]
+    cached.speak("Good evening, Sir.")
+    assert fake.spoken == [] and len(fake.played) == 1
+
+
+def test_recurring_text_is_rendered_after_it_comes_up_again(engine):
+    fake, cached = engine
+    cached.speak("Yes, I'm listening")
+    assert fake.rendered == []
+    cached.speak("Yes, I'm listening")
+    for thread in threading.enumerate():
+        if thread.name == "jarvis-tts-prewarm":
+            thread.join()
+    assert fake.rendered == ["Yes, I'm listening"]
+    cached.speak("Yes, I'm listening")
+    assert fake.spoken == ["Yes, I'm listening"] * 2 and len(fake.played) == 1
+
+
+def test_long_text_is_never_rendered(engine):
+    fake, cached = engine
+    text = "word " * 50
+    for _ in range(3):
+        cached.speak(text)
+    assert fake.rendered == []
+
+
+def test_engines_that_cannot_render_are_passed_through(cache):
+    plain = SpeechEngine()
+    cached = CachedSpeechEngine(plain, cache)
+    assert not cached.enabled and cached.prewarm(["Hello"]) is None
+
+
+def test_render_returning_none_caches_nothing(cache, monkeypatch):
+    monkeypatch.setattr(jarvis_tts, "audio_player", lambda: ["true"])
+    fake = FakeEngine()
+    fake.render = lambda text, path: None
+    cached = CachedSpeechEngine(fake, cache)
+    assert cached.render_to_cache("Hello") is False
+    assert cache.stats()["entries"] == 0
+
+
+def test_command_engine_without_a_command_fails_when_created():
+    class HalfEngine(CommandEngine):
+        binary = "half"
+
+    with pytest.raises(TypeError):
+        HalfEngine()
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from bench_latency import percentile  # noqa: E402
+
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 0.5) == 2.5
+    assert percentile([5], 0.95) == 5
+    assert percentile([10, 0, 20], 1.0) == 20
+
+
+def run_benchmark(tmp_path, *args):
+    (tmp_path / "config.py").write_text('OPENAI_API_KEY = "test-key"\n')
+    env = dict(os.environ, PYTHONPATH=str(tmp_path))
+    command = [sys.executable, os.path.join(REPO_DIR, "benchmarks", "bench_latency.py"), "--runs", "1",
+               "--llm-latency", "0", "--token-interval", "0", "--web-latency", "0", "--search-latency", "0",
+               "--baseline", str(tmp_path / "baseline.json"), *args]
+    return subprocess.run(command, cwd=str(tmp_path), env=env, capture_output=True, text=True, timeout=120)
+
+
+@pytest.fixture(scope="module")
+def baseline(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("bench")
+    result = run_benchmark(tmp_path, "--update")
+    assert result.returncode == 0, result.stdout + result.stderr
+    with open(tmp_path / "baseline.json") as baseline_file:
+        return tmp_path, result.stdout, json.load(baseline_file)
+
+
+def test_every_stage_is_measured_offline(baseline):
+    _, output, results = baseline
+    for stage in ("get_ai_response", "get_ai_response (search)", "get_ai_response (casual)", "pipeline",
+                  "search total", "fetch pages", "answer (LLM)"):
+        assert results[stage]["count"] > 0, stage
+        assert results[stage]["p50"] <= results[stage]["p95"] <= results[stage]["p99"]
+    assert "Baseline saved" in output
+
+
+def test_regression_against_the_baseline_fails(baseline):
+    tmp_path, _, results = baseline
+    with open(tmp_path / "baseline.json", "w") as baseline_file:
+        json.dump({stage: {**stats, "p50": 1e-6, "p95": 1e-6} for stage, stats in results.items()}, baseline_file)
+    result = run_benchmark(tmp_path)
+    assert result.returncode == 1
+    assert "slower than the baseline" in result.stdout
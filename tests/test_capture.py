@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+import jarvis_capture
+from jarvis_capture import capture
+
+
+class FakeScreen:
+    """mss stand-in: a 300x200 desktop of two monitors; grabs are filled with one BGRA colour"""
+
+    monitors = [
+        {"left": 0, "top": 0, "width": 300, "height": 200},
+        {"left": 0, "top": 0, "width": 200, "height": 200},
+        {"left": 200, "top": 0, "width": 100, "height": 200},
+    ]
+
+    def __init__(self):
+        self.grabs = []
+
+    def grab(self, area):
+        self.grabs.append(area)
+        size = (area["width"], area["height"])
+        return SimpleNamespace(size=size, bgra=bytes([10, 20, 30, 255]) * (size[0] * size[1]))
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    screen = FakeScreen()
+    monkeypatch.setattr(jarvis_capture, "_screen", lambda: screen)
+    return screen
+
+
+def test_primary_monitor_is_converted_from_bgra(screen):
+    image = capture()
+    assert image.size == (200, 200) and image.mode == "RGB"
+    assert image.getpixel((0, 0)) == (30, 20, 10)
+
+
+def test_other_monitors_and_the_whole_desktop(screen):
+    assert capture(monitor=2).size == (100, 200)
+    assert capture(monitor=0).size == (300, 200)
+    with pytest.raises(ValueError):
+        capture(monitor=3)
+
+
+def test_region_is_clipped_to_the_desktop(screen):
+    assert capture("region", region=(250, 150, 100, 100)).size == (50, 50)
+    assert screen.grabs[-1] == {"left": 250, "top": 150, "width": 50, "height": 50}
+    with pytest.raises(ValueError):
+        capture("region", region=(400, 0, 10, 10))
+    with pytest.raises(ValueError):
+        capture("region")
+
+
+def test_active_window(screen, monkeypatch):
+    monkeypatch.setattr(jarvis_capture, "active_window_bounds", lambda: (20, 30, 120, 80))
+    assert capture("window").size == (120, 80)
+
+
+def test_unknown_window_falls_back_to_the_primary_monitor(screen, monkeypatch):
+    monkeypatch.setattr(jarvis_capture, "active_window_bounds", lambda: None)
+    assert capture("window").size == (200, 200)
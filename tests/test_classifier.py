@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from jarvis_classifier import IntentClassifier, tokenize
+
+
+def test_tokenize_adds_bigrams():
+    assert tokenize("How are you?") == ["how", "are", "you", "?", "how are", "are you", "you ?"]
+
+
+@pytest.mark.parametrize("text, label", [
+    ("hello", "casual"),
+    ("how are you", "casual"),
+    ("good morning jarvis", "casual"),
+    ("what is the price of bitcoin today", "search"),
+])
+def test_familiar_utterances_are_decided_locally(classifier, text, label):
+    assert classifier.classify(text) == label
+
+
+@pytest.mark.parametrize("text", [
+    "how are the lakers doing this season",
+    "how are you feeling about the election",
+    "what do you think about bitcoin price",
+])
+def test_confident_but_unfamiliar_utterances_go_to_the_ai(classifier, text):
+    label, confidence = classifier.predict(text)
+    assert label == "casual" and confidence > 0.95
+    assert classifier.classify(text) is None
+
+
+def test_ai_decisions_are_learned_and_logged(classifier):
+    text = "how are the lakers doing this season"
+    classifier.record_llm_decision(text, "search")
+    assert classifier.classify(text) == "search"
+    record = json.loads(open(classifier.log_path).readline())
+    assert record["source"] == "llm" and record["label"] == "search" and record["local_label"] == "casual"
+
+    reloaded = IntentClassifier(log_path=classifier.log_path, audit_rate=0)
+    assert reloaded.classify(text) == "search"
+
+
+def test_audited_decisions_measure_confident_agreement(tmp_path):
+    classifier = IntentClassifier(log_path=str(tmp_path / "decisions.jsonl"), audit_rate=1.0)
+    assert classifier.classify("hello") is None
+    classifier.record_llm_decision("hello", "casual")
+    classifier.record_llm_decision("what is the price of bitcoin today", "casual")
+    stats = classifier.stats()
+    assert stats["audits"] == 1
+    assert stats["confident_agreement_rate"] == 0.5
+    assert classifier.local_decisions == 0
+
+
+def test_decision_log_is_compacted(tmp_path):
+    classifier = IntentClassifier(log_path=str(tmp_path / "decisions.jsonl"), audit_rate=0, max_log_records=10)
+    for index in range(25):
+        classifier.record_llm_decision(f"question number {index}", "search")
+    lines = open(classifier.log_path).readlines()
+    assert len(lines) <= 10
+    assert json.loads(lines[-1])["text"] == "question number 24"
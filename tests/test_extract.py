@@ -0,0 +1,77 @@
+import pytest
+
+import jarvis_extract
+from jarvis_extract import extract_snippet, extract_text
+
+PAGE = """<html><head><title>Title</title><style>p { color: red }</style></head>
+<body>
+<nav><a href="/">Home</a> <a href="/news">News</a></nav>
+<header>Site banner</header>
+<div role="navigation">Menu</div>
+<main>
+  <h1>Headline</h1>
+  <p>First paragraph with <b>bold</b> text.</p>
+  <script>var tracking = "nope";</script>
+  <p>Second<br>line</p>
+  <div hidden>Hidden text</div>
+  <ul><li>One</li><li>Two</li></ul>
+</main>
+<aside>Related links</aside>
+<footer>Copyright</footer>
+</body></html>"""
+
+
+@pytest.fixture(params=["lxml", "html.parser"])
+def engine(request, monkeypatch):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+        monkeypatch.setattr(jarvis_extract, "_lxml", None)
+    else:
+        monkeypatch.setattr(jarvis_extract, "_lxml", False)
+    return request.param
+
+
+def test_main_content_without_boilerplate(engine):
+    assert extract_text(PAGE) == "Headline First paragraph with bold text. Second line One Two"
+
+
+def test_block_elements_separate_words(engine):
+    assert extract_text("<div>one</div><div>two</div><p>three<br>four</p>") == "one two three four"
+
+
+@pytest.mark.parametrize("void", ['<img src="icon.png" aria-hidden="true">', "<input hidden>", '<br role="navigation">'])
+def test_hidden_void_element_does_not_hide_the_rest(engine, void):
+    assert extract_text(f"<p>Intro {void} middle</p><p>Rest of the page</p>") == "Intro middle Rest of the page"
+
+
+def test_nested_skipped_elements(engine):
+    html = "<p>Before</p><nav><nav>inner</nav>still nav</nav><p>After</p>"
+    assert extract_text(html) == "Before After"
+
+
+def test_stops_at_max_chars(engine):
+    html = "<p>" + "word " * 10000 + "</p>"
+    assert len(extract_text(html, max_chars=100)) == 100
+
+
+def test_snippet_adds_ellipsis_only_when_cut(engine):
+    assert extract_snippet("<p>short</p>") == "short"
+    snippet = extract_snippet("<p>" + "word " * 200 + "</p>", max_chars=50)
+    assert snippet.endswith("...") and len(snippet) == 53
+
+
+def test_chunked_feeding_matches_one_chunk(engine):
+    assert extract_text(PAGE, chunk_size=7) == extract_text(PAGE)
+
+
+def test_empty_and_broken_html(engine):
+    assert extract_text("") == ""
+    assert extract_text("<div><p>unclosed <b>tags") == "unclosed tags"
+
+
+@pytest.mark.parametrize("extract", [extract_text, extract_snippet])
+def test_omitted_head_end_tag_with_html_parser(monkeypatch, extract):
+    monkeypatch.setattr(jarvis_extract, "_lxml", False)
+    html = "<html><head><title>t</title><style>p {}</style><body><p>Hello world</p></body></html>"
+    assert extract(html) == "Hello world"
+    assert extract("<head><title>t</title><meta charset=utf-8><div>Body text</div>") == "Body text"
@@ -0,0 +1,50 @@
+import time
+
+import jarvis_mine
+from jarvis_mine import fetch_urls_concurrently
+
+
+def fake_fetch(delays, pages=None, started=None):
+    """fetch_url stand-in: sleeps delays[url] seconds, then returns the page or None"""
+    def fetch(url):
+        if started is not None:
+            started.append(url)
+        time.sleep(delays[url])
+        return (pages or {}).get(url, f"<p>{url}</p>")
+    return fetch
+
+
+def test_first_n_pages_win(monkeypatch):
+    delays = {"slow": 2.0, "fast1": 0.01, "fast2": 0.05, "slower": 1.0}
+    monkeypatch.setattr(jarvis_mine, "fetch_url", fake_fetch(delays))
+    started = time.perf_counter()
+    results = fetch_urls_concurrently(list(delays), 2)
+    assert [url for url, _ in results] == ["fast1", "fast2"]
+    assert time.perf_counter() - started < 0.5  # the stragglers are not waited for
+
+
+def test_failed_fetches_are_skipped(monkeypatch):
+    delays = {"broken": 0.0, "pdf": 0.01, "good": 0.05}
+    monkeypatch.setattr(jarvis_mine, "fetch_url", fake_fetch(delays, {"broken": None, "pdf": None, "good": "<p>ok</p>"}))
+    assert fetch_urls_concurrently(list(delays), 2) == [("good", "<p>ok</p>")]
+
+
+def test_fetches_run_in_parallel(monkeypatch):
+    delays = {f"url{index}": 0.2 for index in range(4)}
+    monkeypatch.setattr(jarvis_mine, "fetch_url", fake_fetch(delays))
+    started = time.perf_counter()
+    assert len(fetch_urls_concurrently(list(delays), 4)) == 4
+    assert time.perf_counter() - started < 0.6
+
+
+def test_queued_fetches_are_cancelled(monkeypatch):
+    delays = {f"url{index}": 0.05 for index in range(6)}
+    started = []
+    monkeypatch.setattr(jarvis_mine, "fetch_url", fake_fetch(delays, started=started))
+    assert len(fetch_urls_concurrently(list(delays), 1, max_workers=2)) == 1
+    time.sleep(0.3)
+    assert len(started) < len(delays)
+
+
+def test_no_urls():
+    assert fetch_urls_concurrently([], 2) == []
@@ -0,0 +1,114 @@
+import threading
+
+from jarvis_history import (
+    IMAGE_TOKENS, MESSAGE_OVERHEAD_TOKENS, SUMMARY_PREFIX, ConversationMemory, estimate_tokens, message_tokens,
+    messages_tokens, summary_messages,
+)
+
+
+def filled(memory, turns, words=20):
+    for index in range(turns):
+        memory.add(f"question {index} " + "word " * words, f"answer {index} " + "word " * words)
+    return memory
+
+
+def test_token_estimates():
+    assert estimate_tokens("") == 0
+    assert 3 <= estimate_tokens("Hello, world!") <= 5
+    assert estimate_tokens("word " * 100) >= 90
+
+
+def test_image_parts_cost_a_fixed_amount():
+    message = {"role": "user", "content": [{"type": "text", "text": "what is this"},
+                                           {"type": "image_url", "image_url": {"url": "data:..."}}]}
+    assert message_tokens(message) == estimate_tokens("what is this") + IMAGE_TOKENS + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_context_keeps_the_newest_turns_within_budget():
+    memory = filled(ConversationMemory(budget=200), 10)
+    context = memory.context()
+    assert messages_tokens(context) <= 200
+    assert context[-1]["content"].startswith("answer 9")
+    assert len(context) % 2 == 0 and context[0]["role"] == "user"  # whole turns only
+
+
+def test_long_turns_are_not_cut_by_message_count():
+    memory = ConversationMemory(budget=1500)
+    memory.add("hi", "hello")
+    memory.add("thanks", "you're welcome")
+    memory.add("one more", "sure")
+    assert len(memory.context()) == 6
+
+
+def test_compaction_folds_old_turns_into_the_summary():
+    calls = []
+
+    def summarize(previous, messages):
+        calls.append((previous, [message["content"][:10] for message in messages]))
+        return f"{len(messages)} messages summarized"
+
+    memory = filled(ConversationMemory(budget=300, summarize=summarize), 10)
+    assert memory.needs_compaction()
+    assert memory.compact()
+    assert not memory.needs_compaction()
+    assert memory.summary.endswith("messages summarized") and memory.compactions == 1
+    assert calls[0][0] == "" and calls[0][1][0] == "question 0"
+    assert memory.context()[0] == {"role": "system", "content": SUMMARY_PREFIX + memory.summary}
+
+
+def test_summary_is_updated_incrementally():
+    summaries = []
+    memory = ConversationMemory(budget=300, summarize=lambda previous, messages: summaries.append(previous) or f"v{len(summaries)}")
+    filled(memory, 10)
+    memory.compact()
+    filled(memory, 10)
+    memory.compact()
+    assert summaries == ["", "v1"] and memory.summary == "v2"
+
+
+def test_without_a_summarizer_old_turns_are_dropped():
+    memory = filled(ConversationMemory(budget=300), 10)
+    memory.compact()
+    assert memory.summary == "" and memory.total_tokens() <= 300
+
+
+def test_failed_summary_keeps_the_previous_one():
+    def broken(previous, messages):
+        raise ConnectionError("offline")
+
+    memory = filled(ConversationMemory(budget=300, summarize=broken), 10)
+    memory.summary = "earlier"
+    memory.compact()
+    assert memory.summary == "earlier"
+
+
+def test_clear_during_compaction_wins():
+    started, release = threading.Event(), threading.Event()
+
+    def slow(previous, messages):
+        started.set()
+        release.wait(5)
+        return "stale summary"
+
+    memory = filled(ConversationMemory(budget=300, summarize=slow), 10)
+    thread = threading.Thread(target=memory.compact)
+    thread.start()
+    started.wait(5)
+    memory.clear()
+    memory.add("new", "conversation")
+    release.set()
+    thread.join()
+    assert memory.summary == "" and len(memory.messages) == 2
+
+
+def test_state_round_trip():
+    memory = filled(ConversationMemory(budget=300), 2)
+    memory.summary = "earlier"
+    restored = ConversationMemory()
+    restored.load_state(memory.export_state())
+    assert restored.messages == memory.messages and restored.summary == "earlier"
+
+
+def test_summary_prompt_contains_the_transcript():
+    messages = summary_messages("old", [{"role": "user", "content": "my name is Tony"}])
+    assert "old" in messages[1]["content"] and "user: my name is Tony" in messages[1]["content"]
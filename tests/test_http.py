@@ -0,0 +1,100 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import jarvis_http
+from jarvis_http import HTTPClient, configure_http_client, get_http_client
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.ports.add(self.client_address[1])
+            server.user_agents.append(self.headers.get("User-Agent"))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        body = b"<p>ok</p>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.ports, server.user_agents = set(), []
+    server.in_flight = server.max_in_flight = 0
+    server.delay = 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sequential_requests_reuse_one_connection(server):
+    client = HTTPClient()
+    for _ in range(5):
+        assert client.get(server.url).text == "<p>ok</p>"
+    assert len(server.ports) == 1
+    assert "Mozilla" in server.user_agents[0]
+    client.close()
+
+
+def test_per_host_limit_caps_concurrent_connections(server):
+    server.delay = 0.05
+    client = HTTPClient(pool_per_host=2, pool_total=8)
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: client.get(server.url), range(8)))
+    assert server.max_in_flight <= 2
+    assert len(server.ports) <= 2
+    client.close()
+
+
+def test_busy_host_fails_after_the_pool_timeout(server):
+    server.delay = 1.0
+    client = HTTPClient(pool_per_host=1, pool_total=8, pool_timeout=0.1)
+    with ThreadPoolExecutor(1) as executor:
+        straggler = executor.submit(client.get, server.url)
+        time.sleep(0.2)
+        started = time.perf_counter()
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get(server.url)
+        assert time.perf_counter() - started < 0.5
+        assert straggler.result().status_code == 200
+    client.close()
+
+
+def test_total_limit_caps_requests_in_flight(server):
+    server.delay = 0.05
+    client = HTTPClient(pool_per_host=8, pool_total=3)
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: client.get(server.url), range(8)))
+    assert server.max_in_flight <= 3
+    client.close()
+
+
+def test_shared_client_is_created_once_and_replaceable(monkeypatch):
+    monkeypatch.setattr(jarvis_http, "_client", None)
+    first = get_http_client()
+    assert get_http_client() is first
+    replaced = configure_http_client(timeout=3)
+    assert get_http_client() is replaced and replaced.timeout == 3
+    replaced.close()
@@ -0,0 +1,72 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from jarvis_image import prepare_image
+
+
+def decoded(prepared):
+    return Image.open(io.BytesIO(base64.b64decode(prepared.data)))
+
+
+def png_bytes(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_longest_side_is_capped():
+    prepared = prepare_image(Image.new("RGB", (3840, 2160), (10, 120, 200)), max_side=1536)
+    assert (prepared.width, prepared.height) == (1536, 864)
+    assert decoded(prepared).size == (1536, 864)
+    assert prepared.encoded_bytes < prepared.original_bytes
+
+
+def test_small_images_are_not_upscaled():
+    prepared = prepare_image(Image.new("RGB", (300, 200)), max_side=1536)
+    assert (prepared.width, prepared.height) == (300, 200)
+
+
+def test_mime_type_matches_the_encoding():
+    image = Image.new("RGB", (64, 64))
+    assert prepare_image(image, image_format="jpeg").mime == "image/jpeg"
+    webp = prepare_image(image, image_format="webp")
+    assert webp.mime == "image/webp" and decoded(webp).format == "WEBP"
+    assert webp.data_url.startswith("data:image/webp;base64,")
+    with pytest.raises(ValueError):
+        prepare_image(image, image_format="gif")
+
+
+def test_transparency_is_flattened_onto_white_for_jpeg():
+    image = Image.new("RGBA", (32, 32), (0, 0, 0, 0))
+    pixel = decoded(prepare_image(image, image_format="jpeg")).getpixel((16, 16))
+    assert all(channel > 245 for channel in pixel)
+
+
+def test_transparency_is_kept_for_webp():
+    image = Image.new("RGBA", (32, 32), (0, 0, 0, 0))
+    assert decoded(prepare_image(image, image_format="webp")).mode == "RGBA"
+
+
+def test_exif_orientation_is_applied_and_metadata_dropped():
+    image = Image.new("RGB", (400, 200))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif.tobytes())
+    prepared = prepare_image(buffer.getvalue())
+    assert (prepared.width, prepared.height) == (200, 400)
+    assert not decoded(prepared).getexif()
+
+
+@pytest.mark.parametrize("kind", ["bytes", "path", "file"])
+def test_sources(tmp_path, kind):
+    data = png_bytes(Image.new("RGB", (100, 50), (200, 0, 0)))
+    path = tmp_path / "image.png"
+    path.write_bytes(data)
+    source = {"bytes": data, "path": str(path), "file": io.BytesIO(data)}[kind]
+    prepared = prepare_image(source)
+    assert (prepared.width, prepared.height) == (100, 50)
+    assert prepared.original_bytes == len(data)
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from jarvis_mic import MicrophoneStream, RingBuffer
+
+
+def frames(level, seconds, stream, seed=0):
+    """Frames of noise at an RMS level"""
+    rng = np.random.default_rng(seed)
+    for _ in range(int(seconds / stream.frame_seconds)):
+        yield rng.normal(0, level, stream.frame_size).astype(np.float32)
+
+
+def feed(stream, *parts):
+    for level, seconds in parts:
+        for frame in frames(level, seconds, stream):
+            stream.process(frame)
+
+
+def utterances(stream):
+    result = []
+    while not stream.utterances.empty():
+        result.append(stream.utterances.get_nowait())
+    return result
+
+
+@pytest.fixture
+def stream():
+    return MicrophoneStream()
+
+
+def test_ring_buffer_wraps_and_reads_by_absolute_index():
+    ring = RingBuffer(10)
+    ring.write(np.arange(8, dtype=np.float32))
+    ring.write(np.arange(8, 14, dtype=np.float32))
+    assert ring.written == 14
+    assert ring.read(6, 14).tolist() == list(range(6, 14))
+    assert ring.read(0, 6).tolist() == [4, 5]  # samples 0-3 are overwritten
+    assert ring.read(20, 30).size == 0
+
+
+def test_ring_buffer_keeps_the_end_of_an_oversized_write():
+    ring = RingBuffer(4)
+    ring.write(np.arange(10, dtype=np.float32))
+    assert ring.read(0, 10).tolist() == [6, 7, 8, 9]
+
+
+def test_speech_between_silence_is_one_utterance_with_pre_roll(stream):
+    feed(stream, (0.001, 2.0), (0.1, 1.0), (0.001, 1.5))
+    [utterance] = utterances(stream)
+    # pre-roll before the speech, end_silence after it
+    assert 1.0 + stream.pre_roll / stream.sample_rate <= utterance.duration <= 1.0 + 0.3 + 0.8 + 0.1
+
+
+def test_short_click_is_not_an_utterance(stream):
+    feed(stream, (0.001, 2.0), (0.1, 0.06), (0.001, 2.0))
+    assert utterances(stream) == []
+
+
+def test_noise_floor_ignores_speech(stream):
+    feed(stream, (0.001, 2.0), (0.1, 3.0))
+    assert stream.noise_floor < 0.01
+
+
+def test_step_rise_in_background_noise_does_not_trap_the_vad(stream):
+    # A fan switching on: far louder than speech_ratio times the old floor, and it never stops
+    feed(stream, (0.001, 3.0), (0.02, 60.0))
+    found = utterances(stream)
+    assert len(found) <= 1
+    assert all(utterance.duration < stream.max_utterance / stream.sample_rate for utterance in found)
+    # ...and speech over the fan is still heard
+    feed(stream, (0.2, 1.0), (0.02, 1.5))
+    assert len(utterances(stream)) == 1
+
+
+def test_muted_stream_does_not_segment_its_own_speech(stream):
+    feed(stream, (0.001, 2.0))
+    with stream.muted():
+        feed(stream, (0.1, 1.0))
+    feed(stream, (0.001, 1.5))
+    assert utterances(stream) == []
+
+
+def barge_in_stream():
+    calls = []
+    stream = MicrophoneStream(on_barge_in=lambda: calls.append(True))
+    return stream, calls
+
+
+def test_own_voice_never_barges_in():
+    stream, calls = barge_in_stream()
+    feed(stream, (0.001, 2.0))
+    with stream.muted():
+        # JARVIS through laptop speakers: far above the speech threshold, but it is its own voice
+        feed(stream, (0.05, 10.0))
+    assert stream.barge_ins == 0
+    assert stream.echo_level() == pytest.approx(0.05, rel=0.2)
+
+
+def test_user_louder_than_playback_barges_in():
+    stream, calls = barge_in_stream()
+    feed(stream, (0.001, 2.0))
+    with stream.muted():
+        feed(stream, (0.05, 3.0), (0.3, 1.0), (0.05, 1.5))
+    feed(stream, (0.001, 1.0))
+    assert stream.barge_ins == 1
+    assert len(utterances(stream)) == 1
+
+
+def test_no_barge_in_before_the_echo_level_is_known():
+    stream, calls = barge_in_stream()
+    feed(stream, (0.001, 2.0))
+    with stream.muted():
+        feed(stream, (0.3, 0.5))
+    assert stream.barge_ins == 0
+
+
+def test_barge_in_is_off_without_a_callback(stream):
+    feed(stream, (0.001, 2.0))
+    with stream.muted():
+        feed(stream, (0.05, 3.0), (0.3, 1.0))
+    assert stream.barge_ins == 0
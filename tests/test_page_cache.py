@@ -0,0 +1,93 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from jarvis_cache import PageCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(path=str(tmp_path / "pages.sqlite3"), ttl=600)
+
+
+def store(cache, url, headers, text="<p>page</p>"):
+    page, conditional, entry = cache.lookup(url)
+    assert page is None
+    return cache.store_response(url, entry, 200, {"Content-Type": "text/html", **headers}, text)
+
+
+def test_max_age_is_served_fresh(cache):
+    store(cache, "http://a", {"Cache-Control": "max-age=60"})
+    page, _, _ = cache.lookup("http://a")
+    assert page is not None and page.from_cache
+
+
+def test_max_age_is_capped(cache):
+    assert cache._entry_ttl({"Cache-Control": "max-age=99999999"}) == cache.max_ttl
+
+
+def test_no_freshness_and_no_validators_is_not_stored(cache):
+    store(cache, "http://a", {})
+    page, conditional, entry = cache.lookup("http://a")
+    assert page is None and entry is None and conditional == {}
+
+
+def test_no_cache_is_revalidated_every_time(cache):
+    store(cache, "http://a", {"Cache-Control": "no-cache", "ETag": '"v1"'})
+    page, conditional, entry = cache.lookup("http://a")
+    assert page is None
+    assert conditional == {"If-None-Match": '"v1"'}
+    revalidated = cache.store_response("http://a", entry, 304, {"Cache-Control": "no-cache"}, "")
+    assert revalidated.text == "<p>page</p>" and revalidated.from_cache
+    assert cache.lookup("http://a")[0] is None
+
+
+def test_pragma_no_cache(cache):
+    assert cache._entry_ttl({"Pragma": "no-cache", "Last-Modified": formatdate(time.time() - 86400, usegmt=True)}) == 0
+
+
+def test_heuristic_lifetime_is_a_tenth_of_the_age(cache):
+    one_hour_ago = formatdate(time.time() - 3600, usegmt=True)
+    assert 355 <= cache._entry_ttl({"Last-Modified": one_hour_ago}) <= 360
+
+
+def test_heuristic_lifetime_is_capped_by_ttl(cache):
+    last_year = formatdate(time.time() - 365 * 86400, usegmt=True)
+    assert cache._entry_ttl({"Last-Modified": last_year}) == 600
+
+
+def test_private_pages_get_no_heuristic_lifetime(cache):
+    last_year = formatdate(time.time() - 365 * 86400, usegmt=True)
+    assert cache._entry_ttl({"Cache-Control": "private", "Last-Modified": last_year}) == 0
+    assert cache._entry_ttl({"Cache-Control": "private, max-age=30"}) == 30
+
+
+def test_expires_header(cache):
+    assert 115 <= cache._entry_ttl({"Expires": formatdate(time.time() + 120, usegmt=True)}) <= 120
+    assert cache._entry_ttl({"Expires": "0"}) == 0
+
+
+def test_no_store_drops_the_old_copy_and_its_extracts(cache):
+    store(cache, "http://a", {"Cache-Control": "max-age=0", "ETag": '"v1"'})
+    cache.put_text("http://a", "snippet", "old snippet")
+    store(cache, "http://a", {"Cache-Control": "no-store"}, text="<p>new</p>")
+    assert cache.get_text("http://a", "snippet") is None
+    assert cache.lookup("http://a")[2] is None
+
+
+def test_new_body_invalidates_extracts(cache):
+    store(cache, "http://a", {"Cache-Control": "max-age=0", "ETag": '"v1"'})
+    cache.put_text("http://a", "snippet", "old snippet")
+    store(cache, "http://a", {"Cache-Control": "max-age=0", "ETag": '"v2"'}, text="<p>new</p>")
+    assert cache.get_text("http://a", "snippet") is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = PageCache(path=str(tmp_path / "pages.sqlite3"), max_bytes=25)
+    for url in ("http://a", "http://b", "http://c"):
+        store(cache, url, {"Cache-Control": "max-age=60"}, text="x" * 10)
+        time.sleep(0.01)
+    assert cache.lookup("http://a")[0] is None
+    assert cache.lookup("http://c")[0] is not None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import jarvis_mine
+
+
+@pytest.fixture
+def pipeline_calls(monkeypatch):
+    calls = []
+
+    def pipeline(question, core_question=None, search_keywords=None, on_delta=None):
+        calls.append({"question": question, "core_question": core_question, "search_keywords": search_keywords})
+        return "Based on web search, Argentina."
+
+    monkeypatch.setattr(jarvis_mine, "pipeline", pipeline)
+    return calls
+
+
+def test_search_reply_is_validated(jarvis):
+    reply = json.dumps({"label": "search", "question": " Who won the 2022 World Cup? ", "keywords": ["who", "2022 World Cup", " "]})
+    assert jarvis.parse_preprocessed("so who won the world cup in 2022", reply) == {
+        "label": "search", "question": "Who won the 2022 World Cup?", "keywords": "who, 2022 World Cup",
+    }
+
+
+def test_keywords_may_be_a_string(jarvis):
+    reply = json.dumps({"label": "Search", "question": "price of gold", "keywords": "gold price, today"})
+    assert jarvis.parse_preprocessed("price of gold", reply)["keywords"] == "gold price, today"
+
+
+def test_casual_reply_needs_no_question(jarvis):
+    assert jarvis.parse_preprocessed("how are you", '{"label": "casual"}') == {"label": "casual", "question": "", "keywords": ""}
+
+
+@pytest.mark.parametrize("reply", [
+    "not json",
+    "[]",
+    '{"label": "maybe"}',
+    '{"label": "search", "question": "", "keywords": ["x"]}',
+    '{"label": "search", "question": "q", "keywords": []}',
+    '{"label": "search", "question": 3, "keywords": "x"}',
+])
+def test_unusable_replies_fall_back(jarvis, reply):
+    assert jarvis.parse_preprocessed("anything", reply) is None
+
+
+def test_decisions_train_the_local_classifier(jarvis):
+    jarvis.parse_preprocessed("who is the mayor of taipei", '{"label": "search", "question": "q", "keywords": "k"}')
+    assert jarvis.intent_classifier.confident_label("who is the mayor of taipei") == "search"
+
+
+def test_one_call_replaces_classification_and_both_extraction_agents(jarvis, pipeline_calls):
+    jarvis._openai_client.reply(json.dumps({"label": "search", "question": "Who won the 2022 World Cup?", "keywords": ["2022 World Cup", "winner"]}))
+    assert jarvis.get_ai_response("hey, who won the world cup in 2022") == "Based on web search, Argentina."
+    [call] = jarvis._openai_client.calls
+    assert call["response_format"] == {"type": "json_object"}
+    assert pipeline_calls == [{"question": "hey, who won the world cup in 2022",
+                               "core_question": "Who won the 2022 World Cup?", "search_keywords": "2022 World Cup, winner"}]
+
+
+def test_invalid_reply_falls_back_to_the_separate_calls(jarvis, pipeline_calls):
+    jarvis._openai_client.reply("Sure! Here is the JSON you asked for", "search")
+    jarvis.get_ai_response("who won the world cup in 2022")
+    assert len(jarvis._openai_client.calls) == 2
+    assert pipeline_calls[0]["core_question"] is None and pipeline_calls[0]["search_keywords"] is None
+
+
+def test_casual_reply_is_answered_from_chat(jarvis, pipeline_calls):
+    jarvis._openai_client.reply('{"label": "casual", "question": "", "keywords": []}', "I'm doing well, thank you.")
+    assert jarvis.get_ai_response("how has your week been going") == "I'm doing well, thank you."
+    assert pipeline_calls == []
+    assert jarvis.chat_history[-1]["content"] == "I'm doing well, thank you."
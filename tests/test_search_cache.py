@@ -0,0 +1,92 @@
+import sys
+import time
+import types
+
+import pytest
+
+import jarvis_mine
+from jarvis_cache import TTLCache, normalize_key
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "entries.sqlite3")
+
+
+def test_set_and_get(path):
+    cache = TTLCache("test", path=path)
+    cache.set("key", ["a", "b"])
+    assert cache.get("key") == ["a", "b"]
+    assert cache.get("missing") is None
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire(path):
+    cache = TTLCache("test", ttl=0.05, path=path)
+    cache.set("default", 1)
+    cache.set("longer", 2, ttl=60)
+    time.sleep(0.1)
+    assert cache.get("default") is None
+    assert cache.get("longer") == 2
+
+
+def test_entries_survive_a_restart(path):
+    TTLCache("test", path=path).set("key", {"urls": ["http://a"]})
+    restarted = TTLCache("test", path=path)
+    assert restarted.get("key") == {"urls": ["http://a"]}
+    assert restarted.disk_hits == 1
+
+
+def test_memory_lru_is_bounded(path):
+    cache = TTLCache("test", max_memory_entries=2, path=path)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("a") == "a"  # still on disk
+    assert cache.disk_hits == 1
+
+
+def test_least_recently_used_entries_are_evicted_from_disk(path):
+    cache = TTLCache("test", max_entries=2, max_memory_entries=0, path=path)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_normalize_key():
+    assert normalize_key("  Who won the  World Cup?! ") == "who won the world cup"
+
+
+@pytest.fixture
+def engine(monkeypatch, path):
+    calls = []
+
+    def search(keyword, num_results, lang, unique):
+        calls.append(keyword)
+        return [] if keyword == "nothing" else [f"http://example.com/{index}" for index in range(num_results)]
+
+    monkeypatch.setitem(sys.modules, "googlesearch", types.SimpleNamespace(search=search))
+    monkeypatch.setattr(jarvis_mine, "get_search_cache", lambda cache=TTLCache("search_urls", path=path): cache)
+    return calls
+
+
+def test_search_urls_go_to_the_engine_once(engine):
+    assert jarvis_mine.search_urls("World Cup winner", 4) == [f"http://example.com/{index}" for index in range(4)]
+    assert jarvis_mine.search_urls("world cup winner!", 4) == [f"http://example.com/{index}" for index in range(4)]
+    assert engine == ["World Cup winner"]
+
+
+def test_result_count_is_part_of_the_key(engine):
+    jarvis_mine.search_urls("world cup", 2)
+    jarvis_mine.search_urls("world cup", 4)
+    assert len(engine) == 2
+
+
+def test_empty_results_are_not_cached(engine):
+    assert jarvis_mine.search_urls("nothing", 4) == []
+    jarvis_mine.search_urls("nothing", 4)
+    assert engine == ["nothing", "nothing"]
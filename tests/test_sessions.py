@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from jarvis_mine import Jarvis
+from jarvis_sessions import SessionManager
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "sessions.sqlite3")
+
+
+def manager(path, **kwargs):
+    return SessionManager(jarvis_factory=Jarvis, path=path, **kwargs)
+
+
+def chat(sessions, session_id, text):
+    with sessions.use(session_id) as session:
+        session.jarvis.remember(text, f"reply to {text}")
+
+
+def history(sessions, session_id):
+    return [message["content"] for message in sessions.get(session_id).jarvis.chat_history]
+
+
+def test_sessions_are_isolated(path):
+    sessions = manager(path)
+    chat(sessions, "alice", "hello")
+    chat(sessions, "bob", "hi")
+    assert history(sessions, "alice") == ["hello", "reply to hello"]
+    assert history(sessions, "bob") == ["hi", "reply to hi"]
+    assert sessions.created == 2
+
+
+def test_spilled_session_is_reloaded(path):
+    sessions = manager(path)
+    chat(sessions, "alice", "hello")
+    sessions.spill("alice")
+    assert len(sessions) == 0 and sessions.metrics()["sessions_on_disk"] == 1
+    assert history(sessions, "alice") == ["hello", "reply to hello"]
+    assert sessions.reloads == 1
+
+
+def test_spilled_sessions_survive_a_restart(path):
+    sessions = manager(path)
+    chat(sessions, "alice", "hello")
+    sessions.spill("alice")
+    assert history(manager(path), "alice") == ["hello", "reply to hello"]
+
+
+def test_least_recently_used_sessions_are_spilled(path):
+    sessions = manager(path, max_sessions=2)
+    for session_id in ("a", "b", "c"):
+        chat(sessions, session_id, "hi")
+    assert len(sessions) == 2 and "a" not in sessions._sessions
+    assert sessions.evictions == 1
+
+
+def test_memory_cap(path):
+    sessions = manager(path, max_memory_bytes=1500)
+    for index in range(5):
+        chat(sessions, f"user{index}", "x" * 300)
+    assert sessions.memory_bytes() <= 1500
+    assert sessions.evictions >= 1
+
+
+def test_busy_sessions_are_never_spilled(path):
+    sessions = manager(path, max_sessions=1, idle_timeout=0)
+    with sessions.use("busy") as busy:
+        busy.jarvis.remember("working", "on it")
+        chat(sessions, "other", "hi")
+        sessions.spill("busy")
+        sessions.evict_idle()
+        assert "busy" in sessions._sessions
+    assert sessions.get("busy") is busy
+
+
+def test_idle_sessions_are_evicted(path):
+    sessions = manager(path, idle_timeout=0)
+    chat(sessions, "alice", "hello")
+    assert sessions.evict_idle() == 1 and len(sessions) == 0
+    assert history(sessions, "alice") == ["hello", "reply to hello"]
+
+
+def test_delete_forgets_everything(path):
+    sessions = manager(path)
+    chat(sessions, "alice", "hello")
+    sessions.spill("alice")
+    sessions.delete("alice")
+    assert history(sessions, "alice") == []
+
+
+def test_async_use_touches_sqlite_off_the_event_loop(path):
+    sessions = manager(path)
+    chat(sessions, "alice", "hello")
+    sessions.spill("alice")
+    acquire = sessions.acquire
+
+    def checked_acquire(session_id):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return acquire(session_id)
+
+    sessions.acquire = checked_acquire
+
+    async def use():
+        async with sessions.async_use("alice") as session:
+            return session.busy, [message["content"] for message in session.jarvis.chat_history]
+
+    assert asyncio.run(use()) == (1, ["hello", "reply to hello"])
+    assert sessions.get("alice").busy == 0
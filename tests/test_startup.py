@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["openai", "googlesearch", "bs4", "tiktoken", "httpx", "mss", "numpy"]
+
+
+def loaded_after(code, tmp_path):
+    """Heavy modules present in sys.modules after running code in a fresh interpreter"""
+    (tmp_path / "config.py").write_text('OPENAI_API_KEY = "test-key"\n')
+    check = f"{code}\nimport sys\nprint(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), REPO_DIR]))
+    result = subprocess.run([sys.executable, "-c", check], cwd=str(tmp_path), env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize("module", ["jarvis_mine", "jarvis_async", "jarvis_sessions"])
+def test_import_loads_no_heavy_dependencies(module, tmp_path):
+    assert loaded_after(f"import {module}", tmp_path) == []
+
+
+def test_shared_jarvis_is_built_without_a_model_client(tmp_path):
+    code = "import jarvis_mine\nassert jarvis_mine.get_jarvis() is jarvis_mine.jarvis_instance\nassert jarvis_mine._openai_client is None"
+    assert "openai" not in loaded_after(code, tmp_path)
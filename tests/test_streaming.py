@@ -0,0 +1,50 @@
+import jarvis_mine
+from jarvis_mine import cached_answer_for
+
+
+def test_deltas_arrive_in_order_and_add_up(jarvis):
+    jarvis._openai_client.reply("Good evening, Sir. All systems are online.")
+    deltas = []
+    text = jarvis.generate_response([{"role": "user", "content": "hi"}], on_delta=deltas.append)
+    assert text == "Good evening, Sir. All systems are online."
+    assert len(deltas) == 7 and "".join(deltas) == text
+    assert jarvis._openai_client.calls[0]["stream"] is True
+
+
+def test_streamed_usage_is_recorded(jarvis):
+    jarvis._openai_client.reply("one two three")
+    jarvis.generate_response([{"role": "user", "content": "count"}], on_delta=lambda delta: None)
+    assert jarvis.usage["calls"] == 1 and jarvis.usage["completion_tokens"] == 3
+
+
+def test_without_a_consumer_nothing_is_streamed(jarvis):
+    jarvis._openai_client.reply("plain")
+    assert jarvis.generate_response([{"role": "user", "content": "hi"}]) == "plain"
+    assert "stream" not in jarvis._openai_client.calls[0]
+
+
+def test_stream_error_is_an_apology(jarvis):
+    def broken(messages):
+        raise ConnectionError("reset")
+    jarvis._openai_client.reply(broken)
+    assert jarvis.generate_response([{"role": "user", "content": "hi"}], on_delta=lambda delta: None).startswith("I apologize")
+
+
+def test_casual_reply_streams_and_is_remembered(jarvis):
+    jarvis._openai_client.reply('{"label": "casual"}', "Always a pleasure to chat, Sir.")
+    deltas = []
+    response = jarvis.get_ai_response("how has your week been going", on_delta=deltas.append)
+    assert "".join(deltas) == response == "Always a pleasure to chat, Sir."
+    assert jarvis.chat_history[-1] == {"role": "assistant", "content": response}
+
+
+def test_cached_answer_is_delivered_as_one_delta(monkeypatch):
+    class Answers:
+        def get(self, question):
+            return "Based on web search, Paris." if question == "capital of france" else None
+
+    monkeypatch.setattr(jarvis_mine, "get_answer_cache", Answers)
+    deltas = []
+    assert cached_answer_for("capital of france", deltas.append) == "Based on web search, Paris."
+    assert deltas == ["Based on web search, Paris."]
+    assert cached_answer_for("capital of spain", deltas.append) is None and len(deltas) == 1
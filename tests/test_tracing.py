@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+import json
+import threading
+
+import pytest
+
+from jarvis_tracing import JsonLinesExporter, PrometheusExporter, Span, Tracer, annotate, count, current_span, summarize
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def tracer():
+    return Tracer([ListExporter()])
+
+
+def test_spans_nest_and_record_attributes(tracer):
+    with tracer.span("request", chars=5) as request:
+        with tracer.span("fetch", url="http://example.com") as fetch:
+            annotate(bytes=100)
+            count(prompt_tokens=3)
+            count(prompt_tokens=4)
+        assert current_span() is request
+    assert current_span() is None
+    inner, outer = tracer.exporters[0].spans
+    assert (inner, outer) == (fetch, request)
+    assert inner.parent_id == outer.span_id and inner.trace_id == outer.trace_id
+    assert inner.attributes == {"url": "http://example.com", "bytes": 100, "prompt_tokens": 7}
+    assert outer.duration >= inner.duration >= 0
+
+
+def test_errors_are_recorded_and_reraised(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("search"):
+            raise ValueError("no results")
+    span = tracer.exporters[0].spans[0]
+    assert span.status == "error" and span.attributes["error"] == "ValueError: no results"
+
+
+def test_disabled_tracer_exports_nothing():
+    tracer = Tracer([ListExporter()], enabled=False)
+    with tracer.span("request"):
+        annotate(chars=1)
+    assert tracer.exporters[0].spans == []
+
+
+def test_spans_follow_copied_contexts_and_tasks(tracer):
+    def fetch():
+        with tracer.span("fetch"):
+            pass
+
+    async def answer():
+        with tracer.span("llm"):
+            pass
+
+    with tracer.span("request") as request:
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(fetch,))
+        thread.start()
+        thread.join()
+        asyncio.run(answer())
+    children = [span for span in tracer.exporters[0].spans if span is not request]
+    assert sorted(span.name for span in children) == ["fetch", "llm"]
+    assert all(span.parent_id == request.span_id for span in children)
+
+
+def test_json_lines_file_and_summary(tmp_path, capsys):
+    path = str(tmp_path / "traces" / "traces.jsonl")
+    tracer = Tracer([JsonLinesExporter(path)])
+    for _ in range(3):
+        with tracer.span("fetch", url="http://example.com"):
+            pass
+    with open(path, encoding="utf-8") as trace_file:
+        records = [json.loads(line) for line in trace_file]
+    assert [record["name"] for record in records] == ["fetch"] * 3
+    assert records[0]["attributes"] == {"url": "http://example.com"} and records[0]["duration_ms"] >= 0
+
+    with open(path, "a", encoding="utf-8") as trace_file:
+        trace_file.write("not json\n")
+    summarize(path)
+    assert "fetch" in capsys.readouterr().out
+
+
+def test_prometheus_histograms_errors_and_totals():
+    exporter = PrometheusExporter(buckets=(0.1, 1.0))
+    assert Tracer([exporter]).prometheus is exporter
+    for duration, error in ((0.05, None), (0.5, None), (2.0, TimeoutError("slow"))):
+        span = Span("llm", attributes={"prompt_tokens": 10, "model": "gpt"})
+        span.finish(error)
+        span.duration = duration
+        exporter.export(span)
+
+    metrics = exporter.render()
+    assert 'jarvis_span_duration_seconds_bucket{span="llm",le="0.1"} 1' in metrics
+    assert 'jarvis_span_duration_seconds_bucket{span="llm",le="1.0"} 2' in metrics
+    assert 'jarvis_span_duration_seconds_bucket{span="llm",le="+Inf"} 3' in metrics
+    assert 'jarvis_span_duration_seconds_count{span="llm"} 3' in metrics
+    assert 'jarvis_span_duration_seconds_sum{span="llm"} 2.550000' in metrics
+    assert 'jarvis_span_errors_total{span="llm"} 1' in metrics
+    assert 'jarvis_span_attribute_total{span="llm",attribute="prompt_tokens"} 30' in metrics
+    assert "model" not in metrics
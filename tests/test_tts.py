@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from jarvis_tts import SpeechPipeline, split_sentences
+
+
+class FakeEngine:
+    """Speaks by waiting until stop() or a timeout, and records what it said"""
+
+    def __init__(self, seconds=0.01):
+        self.seconds = seconds
+        self.spoken = []
+        self.stops = 0
+        self._stopped = threading.Event()
+
+    def speak(self, text):
+        self._stopped.clear()
+        self.spoken.append(text)
+        self._stopped.wait(self.seconds)
+
+    def stop(self):
+        self.stops += 1
+        self._stopped.set()
+
+
+def pipeline(seconds=0.01):
+    engine = FakeEngine(seconds)
+    return engine, SpeechPipeline(engine.speak, stop_fn=engine.stop)
+
+
+@pytest.mark.parametrize("text, sentences, remainder", [
+    ("Hello there. How are", ["Hello there."], "How are"),
+    ("Really?! Yes. ", ["Really?!", "Yes."], ""),
+    ("Dr. Smith and Mr. Stark met at 3.30 today. Next", ["Dr. Smith and Mr. Stark met at 3.30 today."], "Next"),
+    ('He said "stop." Then left', ['He said "stop."'], "Then left"),
+    ("First line\nSecond line", ["First line"], "Second line"),
+    ("Revenue was $4.5 billion", [], "Revenue was $4.5 billion"),
+    ("The answer is no. The store is closed today. Try tomorrow.",
+     ["The answer is no.", "The store is closed today."], "Try tomorrow."),
+    ("See No. 5 on the list. Then", ["See No. 5 on the list."], "Then"),
+    ("It is no. ", [], "It is no. "),
+    ("", [], ""),
+])
+def test_split_sentences(text, sentences, remainder):
+    assert split_sentences(text) == (sentences, remainder)
+
+
+def test_sentences_split_across_deltas():
+    engine, speech = pipeline()
+    for delta in ["The temperature in Taip", "ei is 25", " degrees. It will ", "rain later", "."]:
+        speech.feed(delta)
+    speech.flush()
+    speech.wait()
+    assert engine.spoken == ["The temperature in Taipei is 25 degrees.", "It will rain later."]
+
+
+def test_sentences_are_spoken_in_order():
+    engine, speech = pipeline()
+    speech.speak("First one. Second one! Third")
+    speech.wait()
+    assert engine.spoken == ["First one.", "Second one!", "Third"]
+
+
+def test_streamed_sentences_play_before_the_response_is_complete():
+    engine, speech = pipeline()
+    heard_during_generation = []
+
+    def generate(on_delta):
+        for delta in ["Hello there. ", "This is ", "a test."]:
+            on_delta(delta)
+            time.sleep(0.05)
+            heard_during_generation.append(list(engine.spoken))
+        return "Hello there. This is a test."
+
+    assert speech.speak_streamed(generate) == "Hello there. This is a test."
+    assert heard_during_generation[0] == ["Hello there."]
+    assert engine.spoken == ["Hello there.", "This is a test."]
+
+
+def test_unstreamed_response_is_spoken():
+    engine, speech = pipeline()
+    speech.speak_streamed(lambda on_delta: "Cached answer.")
+    assert engine.spoken == ["Cached answer."]
+
+
+def test_interrupt_cuts_off_the_sentence_and_drops_the_queue():
+    engine, speech = pipeline(seconds=5)
+    speech.speak("One. Two. Three.")
+    time.sleep(0.05)
+    started = time.time()
+    speech.interrupt()
+    speech.wait()
+    assert time.time() - started < 1
+    assert engine.spoken == ["One."]
+    assert engine.stops == 1 and speech.interruptions == 1
+
+
+def test_rest_of_an_interrupted_stream_is_not_spoken():
+    engine, speech = pipeline()
+
+    def generate(on_delta):
+        on_delta("Before. ")
+        speech.interrupt()
+        on_delta("After. ")
+        return "Before. After."
+
+    speech.speak_streamed(generate)
+    speech.speak("Next message.")
+    speech.wait()
+    assert "After." not in engine.spoken
+    assert engine.spoken[-1] == "Next message."
@@ -0,0 +1,83 @@
+import pytest
+
+from jarvis_cache import VisionCache, hamming_distance
+from jarvis_image import changed_share, dhash, gray_thumbnail, prepare_image
+from screens import screen
+
+
+def test_dhash_is_stable_and_sized():
+    image = screen(1)
+    assert dhash(image) == dhash(image.copy())
+    assert dhash(image).bit_length() <= 256
+
+
+def test_same_layout_different_text_is_close_in_dhash_but_not_in_pixels():
+    first, second = screen(1), screen(2)
+    assert hamming_distance(dhash(first), dhash(second)) <= 32
+    assert changed_share(gray_thumbnail(first), gray_thumbnail(second)) > 0.01
+
+
+def test_prepared_image_carries_hash_and_thumbnail():
+    prepared = prepare_image(screen(1), max_side=1024)
+    assert max(prepared.width, prepared.height) == 1024
+    assert prepared.mime == "image/jpeg"
+    assert prepared.thumbnail.shape == (144, 256)
+    assert isinstance(prepared.phash, int)
+
+
+@pytest.fixture
+def cache():
+    return VisionCache()
+
+
+def remember(cache, image, answer, prompt="look at my screen"):
+    cache.set(dhash(image), prompt, answer, gray_thumbnail(image))
+
+
+def lookup(cache, image, prompt="look at my screen"):
+    return cache.get(dhash(image), prompt, gray_thumbnail(image))
+
+
+def test_identical_screen_hits(cache):
+    remember(cache, screen(1), "an editor")
+    assert lookup(cache, screen(1)) == "an editor"
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_clock_tick_still_hits(cache):
+    remember(cache, screen(1), "an editor")
+    assert lookup(cache, screen(1, clock="12:01")) == "an editor"
+
+
+def test_different_text_in_the_same_layout_misses(cache):
+    remember(cache, screen(1), "an editor")
+    assert lookup(cache, screen(2)) is None
+
+
+def test_one_changed_line_misses(cache):
+    remember(cache, screen(1), "an editor")
+    assert lookup(cache, screen(1, changed_line=20)) is None
+
+
+def test_other_prompt_misses(cache):
+    remember(cache, screen(1), "an editor")
+    assert lookup(cache, screen(1), prompt="what time is it") is None
+
+
+def test_without_thumbnails_only_the_exact_hash_matches(cache):
+    cache.set(0b1010, "prompt", "answer")
+    assert cache.get(0b1010, "prompt") == "answer"
+    assert cache.get(0b1011, "prompt") is None
+
+
+def test_entries_expire_and_are_evicted():
+    cache = VisionCache(ttl=0)
+    cache.set(1, "prompt", "answer")
+    assert cache.get(1, "prompt") is None
+
+    cache = VisionCache(max_entries=2)
+    for image_hash in range(3):
+        cache.set(image_hash, "prompt", str(image_hash))
+    assert cache.get(0, "prompt") is None
+    assert cache.get(2, "prompt") == "2"
+    assert cache.stats()["evictions"] == 1
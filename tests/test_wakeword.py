@@ -0,0 +1,101 @@
+import wave
+
+import numpy as np
+import pytest
+
+from jarvis_wakeword import (
+    SAMPLE_RATE, WakeWordDetector, mel_features, pcm_to_float, read_wav, subsequence_dtw, voiced_segment, write_wav,
+)
+
+WAKE_WORD = [400, 700, 500, 900]
+COMMAND = [2500, 3000, 2000, 3500, 2800, 1500]
+
+
+def tones(frequencies, seconds=0.15, amplitude=0.3):
+    """A stand-in for a spoken word: a sequence of tones with one harmonic"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return np.concatenate([amplitude * (np.sin(2 * np.pi * f * t) + 0.5 * np.sin(4 * np.pi * f * t))
+                           for f in frequencies]).astype(np.float32)
+
+
+def clip(*parts, seed=0):
+    """Parts between 300 ms of faint noise"""
+    silence = np.zeros(int(SAMPLE_RATE * 0.3), dtype=np.float32)
+    samples = np.concatenate([silence, *parts, silence])
+    return (samples + np.random.default_rng(seed).normal(0, 0.002, len(samples))).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def detector():
+    detector = WakeWordDetector(path=None)
+    detector.enroll([clip(tones([f * pitch for f in WAKE_WORD], amplitude=amplitude), seed=index)
+                     for index, (pitch, amplitude) in enumerate([(1.0, 0.3), (1.03, 0.2), (0.97, 0.4)])])
+    return detector
+
+
+def write_pcm(path, data, sample_width, rate=SAMPLE_RATE, channels=1):
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(data)
+
+
+def test_read_wav_16_bit_round_trip(tmp_path):
+    samples = tones([440], seconds=0.1)
+    write_wav(str(tmp_path / "clip.wav"), samples)
+    assert np.allclose(read_wav(str(tmp_path / "clip.wav")), samples, atol=1e-4)
+
+
+def test_read_wav_24_bit(tmp_path):
+    values = np.array([0, 1, -1, 2 ** 23 - 1, -2 ** 23, 1234567, -1234567], dtype=np.int32)
+    data = b"".join(int(value).to_bytes(3, "little", signed=True) for value in values)
+    write_pcm(tmp_path / "clip.wav", data, sample_width=3)
+    assert np.allclose(read_wav(str(tmp_path / "clip.wav")), values / 2 ** 23, atol=1e-6)
+
+
+def test_read_wav_stereo_and_resampled(tmp_path):
+    stereo = np.repeat((tones([440], seconds=0.5) * 32767).astype(np.int16), 2)
+    write_pcm(tmp_path / "clip.wav", stereo.tobytes(), sample_width=2, rate=48000, channels=2)
+    assert abs(len(read_wav(str(tmp_path / "clip.wav"))) - len(stereo) // 2 // 3) <= 1
+
+
+def test_unsupported_sample_width_is_a_clear_error():
+    with pytest.raises(ValueError, match="sample width"):
+        pcm_to_float(b"\0" * 10, sample_width=5)
+
+
+def test_voiced_segment_trims_silence():
+    word = tones(WAKE_WORD)
+    segment = voiced_segment(clip(word))
+    assert abs(len(segment) - len(word)) < 0.05 * SAMPLE_RATE
+    assert voiced_segment(clip()) is None
+
+
+def test_subsequence_dtw_finds_the_template_anywhere():
+    features = mel_features(clip(tones(COMMAND), tones(WAKE_WORD)))
+    template = mel_features(tones(WAKE_WORD))
+    assert subsequence_dtw(template, features) < 0.5 * subsequence_dtw(template, mel_features(clip(tones(COMMAND))))
+
+
+def test_detects_the_wake_word(detector):
+    assert detector.detect(clip(tones([f * 1.01 for f in WAKE_WORD], amplitude=0.25), seed=9))
+
+
+def test_detects_the_wake_word_followed_by_a_command(detector):
+    # Normalizing over the whole utterance let the loud command shift the wake word's features past the threshold
+    assert detector.detect(clip(tones(WAKE_WORD, amplitude=0.25), tones(COMMAND, amplitude=0.6), seed=8))
+
+
+def test_ignores_other_sounds_and_silence(detector):
+    assert not detector.detect(clip(tones([1200, 300, 1500, 250]), seed=7))
+    assert not detector.detect(clip(seed=6))
+    assert detector.stats()["silent"] >= 1
+
+
+def test_save_and_load(detector, tmp_path):
+    path = str(tmp_path / "wakeword.npz")
+    detector.save(path)
+    loaded = WakeWordDetector.load(path)
+    assert loaded.enrolled and loaded.threshold == pytest.approx(detector.threshold)
+    assert all(np.allclose(a, b) for a, b in zip(loaded.templates, detector.templates))
@@ -0,0 +1,71 @@
+from PIL import ImageDraw
+
+from jarvis_watch import ScreenWatcher
+from screens import screen
+
+
+class FakeJarvis:
+    def __init__(self):
+        self.calls = []
+        self.history = []
+
+    def analyze_image(self, prompt, image_data=None, **kwargs):
+        self.calls.append(prompt)
+        return f"analysis {len(self.calls)}"
+
+    def get_ai_response_with_vision(self, *args, **kwargs):
+        raise AssertionError("screen watch must not write to the chat history")
+
+
+def watcher(**kwargs):
+    jarvis = FakeJarvis()
+    return jarvis, ScreenWatcher(jarvis, on_response=lambda response: None, cooldown=0, **kwargs)
+
+
+def with_toast(image):
+    toast = image.copy()
+    ImageDraw.Draw(toast).rectangle((1540, 950, 1900, 1030), fill=(60, 60, 70))
+    return toast
+
+
+def test_first_sample_is_analyzed_without_touching_history():
+    jarvis, screen_watcher = watcher()
+    assert screen_watcher.check(screen(1)) == "analysis 1"
+    assert jarvis.calls == [screen_watcher.prompt]
+
+
+def test_full_text_change_is_noticed():
+    jarvis, screen_watcher = watcher()
+    screen_watcher.check(screen(1))
+    assert screen_watcher.change(screen_watcher.frame(screen(2))) > 2 * screen_watcher.threshold
+    assert screen_watcher.check(screen(2)) == "analysis 2"
+
+
+def test_notification_toast_is_noticed():
+    jarvis, screen_watcher = watcher()
+    screen_watcher.check(screen(1))
+    assert screen_watcher.check(with_toast(screen(1))) == "analysis 2"
+
+
+def test_clock_tick_stays_below_threshold():
+    jarvis, screen_watcher = watcher()
+    screen_watcher.check(screen(1))
+    assert screen_watcher.check(screen(1, clock="12:01")) is None
+    assert screen_watcher.stats()["below_threshold"] == 1
+    assert len(jarvis.calls) == 1
+
+
+def test_new_line_of_text_is_noticed():
+    jarvis, screen_watcher = watcher()
+    screen_watcher.check(screen(1))
+    assert screen_watcher.check(screen(1, changed_line=10)) == "analysis 2"
+
+
+def test_cooldown_keeps_reference_until_it_expires():
+    jarvis, screen_watcher = watcher()
+    screen_watcher.cooldown = 3600
+    screen_watcher.check(screen(1))
+    assert screen_watcher.check(screen(2)) is None
+    assert screen_watcher.stats()["in_cooldown"] == 1
+    screen_watcher._last_analysis = 0.0
+    assert screen_watcher.check(screen(2)) == "analysis 2"
@@ -0,0 +1,139 @@
+import os
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+import jarvis_web
+from jarvis_sessions import SessionManager
+
+
+class EchoJarvis:
+    """Session Jarvis stand-in that streams its reply in two pieces"""
+
+    def __init__(self):
+        self.history = []
+
+    async def async_get_ai_response(self, text, on_delta=None):
+        reply = f"Echo: {text}"
+        on_delta("Echo: ")
+        on_delta(text)
+        self.history.append(reply)
+        return reply
+
+    def export_state(self):
+        return {"history": self.history}
+
+    def load_state(self, state):
+        self.history = state["history"]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(jarvis_web, "sessions", SessionManager(jarvis_factory=EchoJarvis, path=str(tmp_path / "sessions.sqlite3")))
+    app = jarvis_web.create_app()
+    http = app.test_client()
+    http.get("/")  # sets the conversation cookie
+    client = jarvis_web.socketio.test_client(app, flask_test_client=http)
+    yield client
+    client.disconnect()
+
+
+def wait_for_response(client, timeout=5):
+    events = []
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        events += [event["args"][0] for event in client.get_received() if event["name"] == "jarvis_response"]
+        if events and events[-1]["type"] != "partial":
+            return events
+        time.sleep(0.01)
+    raise AssertionError(f"no response, got {events}")
+
+
+def test_response_is_streamed_then_completed(client):
+    client.emit("text_input", {"text": "hello"})
+    events = wait_for_response(client)
+    assert [event["message"] for event in events] == ["Echo: ", "hello", "Echo: hello"]
+    assert [event["type"] for event in events] == ["partial", "partial", "response"]
+    assert len({event["id"] for event in events}) == 1
+
+
+def test_blank_messages_are_ignored(client):
+    client.emit("text_input", {"text": "   "})
+    time.sleep(0.1)
+    assert client.get_received() == []
+
+
+def test_plain_string_message_is_answered(client):
+    client.emit("text_input", "hello")
+    assert wait_for_response(client)[-1]["message"] == "Echo: hello"
+
+
+@pytest.mark.parametrize("data", [None, 42, ["hello"], {"text": None}, {"text": 42}])
+def test_malformed_messages_are_ignored(data):
+    jarvis_web.submit("sid", data)
+
+
+def test_conversation_survives_a_reconnect(client):
+    client.emit("text_input", {"text": "first"})
+    wait_for_response(client)
+    client.disconnect()  # spills the session
+    assert jarvis_web.sessions.metrics()["sessions_on_disk"] == 1
+    client.connect()
+    client.emit("text_input", {"text": "second"})
+    wait_for_response(client)
+    [session_id] = set(jarvis_web.connections.values())
+    assert jarvis_web.sessions.get(session_id).jarvis.history == ["Echo: first", "Echo: second"]
+
+
+def test_stats_and_metrics(client):
+    app = jarvis_web.app.test_client()
+    assert app.get("/stats").get_json()["sessions_active"] >= 1
+    metrics = app.get("/metrics").get_data(as_text=True)
+    assert "# TYPE jarvis_sessions_active gauge" in metrics
+    assert "jarvis_sessions_created_total" in metrics
+
+
+def test_secret_key_from_the_environment(monkeypatch):
+    monkeypatch.setenv("JARVIS_WEB_SECRET_KEY", "from-env")
+    assert jarvis_web.secret_key() == "from-env"
+
+
+def test_generated_secret_key_is_private_and_stable(monkeypatch, tmp_path):
+    monkeypatch.delenv("JARVIS_WEB_SECRET_KEY", raising=False)
+    monkeypatch.setattr(jarvis_web, "_cache_path", lambda name: str(tmp_path / name))
+    key = jarvis_web.secret_key()
+    assert len(key) == 64 and jarvis_web.secret_key() == key
+    assert stat.S_IMODE(os.stat(tmp_path / "web_secret_key").st_mode) == 0o600
+
+
+def test_import_writes_no_secret_key(tmp_path):
+    cache_dir = tmp_path / "cache"
+    (tmp_path / "config.py").write_text('OPENAI_API_KEY = "test-key"\n')
+    env = {name: value for name, value in os.environ.items() if name != "JARVIS_WEB_SECRET_KEY"}
+    env["JARVIS_CACHE_DIR"] = str(cache_dir)
+    env["PYTHONPATH"] = os.pathsep.join([str(tmp_path), os.path.dirname(os.path.dirname(os.path.abspath(__file__)))])
+    result = subprocess.run([sys.executable, "-c", "import jarvis_web; assert not jarvis_web.app.config['SECRET_KEY']"],
+                            cwd=str(tmp_path), env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert not (cache_dir / "web_secret_key").exists()
+
+
+def test_create_app_sets_the_secret_key(client):
+    assert jarvis_web.app.config['SECRET_KEY']
+
+
+@pytest.mark.parametrize("value, origins", [
+    (None, None),
+    ("", None),
+    ("*", "*"),
+    ("https://a.example, https://b.example,", ["https://a.example", "https://b.example"]),
+])
+def test_cors_origins(monkeypatch, value, origins):
+    if value is None:
+        monkeypatch.delenv("JARVIS_WEB_CORS_ORIGINS", raising=False)
+    else:
+        monkeypatch.setenv("JARVIS_WEB_CORS_ORIGINS", value)
+    assert jarvis_web.cors_origins() == origins